@@ -0,0 +1,8 @@
+"""
+Entry point ของ Vercel Python runtime - vercel.json rewrite ทุก path มาที่นี่
+(ใช้ config แบบ functions/rewrites เพราะ "builds" แบบเดิมข้าม installCommand/buildCommand)
+"""
+
+from config.wsgi import application
+
+app = application
@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 # Load .env if python-dotenv is installed
@@ -37,10 +39,64 @@ DEBUG = os.environ.get('DJANGO_DEBUG', 'True').lower() in ('true', '1', 'yes')
 
 ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
+# กำลังรัน python manage.py test (test runner บังคับ DEBUG=False)
+TESTING = sys.argv[1:2] == ['test']
+
 # Base URL for member card links and QR code (ใช้ใน get_card_view_only_url)
 # เมื่อ deploy production ให้เปลี่ยนเป็น domain จริง เช่น https://your-domain.com
 SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
 
+# key สำหรับเซ็น token ใน QR ของบัตร (members/tokens.py) - Ed25519, ต้องตั้งใน production (check --deploy)
+# ว่าง + DEBUG = key ชั่วคราวต่อ process, test ตั้ง key เองด้วย override_settings
+# CARD_SIGNING_KEY = "kid:<private key>" อยู่บน server เท่านั้น สร้างด้วย python manage.py card_keys --generate
+# CARD_VERIFY_KEYS = "kid:<public key>,..." public key ของ key เก่าที่ยังรับระหว่างหมุน key
+# เครื่องสแกนใช้แค่ public key (python manage.py card_keys)
+CARD_SIGNING_KEY = os.environ.get('CARD_SIGNING_KEY', '')
+CARD_VERIFY_KEYS = dict(
+    item.split(':', 1)
+    for item in os.environ.get('CARD_VERIFY_KEYS', '').split(',')
+    if ':' in item
+)
+
+# token ที่เครื่องสแกนต้องส่งเมื่อโหลด snapshot/delta (ว่าง = ปิด endpoint)
+SCANNER_API_TOKEN = os.environ.get('SCANNER_API_TOKEN', '')
+
+# key ของ HMAC ที่ใช้ทำ fingerprint ใน snapshot (members/scanner.py) - ใส่ในเครื่องสแกนด้วย, ว่าง = ปิด endpoint
+SCANNER_FINGERPRINT_KEY = os.environ.get('SCANNER_FINGERPRINT_KEY', '')
+
+# อายุสูงสุด (วินาที) ที่ browser/proxy cache หน้าบัตรสาธารณะได้ - ไม่เกินวันหมดอายุของบัตรเสมอ
+CARD_CACHE_MAX_AGE = int(os.environ.get('CARD_CACHE_MAX_AGE', '300'))
+
+# อายุ (วินาที) ของตัวบัตรที่ render แล้วใน cache "default" (members/http_cache.py) - ล้างเองเมื่อแก้/ลบสมาชิก
+CARD_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('CARD_FRAGMENT_CACHE_TIMEOUT', '86400'))
+
+# บันทึกการสแกนบัตร (members/scans.py) - เขียนเป็นชุดจาก thread เบื้องหลัง
+CARD_SCAN_BUFFERED = os.environ.get('CARD_SCAN_BUFFERED', 'True').lower() in ('true', '1', 'yes')
+CARD_SCAN_BATCH_SIZE = int(os.environ.get('CARD_SCAN_BATCH_SIZE', '200'))
+CARD_SCAN_FLUSH_INTERVAL = float(os.environ.get('CARD_SCAN_FLUSH_INTERVAL', '2'))
+CARD_SCAN_BUFFER_MAX = int(os.environ.get('CARD_SCAN_BUFFER_MAX', '10000'))
+CARD_SCAN_PUT_TIMEOUT = float(os.environ.get('CARD_SCAN_PUT_TIMEOUT', '0.05'))
+# serverless (Vercel ตั้ง VERCEL=1) ไม่มี process ที่อยู่ต่อหลังตอบ - เขียนคิวตอนจบ request แทน thread เบื้องหลัง
+CARD_SCAN_WRITER_THREAD = os.environ.get(
+    'CARD_SCAN_WRITER_THREAD', 'False' if os.environ.get('VERCEL') else 'True'
+).lower() in ('true', '1', 'yes')
+
+# จำนวนแถวที่หน้านำเข้าสมาชิกบันทึกต่อ request (PBKDF2 ~0.2-0.4 วินาที/แถว บน serverless ที่ hash ขนานไม่ได้)
+# 20 แถว ≈ 4-8 วินาที ให้จบใน timeout ของ function - หน้าเว็บส่งชุดถัดไปต่อเองจนครบ
+IMPORT_COMMIT_BATCH_SIZE = int(os.environ.get('IMPORT_COMMIT_BATCH_SIZE', '20'))
+
+# สร้างรูปย่อ (WebP/JPEG) ของรูปสมาชิกทันทีหลังอัปโหลด - ปิดได้แล้วใช้ build_photo_variants แทน
+PHOTO_VARIANTS_ON_UPLOAD = os.environ.get('PHOTO_VARIANTS_ON_UPLOAD', 'True').lower() in ('true', '1', 'yes')
+
+# อีเมลเตือนบัตรใกล้หมดอายุ (members/reminders.py) - จำนวนวันล่วงหน้า และอัตราส่งสูงสุด (ฉบับ/วินาที, 0 = ไม่จำกัด)
+EXPIRY_REMINDER_DAYS = int(os.environ.get('EXPIRY_REMINDER_DAYS', '30'))
+EXPIRY_REMINDER_RATE = float(os.environ.get('EXPIRY_REMINDER_RATE', '5'))
+
+# วัดเวลาต่อ request (members/metrics.py): header Server-Timing สำหรับ staff และ /metrics (Prometheus)
+# METRICS_TOKEN ว่าง = ปิด /metrics (ตอบ 404) ตั้งแล้ว scraper ต้องส่ง Authorization: Bearer <token>
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 
 # Application definition
 
@@ -60,6 +116,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'members.metrics.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,10 +130,18 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates ที่จับเวลา render ให้ Server-Timing / /metrics
+        'BACKEND': 'members.metrics.TimedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # cached loader ทุกโหมด (ไม่พึ่งค่า default ที่ผูกกับ DEBUG) - compile template ครั้งเดียวต่อ process
+            # ใน runserver Django ล้าง cache นี้เองเมื่อไฟล์ template เปลี่ยน
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.template.context_processors.i18n',
@@ -103,6 +168,15 @@ DATABASES = {
 }
 
 
+# Authentication
+# MemberModelBackend โหลด Member มากับ User ในคิวรีเดียว
+# ModelBackend คงไว้ให้ session เดิมที่ผูกกับ backend นี้ยังใช้งานได้
+AUTHENTICATION_BACKENDS = [
+    'members.backends.MemberModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -151,9 +225,29 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# ผลของ collectstatic (WhiteNoise ให้บริการจากที่นี่) - CSS/ฟอนต์ใน static/ สร้างด้วย python manage.py build_assets
+STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Cache
+# default: in-process, "qr": เก็บ PNG ของ QR code ที่สร้างแล้ว (key ผูกกับ SITE_URL + public_id + ขนาด)
+# บน serverless ให้ตั้ง QR_CACHE_DIR ไปยัง path ที่เขียนได้ เช่น /tmp/gunclub_qr
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "qr": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            'QR_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), "gunclub_qr_cache"),
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
 # Email (for password reset) - ใช้ console ใน development
 EMAIL_BACKEND = os.environ.get(
     'EMAIL_BACKEND',
@@ -182,11 +276,15 @@ STORAGES = {
     "default": {
         "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
     },
+    # ชื่อไฟล์มี hash + .br/.gz บีบอัดไว้ตอน collectstatic - WhiteNoise ส่งแบบ immutable (cache ได้ถาวร)
     "staticfiles": {
-        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        "BACKEND": "members.storage.StaticFilesStorage",
     },
 }
 
+# False = {% static %} ของไฟล์ที่ยังไม่ได้ build/collectstatic คืนชื่อเดิม (dev/test) แทน error
+STATIC_MANIFEST_STRICT = not (DEBUG or TESTING)
+
 import dj_database_url
 
 if os.environ.get("DATABASE_URL"):
@@ -200,10 +298,13 @@ import os
 if os.environ.get("DATABASE_URL"):
     DATABASES["default"] = dj_database_url.parse(os.environ.get("DATABASE_URL"))
 
-SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+# test database ของ SQLite เป็นไฟล์ (ค่า default คือ in-memory ซึ่งแต่ละ thread เห็นคนละฐาน)
+# ให้ test ที่ยิง request พร้อมกันหลาย thread รันได้จริง
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"].setdefault("TEST", {})["NAME"] = os.path.join(
+        tempfile.gettempdir(), "gunclub_test.sqlite3"
+    )
 
-# ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
-STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
-STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
\ No newline at end of file
+# ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
\ No newline at end of file
@@ -25,6 +25,12 @@ from django.conf.urls.static import static
 urlpatterns = [
     path("i18n/", include("django.conf.urls.i18n")),
     path("admin/", admin.site.urls),
+    # API สำหรับเครื่องสแกนหน้าประตู (ไม่มี prefix ภาษา)
+    path("api/card/<uuid:public_id>/verify", views.verify_card, name="verify_card"),
+    path("api/scanner/snapshot", views.scanner_snapshot, name="scanner_snapshot"),
+    path("api/scanner/delta", views.scanner_delta, name="scanner_delta"),
+    # Prometheus scrape endpoint (ต้องตั้ง METRICS_TOKEN)
+    path("metrics", views.metrics, name="metrics"),
     path("", RedirectView.as_view(url="/th/", permanent=False)),
 ]
 
@@ -1,5 +1,13 @@
+from datetime import date
+
 from django.contrib import admin
-from .models import Member
+from django.http import StreamingHttpResponse
+
+from .bulk import DEACTIVATE, REACTIVATE, RENEW, apply_bulk_action_in_chunks
+from .exporter import EXPORT_FIELDS, EXPORT_FORMATS, stream_export
+from .models import CardScan, ExpiryReminder, Member, MemberBulkAction
+from .pagination import EstimatedCountPaginator
+from .search import SEARCH_FIELDS, search_members
 
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
@@ -11,5 +19,73 @@ class MemberAdmin(admin.ModelAdmin):
         'is_active',
         'expire_date',
     )
-    search_field = ('member_id', 'first_name', 'last_name')
-    list_filter = ('role', 'is_active')
\ No newline at end of file
+    # ค้นหาผ่าน search index (ดู get_search_results) - field ตรงกับ members.search.SEARCH_FIELDS
+    search_fields = SEARCH_FIELDS
+    list_filter = ('role', 'is_active')
+    date_hierarchy = 'expire_date'
+    raw_id_fields = ('user',)
+    # ไม่ COUNT(*) ทั้งตาราง: หน้าแรกใช้จำนวนโดยประมาณ และไม่แสดง "(x total)" ตอนกรอง
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('export_csv', 'renew_one_year', 'deactivate', 'reactivate')
+
+    def get_search_results(self, request, queryset, search_term):
+        # FTS5 / pg_trgm แทน icontains หลาย field (ที่สแกนทั้งตาราง)
+        if not search_term.strip():
+            return queryset, False
+        return search_members(queryset, search_term), False
+
+    def _bulk(self, request, queryset, action, **kwargs):
+        # UPDATE ทีละชุดตาม pk + บันทึก MemberBulkAction ต่อชุด (ดู members.bulk)
+        affected = apply_bulk_action_in_chunks(
+            queryset, action, performed_by=request.user,
+            criteria={"admin": request.GET.urlencode()}, **kwargs,
+        )
+        self.message_user(request, f"{affected} member(s) updated")
+
+    @admin.action(description="Export selected members as CSV")
+    def export_csv(self, request, queryset):
+        # stream ทีละ chunk จากฐานข้อมูล (ไม่สร้าง object ของทุกแถว)
+        response = StreamingHttpResponse(
+            stream_export(queryset.order_by(), "csv", EXPORT_FIELDS),
+            content_type=f"{EXPORT_FORMATS['csv']}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="members-{date.today().isoformat()}.csv"'
+        return response
+
+    @admin.action(description="Renew selected members by 365 days")
+    def renew_one_year(self, request, queryset):
+        self._bulk(request, queryset, RENEW, days=365)
+
+    @admin.action(description="Deactivate selected members")
+    def deactivate(self, request, queryset):
+        self._bulk(request, queryset, DEACTIVATE)
+
+    @admin.action(description="Reactivate selected members")
+    def reactivate(self, request, queryset):
+        self._bulk(request, queryset, REACTIVATE)
+
+
+@admin.register(CardScan)
+class CardScanAdmin(admin.ModelAdmin):
+    list_display = ('scanned_at', 'public_id', 'member', 'was_valid', 'remote_addr')
+    list_filter = ('was_valid',)
+    list_select_related = ('member',)
+    date_hierarchy = 'scanned_at'
+    raw_id_fields = ('member',)
+
+
+@admin.register(ExpiryReminder)
+class ExpiryReminderAdmin(admin.ModelAdmin):
+    list_display = ('member', 'expire_date', 'email', 'claimed_at', 'sent_at')
+    list_select_related = ('member',)
+    date_hierarchy = 'claimed_at'
+    raw_id_fields = ('member',)
+
+
+@admin.register(MemberBulkAction)
+class MemberBulkActionAdmin(admin.ModelAdmin):
+    list_display = ('performed_at', 'action', 'affected', 'params', 'performed_by')
+    list_filter = ('action',)
+    list_select_related = ('performed_by',)
+    date_hierarchy = 'performed_at'
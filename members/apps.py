@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class MembersConfig(AppConfig):
     name = 'members'
+
+    def ready(self):
+        from django.core.checks import register
+        from django.db.models.signals import post_migrate
+
+        from . import signals
+        from .storage import check_static_manifest
+        from .tokens import check_signing_key
+        register(check_signing_key, deploy=True)
+        register(check_static_manifest, deploy=True)
+        post_migrate.connect(signals.ensure_search_index, sender=self)
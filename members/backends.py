@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class MemberModelBackend(ModelBackend):
+    """
+    ModelBackend ที่โหลด User พร้อม Member profile (select_related) ในคิวรีเดียว
+    ทำให้ request.user.member ถูก cache ไว้บน user ตั้งแต่ต้น request
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related("member").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
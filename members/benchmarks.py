@@ -0,0 +1,192 @@
+"""
+Benchmark ของ hot path ตามขนาดรายชื่อสมาชิก (เรียกจาก command benchmark และ QueryBudgetTests)
+
+แต่ละ case วัด:
+  cold_ms / cold_queries  - ครั้งแรกหลังล้าง cache (dashboard snapshot, QR, ...)
+  median_ms / queries     - ค่ากลางของรอบถัด ๆ ไป (cache อุ่นแล้ว)
+จำนวนคิวรีต้องไม่เกิน QUERY_BUDGETS ทุกขนาด (hot path ต้องไม่โตตามจำนวนสมาชิก)
+เวลาเทียบกับ baseline ที่บันทึกไว้ได้ด้วย compare_to_baseline()
+"""
+
+import platform
+import statistics
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .exporter import EXPORT_FIELDS, stream_export
+from .models import Member
+from .pagination import NEXT, encode_cursor
+from .seeding import seed_members
+from .utils import get_qr_png, get_qr_svg
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+# จำนวนคิวรีสูงสุดต่อ request (รวม session + user + member ของผู้ล็อกอิน) ตอน cache อุ่นแล้ว
+QUERY_BUDGETS = {
+    "staff_dashboard": 3,  # + watermark ของ rollup (key ของสถิติการสแกน)
+    "member_list": 3,
+    "member_list_search": 4,
+    "member_list_deep": 3,
+    "member_card_view_only": 1,
+    "card_print": 3,
+    "member_qr_svg": 1,
+    "member_qr_png": 1,
+    "export_csv": 1,
+}
+
+# เวลาที่ช้ากว่า baseline ได้ (เท่า) และส่วนต่างขั้นต่ำ (ms) ก่อนนับว่าช้าลง - กันความผันผวนของเครื่อง
+DEFAULT_TOLERANCE = 1.5
+DEFAULT_MIN_DELTA_MS = 5.0
+
+SEARCH_TERM = "สมชาย"
+
+
+def _staff_client():
+    """Client ที่ล็อกอินเป็น PRESIDENT (สร้างครั้งแรกที่เรียก)"""
+    user, created = User.objects.get_or_create(username="benchmark-staff")
+    if created:
+        Member.objects.create(
+            user=user, first_name="benchmark", last_name="staff",
+            join_date=timezone.now().date(),
+            role="PRESIDENT",
+        )
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def _clear_caches():
+    for alias in ("default", "qr"):
+        caches[alias].clear()
+    get_qr_png.cache_clear()
+    get_qr_svg.cache_clear()
+
+
+def _cases():
+    """{ชื่อ: function(client, sample) ที่ทำงานหนึ่งรอบ}"""
+
+    def get(url, **params):
+        def run(client, sample):
+            response = client.get(url(sample), params)
+            assert response.status_code == 200, f"{response.status_code} from {url(sample)}"
+            return response
+        return run
+
+    def export_csv(client, sample):
+        for _ in stream_export(Member.objects.all(), "csv", EXPORT_FIELDS):
+            pass
+
+    return {
+        "staff_dashboard": get(lambda s: reverse("staff_dashboard")),
+        "member_list": get(lambda s: reverse("member_list")),
+        "member_list_search": get(lambda s: reverse("member_list"), q=SEARCH_TERM),
+        "member_list_deep": get(lambda s: f"{reverse('member_list')}?cursor={s['deep_cursor']}"),
+        "member_card_view_only": get(lambda s: reverse("member_card_view_only", args=[s["public_id"]])),
+        "card_print": get(lambda s: reverse("card_print", args=[s["public_id"]])),
+        "member_qr_svg": get(lambda s: reverse("member_qr_svg", args=[s["public_id"]])),
+        "member_qr_png": get(lambda s: reverse("member_qr_png", args=[s["public_id"]])),
+        "export_csv": export_csv,
+    }
+
+
+def _sample():
+    """สมาชิกตัวแทน (บัตรยังใช้ได้ อยู่กลางตาราง) และ cursor ของหน้าท้าย ๆ"""
+    members = Member.objects.valid()
+    middle = members.count() // 2
+    public_id = members.order_by("id").values_list("public_id", flat=True)[middle]
+    first_pk = Member.objects.order_by("id").values_list("id", flat=True).first()
+    return {"public_id": public_id, "deep_cursor": encode_cursor(NEXT, first_pk + 20)}
+
+
+def measure(func, repeat=5):
+    """วัดเวลา (ms) และจำนวนคิวรีของ func ทั้งรอบแรก (cold) และค่ากลางของรอบถัดไป"""
+    _clear_caches()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func()
+        cold_ms = (time.perf_counter() - start) * 1000
+    cold_queries = len(queries)
+
+    timings, warm_queries = [], 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        warm_queries = max(warm_queries, len(queries))
+
+    return {
+        "cold_ms": round(cold_ms, 3),
+        "cold_queries": cold_queries,
+        "median_ms": round(statistics.median(timings), 3),
+        "queries": warm_queries,
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, cases=None, progress=None):
+    """
+    เติมสมาชิกให้ครบแต่ละขนาด (เรียงจากน้อยไปมาก) แล้ววัดทุก case
+    คืน {"meta": {...}, "results": {"<size>": {"<case>": {...}}}}
+    """
+    selected = {name: func for name, func in _cases().items() if not cases or name in cases}
+    results = {}
+
+    for size in sorted(sizes):
+        missing = size - Member.objects.count()
+        if missing > 0:
+            seed_members(missing, seed=size)
+            if progress:
+                progress(f"seeded {size} members")
+
+        client = _staff_client()
+        sample = _sample()
+        results[str(size)] = {}
+        for name, func in selected.items():
+            results[str(size)][name] = measure(lambda: func(client, sample), repeat)
+            if progress:
+                progress(f"{size} {name}: {results[str(size)][name]}")
+
+    return {
+        "meta": {
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def check_budgets(report, budgets=QUERY_BUDGETS):
+    """รายการข้อความของ case ที่ใช้คิวรีเกินงบ"""
+    violations = []
+    for size, cases in report["results"].items():
+        for name, result in cases.items():
+            budget = budgets.get(name)
+            if budget is not None and result["queries"] > budget:
+                violations.append(f"{name} @ {size}: {result['queries']} queries (budget {budget})")
+    return violations
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """รายการข้อความของ case ที่ช้ากว่า baseline เกิน tolerance เท่า หรือใช้คิวรีมากขึ้น"""
+    violations = []
+    for size, cases in report["results"].items():
+        for name, result in cases.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            if result["queries"] > before["queries"]:
+                violations.append(f"{name} @ {size}: {before['queries']} -> {result['queries']} queries")
+            limit = max(before["median_ms"] * tolerance, before["median_ms"] + min_delta_ms)
+            if result["median_ms"] > limit:
+                violations.append(f"{name} @ {size}: {before['median_ms']} -> {result['median_ms']} ms")
+    return violations
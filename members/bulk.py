@@ -0,0 +1,127 @@
+"""
+แก้สมาชิกเป็นชุดด้วยคำสั่ง UPDATE เดียว (ต่ออายุ / ระงับ / เปิดใช้ / เปลี่ยน role)
+
+queryset.update() ไม่ผ่าน Member.save() และไม่ส่ง signal - จึงต้องทำแทนในที่นี้:
+- change_seq / updated_at: ทุกแถวในชุดได้เลขลำดับเดียวกัน (จองใน transaction เดียวกับ UPDATE)
+  delta export, snapshot ของเครื่องสแกน และ ETag ของหน้าบัตรจึงเห็นการเปลี่ยนแปลง
+- ล้าง snapshot ของ dashboard หลัง commit
+- บันทึก MemberBulkAction หนึ่งแถวต่อชุด
+QR ของบัตรที่ต่ออายุมี token ใหม่ (URL เปลี่ยน) - cache ของ QR เดิมไม่ถูกใช้อีกและหมดไปเอง
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, DateField, ExpressionWrapper, F, Value, When
+from django.utils import timezone
+
+from .models import Member, MemberBulkAction
+from .stats import invalidate_dashboard_stats
+
+RENEW = "RENEW"
+DEACTIVATE = "DEACTIVATE"
+REACTIVATE = "REACTIVATE"
+SET_ROLE = "SET_ROLE"
+
+BULK_ACTIONS = tuple(action for action, _ in MemberBulkAction.ACTION_CHOICES)
+
+MAX_RENEW_DAYS = 3650
+
+# จำนวนแถวต่อ UPDATE เมื่อแบ่งชุด (apply_bulk_action_in_chunks) - ล็อกแถวไม่นานต่อ transaction
+BULK_CHUNK_SIZE = 2000
+
+
+class BulkActionError(ValueError):
+    """action หรือค่าที่ส่งมาใช้ไม่ได้"""
+
+
+def _renewed_expire_date(days, today):
+    """
+    บัตรที่ยังไม่หมดอายุ: ต่อจาก expire_date เดิม
+    บัตรที่หมดอายุแล้ว (หรือไม่มีวันหมดอายุ): นับ days จากวันนี้
+    """
+    return Case(
+        When(
+            expire_date__gte=today,
+            then=ExpressionWrapper(F("expire_date") + timedelta(days=days), output_field=DateField()),
+        ),
+        default=Value(today + timedelta(days=days)),
+        output_field=DateField(),
+    )
+
+
+def update_values(action, days=None, role=None, today=None):
+    """ค่าที่ใช้ใน UPDATE ของ action (ตรวจค่าที่ส่งมาด้วย)"""
+    if action == RENEW:
+        if not isinstance(days, int) or not 1 <= days <= MAX_RENEW_DAYS:
+            raise BulkActionError(f"days must be between 1 and {MAX_RENEW_DAYS}")
+        return {"expire_date": _renewed_expire_date(days, today or timezone.now().date())}
+    if action == DEACTIVATE:
+        return {"is_active": False}
+    if action == REACTIVATE:
+        return {"is_active": True}
+    if action == SET_ROLE:
+        if role not in dict(Member.ROLE_CHOICES):
+            raise BulkActionError(f"Unknown role: {role}")
+        return {"role": role}
+    raise BulkActionError(f"Unknown action: {action}")
+
+
+def apply_bulk_action(queryset, action, performed_by=None, days=None, role=None, criteria=None, today=None):
+    """
+    ใช้ action กับทุกสมาชิกใน queryset ด้วย UPDATE เดียวใน transaction
+    คืน MemberBulkAction ที่บันทึกไว้ (affected = จำนวนแถวที่ถูกแก้)
+
+    UPDATE กรองผ่าน subquery ของ pk - queryset จาก search_members (join ตาราง FTS ด้วย extra)
+    หรือ queryset อื่นที่ UPDATE ตรง ๆ ไม่ได้ จึงใช้ได้เหมือนกัน
+    """
+    values = update_values(action, days=days, role=role, today=today)
+    params = {key: value for key, value in (("days", days), ("role", role)) if value is not None}
+
+    with transaction.atomic():
+        change_seq = Member.next_change_seqs(1)[0]
+        affected = Member.objects.filter(pk__in=queryset.order_by().values("pk")).update(
+            **values,
+            change_seq=change_seq,
+            updated_at=timezone.now(),
+        )
+        audit = MemberBulkAction.objects.create(
+            action=action,
+            params=params,
+            criteria=criteria or {},
+            affected=affected,
+            change_seq=change_seq,
+            performed_by=performed_by,
+        )
+        transaction.on_commit(invalidate_dashboard_stats)
+    return audit
+
+
+def iter_pk_chunks(queryset, chunk_size=BULK_CHUNK_SIZE):
+    """pk ของ queryset ทีละชุด (keyset บน pk - ไม่โหลด object และไม่ใช้ OFFSET)"""
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    last_pk = None
+    while True:
+        chunk = list((pks if last_pk is None else pks.filter(pk__gt=last_pk))[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def apply_bulk_action_in_chunks(queryset, action, chunk_size=BULK_CHUNK_SIZE, criteria=None, **kwargs):
+    """
+    apply_bulk_action ทีละ chunk_size แถว (แต่ละชุดเป็น transaction + audit ของตัวเอง)
+    สำหรับชุดใหญ่มาก เช่น "เลือกทั้งหมด" ใน admin คืนจำนวนแถวที่ถูกแก้รวม
+    """
+    update_values(action, days=kwargs.get("days"), role=kwargs.get("role"))
+    affected = 0
+    for chunk in iter_pk_chunks(queryset, chunk_size):
+        audit = apply_bulk_action(
+            Member.objects.filter(pk__in=chunk),
+            action,
+            criteria={**(criteria or {}), "pk_range": [chunk[0], chunk[-1]]},
+            **kwargs,
+        )
+        affected += audit.affected
+    return affected
@@ -3,15 +3,32 @@ from django.contrib import messages
 from django.utils.translation import gettext as _
 from .models import Member
 
+
+def get_current_member(request):
+    """
+    Member ของผู้ใช้ที่ล็อกอินอยู่ (None ถ้าไม่ได้ล็อกอินหรือไม่มี profile)
+    โหลดผ่าน request.user.member ครั้งเดียวต่อ request แล้วใช้ object เดิมร่วมกัน
+    ทั้ง decorator, view, form และ template filter
+    """
+    if not hasattr(request, "_cached_member"):
+        member = None
+        if request.user.is_authenticated:
+            try:
+                member = request.user.member
+            except Member.DoesNotExist:
+                pass
+        request._cached_member = member
+    return request._cached_member
+
+
 def role_required(allowed_roles=None):
     if allowed_roles is None:
         allowed_roles = []
 
     def decorator(view_func):
         def wrapper(request, *args, **kwargs):
-            try:
-                member = Member.objects.get(user=request.user)
-            except Member.DoesNotExist:
+            member = get_current_member(request)
+            if member is None:
                 messages.error(request, _("คุณไม่มีสิทธิ์เข้าหน้านี้"))
                 return redirect("staff_login")
 
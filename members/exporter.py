@@ -0,0 +1,198 @@
+"""
+Export สมาชิกแบบ streaming (JSONL / CSV / JSON array)
+
+อ่านจากฐานข้อมูลทีละ chunk ด้วย .values_list().iterator() และส่งออกทีละแถว
+หน่วยความจำจึงคงที่ไม่ว่าจะมีสมาชิกกี่คน - ใช้ร่วมกันทั้ง command export_members และ view ดาวน์โหลด
+
+โหมด delta (iter_changes) ส่งเฉพาะสมาชิกที่สร้าง/แก้ไข/ลบหลัง cursor ที่ให้มา
+โดยอิง Member.change_seq และ MemberTombstone แล้วปิดท้ายด้วย cursor ถัดไป
+"""
+
+import csv
+import heapq
+import json
+import uuid
+from datetime import date, datetime
+
+from .models import MEMBER_STATUSES, IdSequence, Member, MemberTombstone
+
+
+# field ที่ export ได้ ("user" = id ของ User เหมือนไฟล์ safe_members.json เดิม)
+EXPORT_FIELDS = (
+    "id",
+    "user",
+    "member_id",
+    "public_id",
+    "first_name",
+    "last_name",
+    "first_name_en",
+    "last_name_en",
+    "nickname",
+    "phone",
+    "email",
+    "emergency_contact_name",
+    "emergency_contact_phone",
+    "blood_group",
+    "address",
+    "photo",
+    "join_date",
+    "expire_date",
+    "role",
+    "is_active",
+)
+
+EXPORT_FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+STATUS_FILTERS = MEMBER_STATUSES
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class ExportError(ValueError):
+    """field หรือ filter ที่ขอมาไม่ถูกต้อง"""
+
+
+def parse_fields(value):
+    """แปลง "a,b,c" เป็น tuple ของ field (ว่าง = ทุก field)"""
+    if not value:
+        return EXPORT_FIELDS
+    fields = tuple(f.strip() for f in value.split(",") if f.strip())
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        raise ExportError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def filter_members(queryset, role=None, status=None, joined_from=None, joined_to=None):
+    """กรองสมาชิกตามเงื่อนไขที่ใช้ได้ทั้งใน command และ view (วันที่เป็น date หรือ None)"""
+    if role:
+        queryset = queryset.filter(role=role)
+    if status:
+        if status not in STATUS_FILTERS:
+            raise ExportError(f"Unknown status: {status}")
+        queryset = queryset.with_status(status)
+    if joined_from:
+        queryset = queryset.filter(join_date__gte=joined_from)
+    if joined_to:
+        queryset = queryset.filter(join_date__lte=joined_to)
+    return queryset
+
+
+def iter_rows(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """dict ของแต่ละสมาชิก (ค่าที่ serialize เป็น JSON ได้แล้ว) เรียงตาม id"""
+    columns = ["user_id" if f == "user" else f for f in fields]
+    rows = queryset.order_by("id").values_list(*columns).iterator(chunk_size=chunk_size)
+    for values in rows:
+        yield {field: _jsonable(value) for field, value in zip(fields, values)}
+
+
+def iter_changes(since, until, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    รายการเปลี่ยนแปลงหลัง cursor since เรียงตามเลขลำดับ (JSONL เท่านั้น)
+      {"op": "upsert", "seq": n, "data": {...}}
+      {"op": "delete", "seq": n, "id": ..., "member_id": ..., "public_id": ...}
+      {"op": "end", "next_cursor": n}   <- บรรทัดสุดท้าย เก็บไว้ใช้เป็น since รอบถัดไป
+
+    until คือค่าที่ commit แล้วของ sequence ก่อนเริ่ม (ดู stream_changes) - การเปลี่ยนแปลงที่เกิด
+    ระหว่าง export จะได้เลขมากกว่า until และถูกส่งในรอบถัดไปแทน (ไม่ตกหล่นและไม่ซ้ำ)
+    """
+    columns = ["change_seq"] + ["user_id" if f == "user" else f for f in fields]
+
+    upserts = (
+        Member.objects
+        .filter(change_seq__gt=since, change_seq__lte=until)
+        .order_by("change_seq")
+        .values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+    deletes = (
+        MemberTombstone.objects
+        .filter(change_seq__gt=since, change_seq__lte=until)
+        .order_by("change_seq")
+        .values_list("change_seq", "member_pk", "member_id", "public_id")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    def upsert_events():
+        for seq, *values in upserts:
+            data = {field: _jsonable(value) for field, value in zip(fields, values)}
+            yield seq, {"op": "upsert", "seq": seq, "data": data}
+
+    def delete_events():
+        for seq, pk, member_id, public_id in deletes:
+            yield seq, {
+                "op": "delete",
+                "seq": seq,
+                "id": pk,
+                "member_id": member_id,
+                "public_id": str(public_id),
+            }
+
+    for _, event in heapq.merge(upsert_events(), delete_events(), key=lambda e: e[0]):
+        yield event
+    yield {"op": "end", "next_cursor": until}
+
+
+def _jsonable(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+# =========================
+# WRITERS
+# =========================
+
+class _Echo:
+    """file-like ที่คืนค่าที่เขียนออกมาตรง ๆ ให้ csv.writer ใช้แบบ streaming"""
+
+    def write(self, value):
+        return value
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def iter_json(rows):
+    """JSON array รูปแบบเดียวกับ safe_members.json เดิม แต่เขียนทีละแถว"""
+    yield "["
+    first = True
+    for row in rows:
+        yield ("\n  " if first else ",\n  ") + json.dumps(row, ensure_ascii=False)
+        first = False
+    yield "\n]\n"
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(["" if row[f] is None else row[f] for f in fields])
+
+
+def stream_changes(since, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """delta export เป็น JSONL คืน (iterator ของข้อความ, cursor ถัดไป) - ดู iter_changes"""
+    if since < 0:
+        raise ExportError("Cursor must be >= 0")
+    until = max(IdSequence.current(Member.CHANGE_SEQUENCE), since)
+    return iter_jsonl(iter_changes(since, until, fields, chunk_size)), until
+
+
+def stream_export(queryset, fmt, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """คืน iterator ของข้อความตามรูปแบบที่เลือก"""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format: {fmt}")
+    rows = iter_rows(queryset, fields, chunk_size)
+    if fmt == "jsonl":
+        return iter_jsonl(rows)
+    if fmt == "csv":
+        return iter_csv(rows, fields)
+    return iter_json(rows)
@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
-from .models import Member
+from .bulk import MAX_RENEW_DAYS, RENEW, SET_ROLE
+from .models import Member, MemberBulkAction
 
 
 class StaffRegisterForm(UserCreationForm):
@@ -104,3 +105,41 @@ class MemberForm(forms.ModelForm):
             from django.core.exceptions import ValidationError
             raise ValidationError("เบอร์โทรต้องเป็นตัวเลข 9-15 หลักเท่านั้น")
         return digits
+
+
+class MemberBulkActionForm(forms.Form):
+    """action ที่ใช้กับสมาชิกหลายคนจากหน้ารายชื่อ (ดู members.bulk)"""
+
+    SCOPE_SELECTED = "selected"
+    SCOPE_FILTERED = "filtered"
+    SCOPE_ALL = "all"
+
+    action = forms.ChoiceField(choices=MemberBulkAction.ACTION_CHOICES)
+    days = forms.IntegerField(min_value=1, max_value=MAX_RENEW_DAYS, required=False)
+    role = forms.ChoiceField(choices=Member.ROLE_CHOICES, required=False)
+    scope = forms.ChoiceField(choices=[
+        (SCOPE_SELECTED, SCOPE_SELECTED),
+        (SCOPE_FILTERED, SCOPE_FILTERED),
+        (SCOPE_ALL, SCOPE_ALL),
+    ])
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+
+        # STAFF / COMMITTEE ตั้ง role ได้ไม่เกิน STAFF (เหมือน MemberForm)
+        role = user.member.role if user and hasattr(user, "member") else None
+        if role != "PRESIDENT":
+            self.fields["role"].choices = [
+                ("MEMBER", "Member"),
+                ("STAFF", "Staff"),
+            ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        if action == RENEW and not cleaned_data.get("days"):
+            self.add_error("days", "ระบุจำนวนวันที่ต่ออายุ")
+        if action == SET_ROLE and not cleaned_data.get("role"):
+            self.add_error("role", "เลือก role")
+        return cleaned_data
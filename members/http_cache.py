@@ -0,0 +1,140 @@
+"""
+HTTP caching ของหน้าบัตรสาธารณะ (ETag / Last-Modified / Cache-Control)
+
+ทุกการสแกน QR เรียกหน้าบัตร - ถ้า browser หรือ proxy ถือสำเนาที่ยังใช้ได้อยู่
+จะได้ 304 โดยไม่ต้อง render template และสร้าง QR ใหม่
+max-age ไม่เกินเวลาที่บัตรหมดอายุ สำเนาที่ cache ไว้จึงไม่แสดงบัตรที่หมดอายุแล้วว่ายังใช้ได้
+หน้าที่ QR ชี้ไป (member_card_view_only) บันทึกทุกการสแกน จึงไม่ให้ proxy เก็บ - ใช้ ETag ถามซ้ำแทน
+
+ฝั่ง server: ตัวบัตรที่ render แล้ว (_card_content.html, _card_print_faces.html) เก็บใน cache
+ต่อสมาชิก (render_card_fragment) - หน้าบัตรจึงเหลือแค่ render ส่วนครอบเล็ก ๆ
+"""
+
+import hashlib
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from .tokens import signing_kid
+
+# เปลี่ยนค่านี้เมื่อแก้ template ของบัตร เพื่อให้ ETag เดิมทั้งหมดใช้ไม่ได้
+CARD_ETAG_VERSION = "2"
+
+
+def card_etag(member, variant, *extra):
+    """
+    strong ETag จากข้อมูลสมาชิก (change_seq เปลี่ยนทุกครั้งที่แก้ไข), สถานะบัตร,
+    ภาษา, SITE_URL และ key ของ QR และค่าอื่นที่หน้านั้นแสดงต่างกัน (extra)
+    """
+    parts = (
+        CARD_ETAG_VERSION,
+        variant,
+        member.pk,
+        member.change_seq,
+        member.is_valid(),
+        get_language(),
+        settings.SITE_URL,
+        # key ที่ใช้เซ็น QR - หมุน key แล้วลิงก์รูป QR ในหน้าเปลี่ยน
+        signing_kid(),
+        *extra,
+    )
+    raw = "|".join(str(part) for part in parts)
+    return '"%s"' % hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def expiry_boundary(member):
+    """
+    เวลาที่ is_valid() เริ่มเป็น False เพราะหมดอายุ
+    (is_valid เทียบ expire_date กับ timezone.now().date() ซึ่งเป็นวันที่ UTC)
+    """
+    if not member.expire_date:
+        return None
+    return datetime.combine(member.expire_date + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+
+
+def card_max_age(member, now=None):
+    """max-age (วินาที) = CARD_CACHE_MAX_AGE แต่ไม่เกินเวลาที่เหลือจนบัตรหมดอายุ"""
+    max_age = settings.CARD_CACHE_MAX_AGE
+    boundary = expiry_boundary(member)
+    if member.is_valid() and boundary is not None:
+        now = now or timezone.now()
+        max_age = min(max_age, int((boundary - now).total_seconds()))
+    return max(max_age, 0)
+
+
+def card_last_modified(member, now=None):
+    """updated_at หรือเวลาหมดอายุ (ถ้าผ่านมาแล้ว) - ค่าที่ใหม่กว่า"""
+    last_modified = member.updated_at
+    boundary = expiry_boundary(member)
+    now = now or timezone.now()
+    if boundary is not None and boundary <= now and (last_modified is None or boundary > last_modified):
+        last_modified = boundary
+    return last_modified
+
+
+def conditional_card_response(request, member, variant, render, extra=(), private=False, revalidate=False):
+    """
+    คืน 304 ถ้า If-None-Match / If-Modified-Since ตรงกับสำเนาล่าสุด
+    ไม่เช่นนั้นเรียก render() แล้วใส่ ETag, Last-Modified และ Cache-Control
+
+    private=True สำหรับหน้าที่แสดงต่างกันตามผู้ใช้ที่ล็อกอิน (ห้าม proxy ใช้ร่วมกัน)
+    revalidate=True สำหรับหน้าที่ view ต้องเห็นทุก request (เช่นบันทึกการสแกน):
+    private + no-cache - ไม่มี proxy/CDN ตอบแทน และ browser ต้องถามก่อนทุกครั้ง (ยังได้ 304)
+    """
+    now = timezone.now()
+    etag = card_etag(member, variant, *extra)
+    last_modified = card_last_modified(member, now)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    if revalidate:
+        patch_cache_control(response, private=True, no_cache=True)
+    elif private:
+        patch_cache_control(response, private=True, max_age=card_max_age(member, now))
+    else:
+        patch_cache_control(response, public=True, max_age=card_max_age(member, now))
+    return response
+
+
+def card_fragment_cache_key(member_pk):
+    return f"card_fragment:{member_pk}"
+
+
+def render_card_fragment(member, template_name):
+    """
+    HTML ของ template_name (context มีแค่ member) จาก cache หรือ render ใหม่
+
+    หนึ่ง entry ต่อสมาชิก: {"seq": change_seq, "parts": {card_etag: html}}
+    card_etag รวมภาษา, สถานะบัตร, SITE_URL และ key ของ QR ไว้แล้ว - change_seq ไม่ตรง
+    (เช่นแก้ด้วย queryset.update() ที่ไม่ส่ง signal) = ทิ้งทั้ง entry
+    """
+    key = card_fragment_cache_key(member.pk)
+    part = card_etag(member, template_name)
+    entry = cache.get(key)
+    if entry is None or entry["seq"] != member.change_seq:
+        entry = {"seq": member.change_seq, "parts": {}}
+
+    html = entry["parts"].get(part)
+    if html is None:
+        html = render_to_string(template_name, {"member": member})
+        entry["parts"][part] = html
+        cache.set(key, entry, settings.CARD_FRAGMENT_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def invalidate_card_fragments(member_pk):
+    cache.delete(card_fragment_cache_key(member_pk))
@@ -0,0 +1,285 @@
+"""
+นำเข้าสมาชิกจากไฟล์ CSV/XLSX แบบ 2 ขั้นตอน
+1. read_rows + validate_rows: ตรวจทุกแถวด้วย MemberForm แล้วเก็บเป็น MemberImport (ยังไม่สร้างสมาชิก)
+2. commit_import: จอง member_id เป็นบล็อก, hash รหัสผ่าน (ขนานหลาย core ถ้าทำได้) แล้ว bulk_create
+   ทีละชุดต่อ request (IMPORT_COMMIT_BATCH_SIZE) หรือทั้งไฟล์ด้วย python manage.py commit_import <id>
+"""
+
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .forms import MemberForm
+from .models import Member, MemberImport
+from .stats import invalidate_dashboard_stats
+from .utils import default_member_password
+
+# column ในไฟล์ = ชื่อ field ของ MemberForm (ยกเว้นรูปภาพ)
+IMPORT_FIELDS = [field for field in MemberForm.Meta.fields if field != "photo"]
+DATE_FIELDS = ("join_date", "expire_date")
+
+MAX_IMPORT_ROWS = 10000
+BULK_BATCH_SIZE = 500
+
+# จำนวนรหัสผ่านที่ส่งให้ worker แต่ละครั้ง
+HASH_CHUNK_SIZE = 50
+
+
+class ImportFileError(Exception):
+    """อ่านไฟล์นำเข้าไม่ได้ (ชนิดไฟล์ไม่รองรับ, ไม่มี header, แถวเกินกำหนด ฯลฯ)"""
+
+
+# =========================
+# READ
+# =========================
+
+def _cell_to_str(value):
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        # openpyxl คืน datetime สำหรับ cell วันที่
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _normalize_header(header):
+    return [_cell_to_str(h).lower() for h in header]
+
+
+def _read_csv(uploaded_file):
+    raw = getattr(uploaded_file, "file", uploaded_file)
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    return header, reader
+
+
+def _read_xlsx(uploaded_file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError(_("การนำเข้าไฟล์ XLSX ต้องติดตั้ง openpyxl (pip install openpyxl)"))
+
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = next(rows, None)
+    return header, rows
+
+
+def _xlsx_errors():
+    """exception ที่ openpyxl โยนเมื่อไฟล์เสีย/ไม่ใช่ xlsx จริง (เปลี่ยนนามสกุลมา)"""
+    try:
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        return (zipfile.BadZipFile,)
+    return (zipfile.BadZipFile, InvalidFileException)
+
+
+def read_rows(uploaded_file):
+    """
+    อ่านไฟล์เป็น list ของ dict {field: str} เรียงตามลำดับแถวในไฟล์
+    ไฟล์ที่อ่านไม่ได้ (encoding ผิด, CSV/XLSX เสีย) = ImportFileError ไม่ใช่ exception ดิบ
+    """
+    try:
+        return _read_rows(uploaded_file)
+    except UnicodeDecodeError:
+        # Excel ภาษาไทยบันทึก CSV เป็น cp874/TIS-620 โดย default
+        raise ImportFileError(_("ไฟล์ CSV ต้องเข้ารหัส UTF-8 (ใน Excel เลือกบันทึกเป็น \"CSV UTF-8\")"))
+    except csv.Error:
+        raise ImportFileError(_("รูปแบบไฟล์ CSV ไม่ถูกต้อง"))
+    except _xlsx_errors():
+        raise ImportFileError(_("เปิดไฟล์ XLSX ไม่ได้ (ไฟล์เสียหรือไม่ใช่ไฟล์ Excel)"))
+
+
+def _read_rows(uploaded_file):
+    name = (uploaded_file.name or "").lower()
+    if name.endswith(".csv"):
+        header, rows = _read_csv(uploaded_file)
+    elif name.endswith(".xlsx"):
+        header, rows = _read_xlsx(uploaded_file)
+    else:
+        raise ImportFileError(_("ไม่รองรับไฟล์ชนิดนี้ (ใช้ .csv หรือ .xlsx)"))
+
+    if not header:
+        raise ImportFileError(_("ไฟล์ว่างเปล่า"))
+
+    columns = _normalize_header(header)
+    if "first_name" not in columns or "last_name" not in columns or "join_date" not in columns:
+        raise ImportFileError(_("แถวหัวตารางต้องมี first_name, last_name และ join_date"))
+
+    result = []
+    for values in rows:
+        values = [_cell_to_str(v) for v in values]
+        if not any(values):
+            continue
+        if len(result) >= MAX_IMPORT_ROWS:
+            raise ImportFileError(_("จำนวนแถวเกินกำหนด (สูงสุด %(max)s แถว)") % {"max": MAX_IMPORT_ROWS})
+        result.append({
+            column: value
+            for column, value in zip(columns, values)
+            if column in IMPORT_FIELDS
+        })
+    return result
+
+
+# =========================
+# VALIDATE
+# =========================
+
+def _to_json(cleaned_data):
+    data = {}
+    for field in IMPORT_FIELDS:
+        if field not in cleaned_data:
+            continue
+        value = cleaned_data[field]
+        data[field] = value.isoformat() if isinstance(value, date) else value
+    return data
+
+
+def validate_rows(rows, user):
+    """
+    ตรวจแต่ละแถวด้วยกฎเดียวกับฟอร์มเพิ่มสมาชิก
+    คืน (valid_rows, errors) - แถวเริ่มนับที่ 2 (แถวที่ 1 คือ header)
+    """
+    valid_rows, errors = [], []
+    for index, row in enumerate(rows, start=2):
+        if not row.get("role"):
+            row = {**row, "role": "MEMBER"}
+        form = MemberForm(data=row, user=user)
+        if form.is_valid():
+            valid_rows.append({"row": index, "data": _to_json(form.cleaned_data)})
+        else:
+            for field, messages in form.errors.items():
+                for message in messages:
+                    errors.append({"row": index, "field": field, "message": message})
+    return valid_rows, errors
+
+
+def stage_import(uploaded_file, user):
+    """อ่าน + ตรวจไฟล์ แล้วเก็บผลเป็น MemberImport สถานะ PENDING"""
+    rows = read_rows(uploaded_file)
+    valid_rows, errors = validate_rows(rows, user)
+    return MemberImport.objects.create(
+        created_by=user,
+        filename=os.path.basename(uploaded_file.name)[:255],
+        total_rows=len(rows),
+        valid_rows=valid_rows,
+        errors=errors,
+    )
+
+
+# =========================
+# COMMIT
+# =========================
+
+def _init_hash_worker():
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    hash รหัสผ่านทั้งชุดขนานกันด้วย process pool (hash แต่ละตัวใช้ CPU หนัก)
+    ถ้าสร้าง process ไม่ได้ (เช่น serverless ที่ไม่มี /dev/shm) จะ hash ทีละตัวแทน
+    """
+    if len(passwords) <= HASH_CHUNK_SIZE:
+        return _hash_chunk(passwords)
+
+    chunks = [
+        passwords[i:i + HASH_CHUNK_SIZE]
+        for i in range(0, len(passwords), HASH_CHUNK_SIZE)
+    ]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) as pool:
+            return [hashed for chunk in pool.map(_hash_chunk, chunks) for hashed in chunk]
+    except (OSError, NotImplementedError, BrokenProcessPool):
+        return _hash_chunk(passwords)
+
+
+def _from_json(data):
+    values = dict(data)
+    for field in DATE_FIELDS:
+        if values.get(field):
+            values[field] = date.fromisoformat(values[field])
+    return values
+
+
+def commit_import(member_import, limit=None):
+    """
+    สร้าง User + Member จากแถวที่ผ่านการตรวจ ต่อจากแถวที่นำเข้าไปแล้ว (committed_count) ไม่เกิน limit แถว
+    คืนจำนวนสมาชิกที่สร้างในรอบนี้ - ครบทุกแถวแล้วสถานะเป็น COMMITTED
+
+    view เรียกทีละ IMPORT_COMMIT_BATCH_SIZE แถวต่อ request (hash รหัสผ่านทีละแถวใช้ CPU หนัก
+    บน serverless ทำขนานไม่ได้) - command commit_import รันทั้งไฟล์ในครั้งเดียว
+    """
+    start = member_import.committed_count
+    total = len(member_import.valid_rows)
+    end = total if limit is None else min(start + limit, total)
+    rows = [_from_json(row["data"]) for row in member_import.valid_rows[start:end]]
+    if not rows:
+        return 0
+
+    passwords = [default_member_password(row.get("phone")) for row in rows]
+    hashed_passwords = hash_passwords(passwords)
+
+    with transaction.atomic():
+        locked = MemberImport.objects.select_for_update().get(pk=member_import.pk)
+        if not locked.is_pending or locked.committed_count != start:
+            # request อื่นนำเข้าชุดนี้ไปแล้ว (กดยืนยันซ้ำ)
+            return 0
+
+        member_ids = Member.allocate_member_ids(len(rows))
+
+        users = User.objects.bulk_create(
+            [
+                User(username=member_id, password=hashed)
+                for member_id, hashed in zip(member_ids, hashed_passwords)
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        if any(u.pk is None for u in users):
+            # backend ที่คืน pk จาก bulk insert ไม่ได้ - โหลดกลับด้วย username
+            by_username = User.objects.in_bulk(member_ids, field_name="username")
+            users = [by_username[member_id] for member_id in member_ids]
+
+        change_seqs = Member.next_change_seqs(len(rows))
+
+        members = []
+        for member_id, user, values, change_seq in zip(member_ids, users, rows, change_seqs):
+            member = Member(user=user, member_id=member_id, change_seq=change_seq, **values)
+            member.fill_default_expire_date()
+            members.append(member)
+        Member.objects.bulk_create(members, batch_size=BULK_BATCH_SIZE)
+
+        locked.committed_count = end
+        update_fields = ["committed_count"]
+        if end >= total:
+            locked.status = "COMMITTED"
+            locked.committed_at = timezone.now()
+            update_fields += ["status", "committed_at"]
+        locked.save(update_fields=update_fields)
+
+    member_import.committed_count = locked.committed_count
+    member_import.status = locked.status
+    member_import.committed_at = locked.committed_at
+
+    # bulk_create ไม่ส่ง post_save - ล้าง snapshot ของ dashboard เอง
+    invalidate_dashboard_stats()
+    return len(members)
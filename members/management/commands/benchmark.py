@@ -0,0 +1,85 @@
+"""
+วัดเวลาและจำนวนคิวรีของ hot path กับรายชื่อสังเคราะห์หลายขนาด (ดู members/benchmarks.py)
+รันบนฐานข้อมูลทดสอบแยก (test_<NAME>) - ไม่แตะข้อมูลจริง
+
+Run: python manage.py benchmark --sizes 1000,10000 -o bench.json
+     python manage.py benchmark --baseline bench-baseline.json      (ช้าลง/คิวรีเพิ่ม = fail)
+     python manage.py benchmark --sizes 1000000 --keepdb            (เก็บฐานข้อมูลที่ seed แล้วไว้ใช้ซ้ำ)
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from members.benchmarks import (
+    DEFAULT_MIN_DELTA_MS,
+    DEFAULT_SIZES,
+    DEFAULT_TOLERANCE,
+    check_budgets,
+    compare_to_baseline,
+    run_benchmarks,
+)
+from members.scans import shutdown_scans
+
+
+class Command(BaseCommand):
+    help = "Benchmark dashboard, member list, card, QR and export paths against synthetic rosters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+            help="Comma-separated roster sizes (default: %(default)s)",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Warm runs per case (default: %(default)s)")
+        parser.add_argument("--cases", help="Comma-separated case names (default: all)")
+        parser.add_argument("--output", "-o", help="Write the JSON report to this file")
+        parser.add_argument("--baseline", help="JSON report to compare against")
+        parser.add_argument(
+            "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+            help="Allowed slowdown factor against the baseline (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+            help="Ignore slowdowns smaller than this many ms (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true",
+            help="Keep the benchmark database (and its seeded members) between runs",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        cases = [case.strip() for case in options["cases"].split(",")] if options["cases"] else None
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        try:
+            report = run_benchmarks(sizes, options["repeat"], cases, progress=self.stdout.write)
+        finally:
+            # บันทึกการสแกนที่ค้างใน buffer ต้องลงฐานข้อมูลทดสอบก่อนถูกลบ
+            shutdown_scans()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        violations = check_budgets(report)
+        if baseline is not None:
+            violations += compare_to_baseline(report, baseline, options["tolerance"], options["min_delta_ms"])
+        if violations:
+            raise CommandError("Benchmark budget exceeded:\n  " + "\n  ".join(violations))
+        self.stdout.write(self.style.SUCCESS("All benchmark budgets met"))
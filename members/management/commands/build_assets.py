@@ -0,0 +1,75 @@
+"""
+สร้าง static/css/app.css (Tailwind เฉพาะ class ที่ใช้จริงใน template, minify) และ copy ฟอนต์ Sarabun
+(เฉพาะ subset thai + latin) ไปที่ static/fonts/ - รันก่อน collectstatic ทุกครั้งที่ deploy
+
+ต้องมี Node.js: npm install ครั้งแรก (ติดตั้ง tailwindcss และ @fontsource/sarabun ตาม package.json)
+Run: python manage.py build_assets
+     python manage.py build_assets --skip-css     (copy เฉพาะฟอนต์)
+"""
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SOURCE_CSS = "assets/css/app.css"
+OUTPUT_CSS = "static/css/app.css"
+TAILWIND_CONFIG = "tailwind.config.js"
+
+FONT_PACKAGE_DIR = "node_modules/@fontsource/sarabun/files"
+FONT_OUTPUT_DIR = "static/fonts"
+FONT_SUBSETS = ("thai", "latin")
+FONT_WEIGHTS = (400, 500, 600, 700)
+
+
+def font_files():
+    return [
+        f"sarabun-{subset}-{weight}-normal.woff2"
+        for subset in FONT_SUBSETS
+        for weight in FONT_WEIGHTS
+    ]
+
+
+class Command(BaseCommand):
+    help = "Build the purged, minified stylesheet and copy the self-hosted Sarabun font subsets into static/"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skip-css", action="store_true", help="Only copy the font files")
+
+    def handle(self, *args, **options):
+        base_dir = settings.BASE_DIR
+        self.copy_fonts(base_dir / FONT_PACKAGE_DIR, base_dir / FONT_OUTPUT_DIR)
+        if not options["skip_css"]:
+            self.build_css(base_dir)
+
+    def copy_fonts(self, source_dir, output_dir):
+        if not source_dir.is_dir():
+            raise CommandError(f"{source_dir} not found - run `npm install` first")
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        total = 0
+        for name in font_files():
+            source = source_dir / name
+            if not source.is_file():
+                raise CommandError(f"Font file {source} not found")
+            shutil.copyfile(source, output_dir / name)
+            total += source.stat().st_size
+        self.stdout.write(f"Copied {len(font_files())} font files ({total // 1024} KB) to {output_dir}")
+
+    def build_css(self, base_dir):
+        output = base_dir / OUTPUT_CSS
+        output.parent.mkdir(parents=True, exist_ok=True)
+        command = [
+            "npx", "--no-install", "tailwindcss",
+            "--config", str(base_dir / TAILWIND_CONFIG),
+            "--input", str(base_dir / SOURCE_CSS),
+            "--output", str(output),
+            "--minify",
+        ]
+        try:
+            subprocess.run(command, cwd=base_dir, check=True)
+        except FileNotFoundError:
+            raise CommandError("npx not found - install Node.js and run `npm install`")
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(f"tailwindcss failed with exit code {exc.returncode}")
+        self.stdout.write(self.style.SUCCESS(f"Built {output} ({output.stat().st_size // 1024} KB)"))
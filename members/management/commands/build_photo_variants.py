@@ -0,0 +1,86 @@
+"""
+สร้างรูปย่อ (WebP/JPEG) ของรูปสมาชิกที่มีอยู่แล้ว ขนานหลาย process
+Run: python manage.py build_photo_variants [--workers 4] [--batch-size 50] [--force]
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from members.models import Member
+from members.photos import needs_variants, render_variants, save_variants, store_variants
+
+
+def _render_job(job):
+    """รันใน worker process - คืน (pk, variants) หรือ (pk, None) ถ้าอ่านรูปไม่ได้"""
+    pk, data = job
+    try:
+        return pk, render_variants(data)
+    except Exception:
+        return pk, None
+
+
+class Command(BaseCommand):
+    help = "Generate card/avatar/print photo variants for existing members using a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=50,
+            help="Number of photos loaded into memory per batch",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Rebuild variants that are already up to date",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+
+        built = skipped = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch = []
+            members = Member.objects.exclude(photo="").exclude(photo__isnull=True).iterator(chunk_size=500)
+            for member in members:
+                if not options["force"] and not needs_variants(member):
+                    skipped += 1
+                    continue
+                batch.append(member)
+                if len(batch) >= batch_size:
+                    b, f = self._process(pool, batch)
+                    built, failed = built + b, failed + f
+                    batch = []
+            if batch:
+                b, f = self._process(pool, batch)
+                built, failed = built + b, failed + f
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. built={built} skipped={skipped} failed={failed}"
+        ))
+
+    def _process(self, pool, members):
+        by_pk = {member.pk: member for member in members}
+        jobs = []
+        failed = 0
+        for member in members:
+            try:
+                with member.photo.open("rb") as f:
+                    jobs.append((member.pk, f.read()))
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{member.member_id}: cannot read {member.photo.name} ({exc})")
+
+        built = 0
+        for pk, rendered in pool.map(_render_job, jobs):
+            member = by_pk[pk]
+            if rendered is None:
+                failed += 1
+                self.stderr.write(f"{member.member_id}: cannot decode {member.photo.name}")
+                continue
+            save_variants(member, store_variants(member, member.photo.name, rendered))
+            built += 1
+        return built, failed
@@ -0,0 +1,30 @@
+"""
+key Ed25519 ของ token ใน QR บัตร (ดู members/tokens.py)
+Run: python manage.py card_keys                     (public key ที่ต้องใส่ในเครื่องสแกน)
+     python manage.py card_keys --generate --kid k2 (key คู่ใหม่ - ตั้ง CARD_SIGNING_KEY บน server เท่านั้น)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from members.tokens import generate_signing_key, public_keys
+
+
+class Command(BaseCommand):
+    help = "Print the public keys scanners need, or generate a new card signing key pair"
+    # --generate ต้องใช้ได้ก่อนตั้ง CARD_SIGNING_KEY (ไม่รัน system check)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--generate", action="store_true", help="Generate a new key pair")
+        parser.add_argument("--kid", default="k1", help="Key id for --generate (default: %(default)s)")
+
+    def handle(self, *args, **options):
+        if options["generate"]:
+            if not options["kid"] or "." in options["kid"] or ":" in options["kid"]:
+                raise CommandError("--kid must not be empty or contain '.' or ':'")
+            private, public = generate_signing_key(options["kid"])
+            self.stdout.write(f"CARD_SIGNING_KEY={private}")
+            self.stdout.write(f"# public key for scanners / CARD_VERIFY_KEYS after rotation: {public}")
+            return
+
+        for kid, public in public_keys().items():
+            self.stdout.write(f"{kid}:{public}")
@@ -0,0 +1,40 @@
+"""
+นำเข้าไฟล์ที่ตรวจแล้ว (MemberImport) ทั้งหมดในครั้งเดียว - สำหรับไฟล์ใหญ่ที่หน้าเว็บต้องทำหลายร้อย request
+hash รหัสผ่านขนานทุก core และบันทึกทีละ --batch-size แถว (ต่อจากที่หน้าเว็บนำเข้าไปแล้วได้)
+Run: python manage.py commit_import 12
+     python manage.py commit_import 12 --batch-size 500
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from members.importer import commit_import
+from members.models import MemberImport
+
+
+class Command(BaseCommand):
+    help = "Commit every remaining row of a validated member import"
+
+    def add_arguments(self, parser):
+        parser.add_argument("import_id", type=int, help="MemberImport id (from the import preview URL)")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Rows hashed and inserted per transaction (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        member_import = MemberImport.objects.filter(pk=options["import_id"]).first()
+        if member_import is None:
+            raise CommandError(f"Import {options['import_id']} not found")
+        if not member_import.is_pending:
+            raise CommandError(f"Import {member_import.pk} is already committed")
+
+        total = len(member_import.valid_rows)
+        if not total:
+            raise CommandError(f"Import {member_import.pk} has no valid rows")
+
+        while member_import.is_pending:
+            if not commit_import(member_import, limit=options["batch_size"]):
+                # หน้าเว็บนำเข้าชุดเดียวกันไปพร้อมกัน - โหลดความคืบหน้าใหม่แล้วทำต่อ
+                member_import.refresh_from_db()
+                continue
+            self.stdout.write(f"Committed {member_import.committed_count}/{total}")
+        self.stdout.write(self.style.SUCCESS(f"Import {member_import.pk}: {member_import.committed_count} members"))
@@ -0,0 +1,118 @@
+"""
+Export สมาชิกแบบ streaming (หน่วยความจำคงที่)
+Run: python manage.py export_members --format jsonl --output members.jsonl
+     python manage.py export_members --format csv --fields member_id,first_name,last_name --status valid
+     python manage.py export_members --cursor-file .member_sync_cursor -o changes.jsonl   (delta)
+"""
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from members.exporter import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    STATUS_FILTERS,
+    ExportError,
+    filter_members,
+    parse_fields,
+    stream_changes,
+    stream_export,
+)
+from members.models import Member
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date (use YYYY-MM-DD): {value}")
+
+
+class Command(BaseCommand):
+    help = "Stream members to JSONL, CSV or JSON without loading them all into memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="jsonl")
+        parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+        parser.add_argument("--fields", help="Comma-separated fields to export (default: all)")
+        parser.add_argument("--role", choices=[r for r, _ in Member.ROLE_CHOICES])
+        parser.add_argument("--status", choices=STATUS_FILTERS)
+        parser.add_argument("--joined-from", type=_parse_date, help="join_date >= YYYY-MM-DD")
+        parser.add_argument("--joined-to", type=_parse_date, help="join_date <= YYYY-MM-DD")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--since", type=int,
+            help="Delta mode: only changes (upserts + deletes) after this cursor, as JSONL",
+        )
+        parser.add_argument(
+            "--cursor-file",
+            help="Delta mode: read the cursor from this file and store the next one after a successful export",
+        )
+
+    def handle(self, *args, **options):
+        if options["since"] is not None or options["cursor_file"]:
+            return self.handle_delta(options)
+
+        try:
+            fields = parse_fields(options["fields"])
+            queryset = filter_members(
+                Member.objects.all(),
+                role=options["role"],
+                status=options["status"],
+                joined_from=options["joined_from"],
+                joined_to=options["joined_to"],
+            )
+            chunks = stream_export(queryset, options["format"], fields, options["chunk_size"])
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        self.write_chunks(chunks, options["output"])
+
+    def handle_delta(self, options):
+        if options["format"] != "jsonl":
+            raise CommandError("Delta export only supports --format jsonl")
+        if options["role"] or options["status"] or options["joined_from"] or options["joined_to"]:
+            raise CommandError("Filters cannot be combined with delta export")
+
+        since = options["since"]
+        cursor_file = options["cursor_file"]
+        if since is None:
+            since = self.read_cursor(cursor_file)
+
+        try:
+            fields = parse_fields(options["fields"])
+            chunks, next_cursor = stream_changes(since, fields, options["chunk_size"])
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        self.write_chunks(chunks, options["output"])
+
+        # เขียน cursor หลัง export สำเร็จเท่านั้น - ถ้าล้มกลางทาง รอบหน้าจะเริ่มจาก cursor เดิม
+        if cursor_file:
+            tmp_path = f"{cursor_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(f"{next_cursor}\n")
+            os.replace(tmp_path, cursor_file)
+        self.stderr.write(f"Next cursor: {next_cursor}")
+
+    def read_cursor(self, cursor_file):
+        """cursor จากไฟล์ (ไม่มีไฟล์ = 0 คือส่งทุกแถว)"""
+        try:
+            with open(cursor_file, encoding="utf-8") as f:
+                value = f.read().strip()
+        except FileNotFoundError:
+            return 0
+        try:
+            return int(value or 0)
+        except ValueError:
+            raise CommandError(f"Invalid cursor in {cursor_file}: {value}")
+
+    def write_chunks(self, chunks, output):
+        if output:
+            with open(output, "w", encoding="utf-8", newline="") as f:
+                f.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Exported to {output}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,39 @@
+"""
+สรุป CardScan ใหม่ (ตั้งแต่ watermark ล่าสุด) เข้าตาราง rollup ของ dashboard
+Run: python manage.py rollup_scans               (รันครั้งเดียว - ตั้ง cron ทุก 5 นาที)
+     python manage.py rollup_scans --every 300   (วนรันเองเป็น process แยก)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from members.rollups import DEFAULT_BATCH_SIZE, DEFAULT_LAG_SECONDS, rollup_scans
+
+
+class Command(BaseCommand):
+    help = "Incrementally roll up new card scans into hourly and per-member daily tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lag", type=int, default=DEFAULT_LAG_SECONDS,
+            help="Skip scans newer than this many seconds (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Scan ids processed per transaction (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--every", type=int, default=0,
+            help="Keep running and roll up every N seconds (default: run once)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed, watermark = rollup_scans(options["lag"], options["batch_size"])
+            self.stdout.write(f"Rolled up {processed} scan id(s), watermark={watermark}")
+
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,46 @@
+"""
+Snapshot ของบัตรที่ใช้ได้สำหรับเครื่องสแกน offline (รูปแบบดู members/scanner.py)
+ต้องตั้ง SCANNER_FINGERPRINT_KEY (key เดียวกับที่ใส่ในเครื่องสแกน)
+Run: python manage.py scanner_snapshot -o valid.gcvs
+     python manage.py scanner_snapshot --since 1234.20260101.3f9a0c2e     (delta เป็น JSON)
+"""
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from members.scanner import SnapshotVersionError, build_delta, build_snapshot, read_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write the packed valid-card snapshot for offline scanners, or print a delta since a version"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="Snapshot file to write")
+        parser.add_argument("--since", help="Print the changes since this snapshot version as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            self.write(options)
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+
+    def write(self, options):
+        if options["since"]:
+            try:
+                delta = build_delta(options["since"])
+            except SnapshotVersionError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(json.dumps(delta))
+            return
+
+        if not options["output"]:
+            raise CommandError("Use --output FILE or --since VERSION")
+
+        version, data = build_snapshot()
+        with open(options["output"], "wb") as f:
+            f.write(data)
+        count = len(read_snapshot(data)["fingerprints"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['output']}: version={version} cards={count} size={len(data)} bytes"
+        ))
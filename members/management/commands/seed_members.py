@@ -0,0 +1,49 @@
+"""
+สร้างสมาชิกสังเคราะห์ (ชื่อไทย/อังกฤษ, เบอร์โทร, หมู่เลือด, role, กลุ่มหมดอายุ/ใกล้หมด/ใช้ได้) สำหรับทดสอบ
+Run: python manage.py seed_members --count 100000 [--batch-size 5000] [--seed 42]
+รหัสผ่านของแต่ละคน = เบอร์โทร (hash แบบถูก ดู members/seeding.py) - ห้ามใช้กับฐานข้อมูลจริง
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from members.seeding import DEFAULT_BATCH_SIZE, seed_members
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert realistic synthetic members (with login users) for local load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, required=True, help="Number of members to create")
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Members per bulk insert transaction (default: %(default)s)",
+        )
+        parser.add_argument("--seed", type=int, help="Random seed for a reproducible roster")
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Allow seeding when DEBUG is False",
+        )
+
+    def handle(self, *args, **options):
+        if options["count"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--count and --batch-size must be at least 1")
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("Refusing to seed fake members with DEBUG=False (use --force)")
+
+        started = time.monotonic()
+
+        def progress(done):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{done}/{options['count']} members ({done / elapsed:.0f}/s)")
+
+        created = seed_members(
+            options["count"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} members in {time.monotonic() - started:.1f}s"
+        ))
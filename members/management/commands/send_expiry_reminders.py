@@ -0,0 +1,70 @@
+"""
+ส่งอีเมลเตือนสมาชิกที่บัตรใกล้หมดอายุ (ไม่ส่งซ้ำ - รันซ้ำ/รันต่อหลัง crash ได้)
+Run: python manage.py send_expiry_reminders                      (ตั้ง cron วันละครั้ง)
+     python manage.py send_expiry_reminders --days 14 --rate 2
+     python manage.py send_expiry_reminders --dry-run
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from members.reminders import (
+    DEFAULT_BATCH_SIZE,
+    release_unconfirmed,
+    send_expiry_reminders,
+    unconfirmed_reminders,
+)
+
+
+class Command(BaseCommand):
+    help = "Email members whose card expires soon, in batches over one SMTP connection per batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.EXPIRY_REMINDER_DAYS,
+            help="Remind members whose card expires within this many days (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Members loaded and emailed per SMTP connection (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--rate", type=float, default=settings.EXPIRY_REMINDER_RATE,
+            help="Maximum emails per second, 0 = unlimited (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only count members that would be emailed",
+        )
+        parser.add_argument(
+            "--retry-unconfirmed", action="store_true",
+            help="Resend reminders left unconfirmed by an interrupted run (may duplicate)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        unconfirmed = unconfirmed_reminders().count()
+        if unconfirmed:
+            if options["retry_unconfirmed"] and not options["dry_run"]:
+                release_unconfirmed()
+                self.stdout.write(f"Released {unconfirmed} unconfirmed reminder(s) for resending")
+            else:
+                self.stderr.write(
+                    f"{unconfirmed} reminder(s) from an interrupted run are unconfirmed and skipped "
+                    "(use --retry-unconfirmed to resend)"
+                )
+
+        result = send_expiry_reminders(
+            days=options["days"],
+            batch_size=options["batch_size"],
+            rate=options["rate"],
+            dry_run=options["dry_run"],
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{result['due']} member(s) due for a reminder")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {result['sent']} reminder(s) in {result['batches']} batch(es), {result['failed']} failed"
+        ))
@@ -0,0 +1,95 @@
+"""
+สร้าง QR code ของสมาชิกทุกคนล่วงหน้าเก็บลง QR cache (ใช้ process pool)
+Run: python manage.py warm_qr_cache [--workers 4] [--sizes svg,100,120,150] [--force]
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from members.models import Member
+from members.utils import QR_CACHE_ALIAS, QR_SIZES, QR_SVG, qr_cache_key, render_qr_png, render_qr_svg
+
+
+def _render_job(job):
+    """รันใน worker process - คืน (key, png) หรือ (key, None) ถ้าสร้างไม่ได้"""
+    key, url, size = job
+    try:
+        if size == QR_SVG:
+            return key, render_qr_svg(url)
+        return key, render_qr_png(url, size)
+    except Exception:
+        return key, None
+
+
+class Command(BaseCommand):
+    help = "Pre-generate QR codes for all members into the QR cache using a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--sizes", default=",".join(str(s) for s in (QR_SVG, *QR_SIZES)),
+            help="Comma-separated PNG sizes in pixels and/or 'svg' (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Number of QR codes written to the cache per batch",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Re-render codes that are already cached",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [
+                s.strip() if s.strip() == QR_SVG else int(s)
+                for s in options["sizes"].split(",") if s.strip()
+            ]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers or 'svg'")
+
+        cache = caches[QR_CACHE_ALIAS]
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+
+        generated = skipped = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch = []
+            members = Member.objects.only("id", "public_id", "expire_date").iterator(chunk_size=2000)
+            for member in members:
+                url = member.get_qr_url()
+                batch.extend((qr_cache_key(url, size), url, size) for size in sizes)
+                if len(batch) >= batch_size:
+                    g, s, f = self._process(pool, cache, batch, options["force"])
+                    generated, skipped, failed = generated + g, skipped + s, failed + f
+                    batch = []
+            if batch:
+                g, s, f = self._process(pool, cache, batch, options["force"])
+                generated, skipped, failed = generated + g, skipped + s, failed + f
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. generated={generated} skipped={skipped} failed={failed}"
+        ))
+
+    def _process(self, pool, cache, jobs, force):
+        skipped = 0
+        if not force:
+            existing = cache.get_many([key for key, _, _ in jobs])
+            skipped = len(existing)
+            jobs = [job for job in jobs if job[0] not in existing]
+
+        rendered = {}
+        failed = 0
+        for key, png in pool.map(_render_job, jobs, chunksize=32):
+            if png is None:
+                failed += 1
+            else:
+                rendered[key] = png
+        if rendered:
+            cache.set_many(rendered, None)
+        return len(rendered), skipped, failed
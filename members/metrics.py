@@ -0,0 +1,264 @@
+"""
+วัดเวลาของแต่ละ request (members.metrics.RequestMetricsMiddleware)
+
+ต่อ request: เวลารวมของ view, จำนวน/เวลาของ SQL, เวลา render template และเวลาสร้าง QR
+- ส่งเป็น header Server-Timing ให้ staff (ดูใน DevTools > Network > Timing)
+- รวมเป็น counter + histogram ต่อชื่อ URL (url_name) แสดงที่ /metrics ในรูปแบบ Prometheus text
+
+ค่าที่รวมไว้อยู่ในหน่วยความจำของ process (แต่ละ worker / instance ของ serverless นับแยกกัน)
+ต้นทุนต่อ request: perf_counter สองครั้งต่อคิวรี และ lock หนึ่งครั้งตอนจบ request
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template
+
+# ขอบบนของ bucket (วินาที) ของ histogram เวลาต่อ request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ชื่อ view ของ request ที่ไม่ตรงกับ URL ใด (404 จาก resolver)
+UNMATCHED = "<unmatched>"
+
+# ส่วนของเวลาที่ Server-Timing รายงาน (ชื่อใน header, คำอธิบาย)
+TIMING_PARTS = (
+    ("db", "SQL"),
+    ("tpl", "Template render"),
+    ("qr", "QR render"),
+)
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """เวลาสะสมของ request ปัจจุบัน (วินาที) แยกตามส่วน"""
+
+    __slots__ = ("db", "tpl", "qr", "queries", "running")
+
+    def __init__(self):
+        self.db = self.tpl = self.qr = 0.0
+        self.queries = 0
+        # ส่วนที่กำลังจับเวลาอยู่ (timer ซ้อนของส่วนเดียวกันไม่นับซ้ำ)
+        self.running = set()
+
+
+@contextlib.contextmanager
+def timer(part):
+    """
+    จับเวลาส่วน part ("tpl", "qr") ของ request ปัจจุบัน - นอก request ไม่ทำอะไร
+    timer ของ part เดียวกันที่ซ้อนอยู่ข้างใน (เช่น render_to_string ของ fragment ระหว่าง render หน้า)
+    นับรวมในตัวนอกแล้ว จึงไม่บวกเวลาซ้ำ
+    """
+    timings = _current.get()
+    if timings is None or part in timings.running:
+        yield
+        return
+    timings.running.add(part)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.running.discard(part)
+        setattr(timings, part, getattr(timings, part) + time.perf_counter() - start)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.db += time.perf_counter() - start
+            timings.queries += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer("tpl"):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates ที่จับเวลา render ของ template ระดับบนสุด (include ข้างในนับรวมในตัวแม่)
+    ใช้เป็น BACKEND ใน settings.TEMPLATES
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class _ViewStats:
+    __slots__ = ("responses", "buckets", "duration", "queries", "db", "tpl", "qr")
+
+    def __init__(self):
+        self.responses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.duration = self.db = self.tpl = self.qr = 0.0
+        self.queries = 0
+
+
+class MetricsRegistry:
+    """counter และ histogram ต่อ url_name (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, method, status, duration, timings):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = _ViewStats()
+            key = (method, status)
+            stats.responses[key] = stats.responses.get(key, 0) + 1
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.duration += duration
+            stats.queries += timings.queries
+            stats.db += timings.db
+            stats.tpl += timings.tpl
+            stats.qr += timings.qr
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """ค่าทั้งหมดในรูปแบบ Prometheus text exposition (version 0.0.4)"""
+        with self._lock:
+            views = sorted(self._views.items())
+            snapshot = [
+                (view, dict(s.responses), list(s.buckets), s.duration, s.queries, s.db, s.tpl, s.qr)
+                for view, s in views
+            ]
+
+        lines = [
+            "# HELP gc_http_requests_total Responses by URL name, method and status code.",
+            "# TYPE gc_http_requests_total counter",
+        ]
+        for view, responses, *_ in snapshot:
+            for (method, status), count in sorted(responses.items()):
+                lines.append(
+                    f'gc_http_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}'
+                )
+
+        lines += [
+            "# HELP gc_http_request_duration_seconds Time spent in the view and inner middleware.",
+            "# TYPE gc_http_request_duration_seconds histogram",
+        ]
+        for view, responses, buckets, duration, *_ in snapshot:
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), buckets):
+                cumulative += count
+                lines.append(f'gc_http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'gc_http_request_duration_seconds_sum{{view="{view}"}} {duration:.6f}')
+            lines.append(f'gc_http_request_duration_seconds_count{{view="{view}"}} {cumulative}')
+
+        for name, help_text, index, fmt in (
+            ("gc_db_queries_total", "SQL queries executed.", 4, "{}"),
+            ("gc_db_query_duration_seconds_total", "Time spent executing SQL.", 5, "{:.6f}"),
+            ("gc_template_render_seconds_total", "Time spent rendering templates.", 6, "{:.6f}"),
+            ("gc_qr_render_seconds_total", "Time spent generating QR images (cache misses).", 7, "{:.6f}"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for row in snapshot:
+                lines.append(f'{name}{{view="{row[0]}"}} ' + fmt.format(row[index]))
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else UNMATCHED
+
+
+def _is_staff(request):
+    """
+    ใช้ Member ที่ view โหลดไว้แล้ว (get_current_member) - ไม่เพิ่มคิวรี session/user
+    ให้หน้าสาธารณะ จึงได้ header เฉพาะหน้าที่ตรวจสิทธิ์ผู้ใช้
+    """
+    member = getattr(request, "_cached_member", None)
+    return member is not None and member.role != "MEMBER"
+
+
+def server_timing_header(duration, timings):
+    parts = [f"app;dur={duration * 1000:.1f}"]
+    for name, description in TIMING_PARTS:
+        value = getattr(timings, name)
+        if name == "db":
+            description = f"{timings.queries} SQL quer{'y' if timings.queries == 1 else 'ies'}"
+        elif not value:
+            continue
+        parts.append(f'{name};dur={value * 1000:.1f};desc="{description}"')
+    return ", ".join(parts)
+
+
+class RequestMetricsMiddleware:
+    """
+    วัดเวลา + คิวรีของทุก request (ปิดได้ด้วย REQUEST_METRICS_ENABLED=False)
+
+    StreamingHttpResponse (export CSV/JSONL): คิวรีส่วนใหญ่เกิดตอนส่งข้อมูลหลัง view คืนค่า
+    จึงวัดต่อจนวนอ่าน streaming_content หมด (หรือ response ถูกปิด) แล้วค่อยนับ - ไม่มี Server-Timing
+    เพราะ header ถูกส่งไปก่อนแล้ว
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.REQUEST_METRICS_ENABLED
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_sql_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._timed_stream(
+                response.streaming_content, request, response, start, timings,
+            )
+            return response
+
+        duration = time.perf_counter() - start
+        registry.observe(_view_name(request), request.method, response.status_code, duration, timings)
+        if _is_staff(request):
+            response["Server-Timing"] = server_timing_header(duration, timings)
+        return response
+
+    @staticmethod
+    def _timed_stream(content, request, response, start, timings):
+        # ตั้ง context ทีละ chunk (ไม่ค้างข้าม yield) - ผู้อ่านแต่ละ chunk อาจอยู่คนละ context/thread
+        iterator = iter(content)
+        try:
+            while True:
+                token = _current.set(timings)
+                try:
+                    with connection.execute_wrapper(_sql_wrapper):
+                        chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield chunk
+        finally:
+            duration = time.perf_counter() - start
+            registry.observe(_view_name(request), request.method, response.status_code, duration, timings)
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def seed_member_id_sequence(apps, schema_editor):
+    """ตั้งต้น sequence ของ member_id จากเลขที่มากที่สุดที่มีอยู่แล้ว"""
+    Member = apps.get_model('members', 'Member')
+    IdSequence = apps.get_model('members', 'IdSequence')
+    db = schema_editor.connection.alias
+
+    last_number = 0
+    for member_id in Member.objects.using(db).values_list('member_id', flat=True).iterator():
+        _, _, number = member_id.partition('-')
+        if number.isdigit():
+            last_number = max(last_number, int(number))
+
+    IdSequence.objects.using(db).update_or_create(
+        name='member_id',
+        defaults={'last_value': last_number},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0010_member_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_member_id_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def backfill_change_seq(apps, schema_editor):
+    """ให้แถวเดิมมีเลขลำดับตาม id แล้วตั้งต้น sequence ต่อจากค่าสูงสุด"""
+    Member = apps.get_model('members', 'Member')
+    IdSequence = apps.get_model('members', 'IdSequence')
+    db = schema_editor.connection.alias
+
+    Member.objects.using(db).update(change_seq=models.F('id'))
+    last_value = Member.objects.using(db).aggregate(m=models.Max('id'))['m'] or 0
+    IdSequence.objects.using(db).update_or_create(
+        name='member_change',
+        defaults={'last_value': last_value},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0012_memberimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='MemberTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_pk', models.BigIntegerField()),
+                ('member_id', models.CharField(max_length=20)),
+                ('public_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('change_seq', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0014_member_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField()),
+                ('scanned_at', models.DateTimeField(db_index=True)),
+                ('was_valid', models.BooleanField()),
+                ('remote_addr', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.CharField(blank=True, max_length=255)),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scans', to='members.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['member', 'scanned_at'], name='members_car_member__4232db_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0015_cardscan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('valid', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScanMemberDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_rollups', to='members.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='members_sca_day_d50b45_idx')],
+                'constraints': [models.UniqueConstraint(fields=('member', 'day'), name='unique_scan_member_day')],
+            },
+        ),
+    ]
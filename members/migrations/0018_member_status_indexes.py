@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0017_member_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['is_active', 'expire_date'], name='member_active_expire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['expire_date'], name='member_expire_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0018_member_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiryReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expire_date', models.DateField()),
+                ('email', models.EmailField(max_length=254)),
+                ('claimed_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expiry_reminders', to='members.member')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('member', 'expire_date'), name='unique_expiry_reminder')],
+            },
+        ),
+    ]
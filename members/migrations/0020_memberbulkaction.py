@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0019_expiryreminder'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberBulkAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('RENEW', 'Renew'), ('DEACTIVATE', 'Deactivate'), ('REACTIVATE', 'Reactivate'), ('SET_ROLE', 'Set role')], max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('criteria', models.JSONField(blank=True, default=dict)),
+                ('affected', models.PositiveIntegerField(default=0)),
+                ('change_seq', models.BigIntegerField(blank=True, null=True)),
+                ('performed_at', models.DateTimeField(auto_now_add=True)),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
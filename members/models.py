@@ -1,4 +1,5 @@
-from django.db import models, transaction
+from django.db import connections, models, transaction
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import RegexValidator
@@ -12,8 +13,143 @@ phone_validator = RegexValidator(
 )
 
 
+class IdSequence(models.Model):
+    """
+    ตัวนับเลขรันแบบ atomic (เช่น เลขท้ายของ member_id)
+    จองเลขต่อเนื่องทีละบล็อกได้ใน round-trip เดียว ด้วย UPDATE ... RETURNING
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.last_value}"
+
+    @classmethod
+    def reserve(cls, name, count=1, initial=None):
+        """
+        จองเลข count ตัวจาก sequence ชื่อ name คืนเป็น range ของเลขที่ได้
+        ถ้ายังไม่มี sequence จะสร้างโดยเริ่มจากค่าที่ initial() คืนมา (default 0)
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        last_value = cls._increment(name, count)
+        if last_value is None:
+            start = initial() if initial else 0
+            cls.objects.get_or_create(name=name, defaults={"last_value": start})
+            last_value = cls._increment(name, count)
+        return range(last_value - count + 1, last_value + 1)
+
+    @classmethod
+    def current(cls, name):
+        """ค่าล่าสุดของ sequence ที่ commit แล้ว (0 ถ้ายังไม่มี)"""
+        value = cls.objects.filter(name=name).values_list("last_value", flat=True).first()
+        return value or 0
+
+    @classmethod
+    def _increment(cls, name, count):
+        """เพิ่มค่า sequence คืนค่าล่าสุด หรือ None ถ้ายังไม่มี sequence นี้"""
+        db = cls.objects.db
+        connection = connections[db]
+        table = connection.ops.quote_name(cls._meta.db_table)
+
+        if connection.features.can_return_columns_from_insert:
+            # UPDATE ... RETURNING: ล็อกแถวและได้ค่าใหม่ในคำสั่งเดียว
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET last_value = last_value + %s "
+                    f"WHERE name = %s RETURNING last_value",
+                    [count, name],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        with transaction.atomic(using=db):
+            updated = cls.objects.filter(name=name).update(last_value=F("last_value") + count)
+            if not updated:
+                return None
+            return cls.objects.filter(name=name).values_list("last_value", flat=True).get()
+
+
+class MemberQuerySet(models.QuerySet):
+    """
+    สถานะสมาชิกแบบคิวรี (กฎเดียวกับ is_valid / is_expired / is_expiring_soon)
+    ให้ฐานข้อมูลกรองผ่าน index (is_active, expire_date) แทนการเทียบวันที่ใน Python
+    today ไม่ระบุ = timezone.now().date() เหมือน method ของ Member
+    """
+
+    STATUS_VALID = "valid"
+    STATUS_EXPIRING = "expiring"
+    STATUS_EXPIRED = "expired"
+    STATUS_INACTIVE = "inactive"
+
+    @staticmethod
+    def _today(today):
+        return today or timezone.now().date()
+
+    def valid(self, today=None):
+        """บัตรใช้งานได้: is_active=True และ expire_date >= วันนี้"""
+        return self.filter(is_active=True, expire_date__gte=self._today(today))
+
+    def expired(self, today=None):
+        """หมดอายุตามวันที่ (ไม่มี expire_date ถือว่าหมดอายุ) - รวมบัตรที่ถูกระงับด้วย"""
+        return self.filter(Q(expire_date__lt=self._today(today)) | Q(expire_date__isnull=True))
+
+    def inactive(self):
+        """บัตรถูกระงับ (is_active=False)"""
+        return self.filter(is_active=False)
+
+    def expiring_within(self, days=30, today=None):
+        """บัตรที่ยังใช้ได้และจะหมดอายุภายใน days วัน"""
+        today = self._today(today)
+        return self.filter(
+            is_active=True,
+            expire_date__gte=today,
+            expire_date__lte=today + timedelta(days=days),
+        )
+
+    def with_status(self, status, today=None, expiring_days=30):
+        """กรองตามชื่อสถานะ (valid / expiring / expired / inactive)"""
+        if status == self.STATUS_VALID:
+            return self.valid(today)
+        if status == self.STATUS_EXPIRING:
+            return self.expiring_within(expiring_days, today)
+        if status == self.STATUS_EXPIRED:
+            return self.expired(today)
+        if status == self.STATUS_INACTIVE:
+            return self.inactive()
+        raise ValueError(f"Unknown status: {status}")
+
+    def annotate_status(self, today=None, expiring_days=30):
+        """
+        เพิ่ม membership_status ให้แต่ละแถว (ลำดับเดียวกับ verify API: ระงับ > หมดอายุ > ใกล้หมด > ใช้ได้)
+        """
+        today = self._today(today)
+        return self.annotate(membership_status=Case(
+            When(is_active=False, then=Value(self.STATUS_INACTIVE)),
+            When(Q(expire_date__lt=today) | Q(expire_date__isnull=True), then=Value(self.STATUS_EXPIRED)),
+            When(expire_date__lte=today + timedelta(days=expiring_days), then=Value(self.STATUS_EXPIRING)),
+            default=Value(self.STATUS_VALID),
+            output_field=models.CharField(),
+        ))
+
+
+MEMBER_STATUSES = (
+    MemberQuerySet.STATUS_VALID,
+    MemberQuerySet.STATUS_EXPIRING,
+    MemberQuerySet.STATUS_EXPIRED,
+    MemberQuerySet.STATUS_INACTIVE,
+)
+
+
 class Member(models.Model):
 
+    MEMBER_ID_PREFIX = "GC-"
+    MEMBER_ID_SEQUENCE = "member_id"
+    # เลขลำดับการเปลี่ยนแปลง (เพิ่มทุกครั้งที่สร้าง/แก้ไข/ลบสมาชิก) ใช้ทำ delta export
+    CHANGE_SEQUENCE = "member_change"
+
     ROLE_CHOICES = [
         ('MEMBER', 'Member'),
         ('STAFF', 'Staff'),
@@ -67,6 +203,8 @@ class Member(models.Model):
     address = models.TextField(blank=True)
 
     photo = models.ImageField(upload_to='member_photos/', blank=True, null=True)
+    # ไฟล์รูปย่อที่สร้างจาก photo (ดู members/photos.py) {"source": ..., "files": {variant: {ext: {density: name}}}}
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     email = models.EmailField(blank=True, null=True)
 
@@ -98,33 +236,78 @@ class Member(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    # ลำดับการเปลี่ยนแปลงล่าสุดของแถวนี้ (ดู CHANGE_SEQUENCE)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    # เวลาแก้ไขล่าสุด (ใช้เป็น Last-Modified ของหน้าบัตร)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MemberQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['public_id']),
             models.Index(fields=['member_id']),
+            # valid() / expiring_within() / inactive() - กรอง is_active แล้วช่วงวันที่ใน index เดียว
+            models.Index(fields=['is_active', 'expire_date'], name='member_active_expire_idx'),
+            # expired() และรายการหมดอายุล่าสุดใน dashboard (ORDER BY expire_date DESC)
+            models.Index(fields=['expire_date'], name='member_expire_idx'),
         ]
 
     # -----------------------
     # LOGIC
     # -----------------------
 
-    def save(self, *args, **kwargs):
+    def fill_default_expire_date(self):
+        """ถ้าไม่ได้กำหนดวันหมดอายุ ให้หมดอายุ 1 ปีหลังวันสมัคร (ใช้ทั้งใน save และ bulk_create)"""
         if not self.expire_date and self.join_date:
             self.expire_date = self.join_date + timedelta(days=365)
 
+    def save(self, *args, **kwargs):
+        self.fill_default_expire_date()
+
         if not self.member_id:
-            with transaction.atomic():
-                last_member = Member.objects.select_for_update().order_by('-id').first()
-                if last_member:
-                    last_number = int(last_member.member_id.split('-')[1])
-                    new_number = last_number + 1
-                else:
-                    new_number = 1
-                self.member_id = f"GC-{new_number:03d}"
-                super().save(*args, **kwargs)
-        else:
+            self.member_id = Member.allocate_member_ids(1)[0]
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "change_seq", "updated_at"}
+
+        # จองเลขลำดับใน transaction เดียวกับการเขียนแถว - ล็อกของ sequence
+        # ค้างจน commit ทำให้ลำดับเลขตรงกับลำดับการ commit (delta export ไม่ตกหล่น)
+        with transaction.atomic():
+            self.change_seq = Member.next_change_seqs(1)[0]
             super().save(*args, **kwargs)
 
+    @classmethod
+    def next_change_seqs(cls, count=1):
+        """จองเลขลำดับการเปลี่ยนแปลง count ตัว (ต้องเรียกภายใน transaction ที่เขียนข้อมูล)"""
+        return list(IdSequence.reserve(cls.CHANGE_SEQUENCE, count))
+
+    @classmethod
+    def format_member_id(cls, number):
+        return f"{cls.MEMBER_ID_PREFIX}{number:03d}"
+
+    @classmethod
+    def allocate_member_ids(cls, count=1):
+        """จอง member_id ใหม่ count ตัว (ใช้กับ bulk_create ได้) - ไม่ซ้ำแม้เรียกพร้อมกันหลาย process"""
+        numbers = IdSequence.reserve(
+            cls.MEMBER_ID_SEQUENCE,
+            count,
+            initial=cls._max_member_number,
+        )
+        return [cls.format_member_id(n) for n in numbers]
+
+    @classmethod
+    def _max_member_number(cls):
+        """เลขท้าย member_id ที่มากที่สุดในตาราง (ใช้ตั้งต้น sequence ครั้งแรก)"""
+        numbers = [0]
+        for member_id in cls.objects.values_list("member_id", flat=True).iterator():
+            _, _, number = member_id.partition("-")
+            if number.isdigit():
+                numbers.append(int(number))
+        return max(numbers)
+
     def __str__(self):
         return f"{self.member_id} - {self.first_name} {self.last_name}"
 
@@ -147,23 +330,178 @@ class Member(models.Model):
         return f"{base}/card/{self.public_id}/"
 
 
+    def get_qr_url(self):
+        """ข้อความใน QR = URL ของบัตร + token ลงลายเซ็น (?t=) ให้เครื่องสแกนตรวจแบบ offline ได้"""
+        from .tokens import sign_card
+        return f"{self.get_card_view_only_url()}?t={sign_card(self.public_id, self.expire_date)}"
+
     def is_expired(self):
         if self.expire_date is None:
             return True
         return self.expire_date < timezone.now().date()
 
-    def is_valid(self):
-        """บัตรใช้งานได้ เมื่อ is_active=True และ expire_date >= วันนี้"""
-        if not self.is_active:
+    @staticmethod
+    def check_valid(is_active, expire_date, today=None):
+        """กฎเดียวกับ is_valid() สำหรับค่าที่ดึงมาแบบไม่สร้าง instance (เช่น verify API)"""
+        if not is_active:
             return False
-        if not self.expire_date:
+        if not expire_date:
             return False
-        if self.expire_date < timezone.now().date():
+        if expire_date < (today or timezone.now().date()):
             return False
         return True
 
+    def is_valid(self):
+        """บัตรใช้งานได้ เมื่อ is_active=True และ expire_date >= วันนี้"""
+        return Member.check_valid(self.is_active, self.expire_date)
+
     def is_expiring_soon(self, days=30):
         if self.expire_date is None:
             return False
         today = timezone.now().date()
-        return today <= self.expire_date <= today + timedelta(days=days)
\ No newline at end of file
+        return today <= self.expire_date <= today + timedelta(days=days)
+
+
+class MemberImport(models.Model):
+    """ไฟล์นำเข้าสมาชิกที่ตรวจสอบแล้ว รอ staff ยืนยันก่อนบันทึกจริง"""
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('COMMITTED', 'Committed'),
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    filename = models.CharField(max_length=255)
+
+    total_rows = models.PositiveIntegerField(default=0)
+    # แถวที่ผ่านการตรวจสอบ (cleaned data แบบ JSON) และรายการ error ต่อแถว
+    valid_rows = models.JSONField(default=list)
+    errors = models.JSONField(default=list)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    committed_at = models.DateTimeField(blank=True, null=True)
+    committed_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def is_pending(self):
+        return self.status == 'PENDING'
+
+
+class MemberTombstone(models.Model):
+    """บันทึกการลบสมาชิก เพื่อให้ delta export แจ้งระบบปลายทางให้ลบตามได้"""
+
+    member_pk = models.BigIntegerField()
+    member_id = models.CharField(max_length=20)
+    public_id = models.UUIDField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    change_seq = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.member_id} (deleted)"
+
+
+class CardScan(models.Model):
+    """เหตุการณ์สแกน QR เปิดหน้าบัตร 1 ครั้ง (เขียนเป็นชุดผ่าน members.scans)"""
+
+    member = models.ForeignKey(
+        Member,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='scans',
+    )
+    public_id = models.UUIDField()
+    scanned_at = models.DateTimeField(db_index=True)
+    # สถานะบัตร ณ เวลาที่สแกน
+    was_valid = models.BooleanField()
+    remote_addr = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['member', 'scanned_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.public_id} @ {self.scanned_at:%Y-%m-%d %H:%M:%S}"
+
+
+class ScanHourlyRollup(models.Model):
+    """จำนวนการสแกนต่อชั่วโมง (สรุปจาก CardScan โดย members.rollups)"""
+
+    bucket = models.DateTimeField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+    valid = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.bucket:%Y-%m-%d %H:00} ({self.total})"
+
+
+class ScanMemberDailyRollup(models.Model):
+    """จำนวนการสแกนต่อสมาชิกต่อวัน (สรุปจาก CardScan โดย members.rollups)"""
+
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='scan_rollups')
+    day = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'day'], name='unique_scan_member_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id} {self.day} ({self.total})"
+
+
+class ExpiryReminder(models.Model):
+    """
+    อีเมลเตือนบัตรใกล้หมดอายุ หนึ่งแถวต่อสมาชิกต่อ expire_date (ดู members.reminders)
+    แถวถูกสร้างก่อนส่ง (claim) แล้วจึงใส่ sent_at เมื่อส่งสำเร็จ - รันซ้ำหรือรันต่อหลัง crash
+    จะข้ามสมาชิกที่มีแถวแล้ว ไม่ส่งซ้ำ (แถวที่ sent_at ว่าง = ไม่แน่ใจว่าส่งถึงหรือไม่)
+    """
+
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='expiry_reminders')
+    expire_date = models.DateField()
+    email = models.EmailField()
+    claimed_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'expire_date'], name='unique_expiry_reminder'),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id} {self.expire_date} ({'sent' if self.sent_at else 'pending'})"
+
+
+class MemberBulkAction(models.Model):
+    """บันทึกการแก้สมาชิกเป็นชุด (members.bulk) หนึ่งแถวต่อหนึ่งคำสั่ง UPDATE"""
+
+    ACTION_CHOICES = [
+        ('RENEW', 'Renew'),
+        ('DEACTIVATE', 'Deactivate'),
+        ('REACTIVATE', 'Reactivate'),
+        ('SET_ROLE', 'Set role'),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    # ค่าที่ใช้ (เช่น {"days": 365} หรือ {"role": "STAFF"})
+    params = models.JSONField(default=dict, blank=True)
+    # เงื่อนไขที่เลือกสมาชิก (status / q / ids ที่ติ๊ก)
+    criteria = models.JSONField(default=dict, blank=True)
+    affected = models.PositiveIntegerField(default=0)
+    # change_seq ที่ทุกแถวในชุดได้รับ (หาแถวที่ถูกแก้ได้จาก Member.change_seq จนกว่าจะถูกแก้อีก)
+    change_seq = models.BigIntegerField(null=True, blank=True)
+    performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    performed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.action} x{self.affected} ({self.performed_at:%Y-%m-%d %H:%M})"
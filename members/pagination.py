@@ -0,0 +1,141 @@
+"""
+Keyset (cursor) pagination เรียงตาม -id
+
+ต่างจาก Paginator ตรงที่ไม่ต้อง COUNT(*) และไม่ใช้ OFFSET - หน้าลึก ๆ ใช้เวลาเท่าหน้าแรก
+(WHERE id < cursor ORDER BY id DESC LIMIT n ผ่าน primary key index)
+
+EstimatedCountPaginator: Paginator ปกติ (มีเลขหน้า) ที่ไม่ COUNT(*) ทั้งตาราง - ใช้กับ Django admin
+"""
+
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def encode_cursor(direction, pk):
+    raw = f"{direction}:{pk}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """คืน (direction, pk) หรือ None ถ้า cursor ไม่ถูกต้อง"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, pk = base64.urlsafe_b64decode(padded).decode("ascii").split(":")
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return direction, pk
+
+
+class CursorPage:
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """แบ่งหน้า queryset ด้วย cursor บน id (มากไปน้อย)"""
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        limit = self.per_page + 1
+
+        if decoded is None:
+            rows = list(self.queryset.order_by("-id")[:limit])
+            has_more_after, has_more_before = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+        elif decoded[0] == NEXT:
+            rows = list(self.queryset.filter(id__lt=decoded[1]).order_by("-id")[:limit])
+            has_more_after, has_more_before = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+        else:
+            rows = list(self.queryset.filter(id__gt=decoded[1]).order_by("id")[:limit])
+            has_more_after, has_more_before = True, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+
+        if not rows:
+            return CursorPage([], None, None)
+
+        return CursorPage(
+            rows,
+            encode_cursor(NEXT, rows[-1].pk) if has_more_after else None,
+            encode_cursor(PREVIOUS, rows[0].pk) if has_more_before else None,
+        )
+
+    @cached_property
+    def count(self):
+        """จำนวนจริง - คิวรี COUNT(*) เฉพาะเมื่อถูกเรียกใช้"""
+        return self.queryset.count()
+
+    @cached_property
+    def estimated_count(self):
+        """จำนวนโดยประมาณ (ดู estimate_count) - None ถ้าประมาณไม่ได้"""
+        return estimate_count(self.queryset)
+
+
+def estimate_count(queryset):
+    """
+    จำนวนโดยประมาณจากสถิติของฐานข้อมูล (ไม่สแกนตาราง)
+    ใช้ได้เฉพาะ queryset ที่ไม่มีเงื่อนไขบน PostgreSQL - กรณีอื่นคืน None
+    """
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator ที่ใช้จำนวนโดยประมาณเมื่อไม่มีเงื่อนไข (เช่นหน้าแรกของ Django admin)
+    แทน COUNT(*) ทั้งตาราง - มีเงื่อนไข/ค้นหาแล้วจึงนับจริง (ชุดผลลัพธ์เล็กลงและใช้ index ได้)
+    เลขหน้าท้าย ๆ อาจคลาดเคลื่อนเล็กน้อยตามความสดของสถิติ (ANALYZE)
+    """
+
+    @cached_property
+    def count(self):
+        estimated = estimate_count(self.object_list) if hasattr(self.object_list, "query") else None
+        if estimated is not None:
+            return estimated
+        return super().count
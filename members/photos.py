@@ -0,0 +1,161 @@
+"""
+สร้างรูปย่อ (variant) ของ Member.photo สำหรับหน้าบัตร, avatar และงานพิมพ์
+
+รูปที่อัปโหลดจากมือถือมักใหญ่หลาย MB แต่แสดงในกรอบ 96x128 px - ทุก variant จึงถูก
+หมุนตาม EXIF, crop ให้พอดีกรอบ (เหมือน object-cover), ตัด metadata และบีบอัดเป็น WebP + JPEG
+ในขนาด 1x/2x เก็บชื่อไฟล์ไว้ใน Member.photo_variants ให้ template tag member_photo สร้าง srcset
+
+render_variants() ไม่แตะฐานข้อมูล/storage - ใช้ได้ใน worker process ของ build_photo_variants
+"""
+
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# ชื่อ variant: (กว้าง, สูง) ที่ 1x และความหนาแน่นที่สร้าง
+PHOTO_VARIANTS = {
+    # กรอบรูปในบัตร w-24 h-32 (96x128)
+    "card": ((96, 128), (1, 2)),
+    # รูปโปรไฟล์ใน dashboard / รายละเอียดสมาชิก (สูงสุด w-32 h-32)
+    "avatar": ((128, 128), (1, 2)),
+    # บัตรพิมพ์ 19x26 mm ที่ 300 DPI
+    "print": ((224, 307), (1,)),
+}
+
+# (นามสกุลไฟล์, format ของ Pillow, mime type, options ตอน save)
+PHOTO_FORMATS = (
+    ("webp", "WEBP", "image/webp", {"quality": 80, "method": 6}),
+    ("jpg", "JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+PRINT_DPI = 300
+
+VARIANT_DIR = "member_photos/variants"
+
+
+def render_variants(data):
+    """
+    สร้างทุก variant จาก bytes ของรูปต้นฉบับ
+    คืน dict {(variant, density, ext): bytes}
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        rendered = {}
+        for variant, ((width, height), densities) in PHOTO_VARIANTS.items():
+            for density in densities:
+                resized = ImageOps.fit(image, (width * density, height * density), Image.LANCZOS)
+                for ext, pil_format, _, options in PHOTO_FORMATS:
+                    buffer = io.BytesIO()
+                    if variant == "print":
+                        options = {**options, "dpi": (PRINT_DPI, PRINT_DPI)}
+                    resized.save(buffer, format=pil_format, **options)
+                    rendered[(variant, density, ext)] = buffer.getvalue()
+        return rendered
+
+
+def _variant_name(member, source_name, variant, density, ext):
+    # hash ของชื่อต้นฉบับอยู่ในชื่อไฟล์ - เปลี่ยนรูปแล้ว URL เปลี่ยน (browser ไม่ใช้ไฟล์เก่าจาก cache)
+    digest = hashlib.sha256(source_name.encode("utf-8")).hexdigest()[:10]
+    return f"{VARIANT_DIR}/{member.public_id}/{variant}@{density}x-{digest}.{ext}"
+
+
+def store_variants(member, source_name, rendered, storage=None):
+    """บันทึกไฟล์ที่ render แล้วลง storage คืน manifest สำหรับเก็บใน photo_variants"""
+    storage = storage or default_storage
+    files = {}
+    for (variant, density, ext), content in rendered.items():
+        name = _variant_name(member, source_name, variant, density, ext)
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, ContentFile(content))
+        files.setdefault(variant, {}).setdefault(ext, {})[str(density)] = name
+    return {"source": source_name, "files": files}
+
+
+def variant_names(manifest):
+    """ชื่อไฟล์ทั้งหมดใน manifest"""
+    return {
+        name
+        for formats in (manifest or {}).get("files", {}).values()
+        for densities in formats.values()
+        for name in densities.values()
+    }
+
+
+def delete_variants(names, storage=None):
+    """ลบไฟล์ variant (ไฟล์ที่ลบไม่ได้ข้ามไปพร้อม log)"""
+    storage = storage or default_storage
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("could not delete photo variant %s", name)
+
+
+def needs_variants(member):
+    """รูปปัจจุบันยังไม่มี variant (หรือ variant เป็นของรูปเก่า)"""
+    if not member.photo:
+        return bool(member.photo_variants)
+    return (member.photo_variants or {}).get("source") != member.photo.name
+
+
+def save_variants(member, manifest):
+    """
+    เก็บ manifest ใหม่ลง Member แล้วลบไฟล์ของ manifest เดิมที่ไม่ได้ใช้แล้ว
+    บันทึกผ่าน save() เพื่อให้ change_seq/ETag ของหน้าบัตรเปลี่ยนตาม
+    """
+    stale = variant_names(member.photo_variants) - variant_names(manifest)
+    member.photo_variants = manifest
+    member.save(update_fields=["photo_variants"])
+    delete_variants(stale)
+
+
+def build_photo_variants(member):
+    """อ่านรูปต้นฉบับจาก storage, สร้าง variant และบันทึก (ไม่มีรูป = ลบ variant เดิม)"""
+    if not member.photo:
+        save_variants(member, {})
+        return {}
+
+    source_name = member.photo.name
+    with member.photo.open("rb") as f:
+        data = f.read()
+    manifest = store_variants(member, source_name, render_variants(data))
+    save_variants(member, manifest)
+    return manifest
+
+
+def photo_sources(member, variant):
+    """
+    ข้อมูลสำหรับ <picture> ของ variant ที่ขอ
+    คืน {"src", "srcset", "webp_srcset"} หรือ None ถ้ายังไม่มี variant ของรูปปัจจุบัน
+    """
+    if not member.photo or needs_variants(member):
+        return None
+    formats = member.photo_variants["files"].get(variant)
+    if not formats:
+        return None
+
+    def srcset(densities):
+        return ", ".join(
+            f"{default_storage.url(name)} {density}x"
+            for density, name in sorted(densities.items(), key=lambda item: int(item[0]))
+        )
+
+    jpeg, webp = formats.get("jpg", {}), formats.get("webp", {})
+    if "1" not in jpeg:
+        return None
+    return {
+        "src": default_storage.url(jpeg["1"]),
+        "srcset": srcset(jpeg),
+        "webp_srcset": srcset(webp) if webp else "",
+    }
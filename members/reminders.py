@@ -0,0 +1,183 @@
+"""
+อีเมลเตือนสมาชิกที่บัตรใกล้หมดอายุ (เรียกจาก command send_expiry_reminders ผ่าน cron วันละครั้ง)
+
+- ไล่สมาชิกเป็นชุดด้วย keyset บน id (ไม่โหลดทั้งหมดเข้าหน่วยความจำ)
+- แต่ละชุด: claim ด้วยแถว ExpiryReminder ก่อน -> ส่งผ่าน SMTP connection เดียว -> ใส่ sent_at
+- สมาชิกที่มีแถว ExpiryReminder ของ expire_date ปัจจุบันแล้วจะไม่ถูกเลือกอีก
+  ทั้งการรันวันถัดไปและการรันต่อหลัง crash จึงไม่ส่งซ้ำ (ต่ออายุแล้ว expire_date เปลี่ยน = เตือนรอบใหม่ได้)
+- crash ระหว่างส่ง: แถวของชุดนั้นค้างโดยไม่มี sent_at (ไม่แน่ใจว่าส่งถึงหรือไม่) และถูกข้ามไว้ก่อน
+  ส่งใหม่ได้ด้วย release_unconfirmed() / --retry-unconfirmed (อาจได้อีเมลซ้ำ)
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+
+from .models import ExpiryReminder, Member
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+# column ที่ใช้สร้างอีเมล
+REMINDER_FIELDS = ("id", "member_id", "public_id", "first_name", "last_name", "email", "expire_date")
+
+
+def due_members(days, today=None):
+    """สมาชิกที่บัตรจะหมดอายุภายใน days วัน มีอีเมล และยังไม่เคยได้รับเตือนสำหรับ expire_date นี้"""
+    reminded = ExpiryReminder.objects.filter(
+        member=OuterRef("pk"),
+        expire_date=OuterRef("expire_date"),
+    )
+    return (
+        Member.objects
+        .expiring_within(days, today)
+        .exclude(email__isnull=True)
+        .exclude(email="")
+        .filter(~Exists(reminded))
+        .only(*REMINDER_FIELDS)
+    )
+
+
+def _batches(queryset, batch_size):
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def _claim(members):
+    """สร้างแถว ExpiryReminder ของชุดนี้ คืน {member.pk: reminder} เฉพาะที่ process นี้ claim ได้"""
+    try:
+        with transaction.atomic():
+            ExpiryReminder.objects.bulk_create([
+                ExpiryReminder(member=member, expire_date=member.expire_date, email=member.email)
+                for member in members
+            ])
+    except IntegrityError:
+        # process อื่น claim บางคนไปแล้ว - claim ทีละคนเฉพาะที่ยังว่าง
+        claimed = {}
+        for member in members:
+            reminder, created = ExpiryReminder.objects.get_or_create(
+                member=member,
+                expire_date=member.expire_date,
+                defaults={"email": member.email},
+            )
+            if created:
+                claimed[member.pk] = reminder
+        return claimed
+
+    # insert ทั้งชุดสำเร็จ = ทุกแถวเป็นของเรา (อ่านกลับเพื่อให้ได้ pk บนทุกฐานข้อมูล)
+    reminders = ExpiryReminder.objects.filter(
+        member__in=[member.pk for member in members],
+        sent_at__isnull=True,
+    )
+    expire_dates = {member.pk: member.expire_date for member in members}
+    return {
+        reminder.member_id: reminder
+        for reminder in reminders
+        if reminder.expire_date == expire_dates[reminder.member_id]
+    }
+
+
+def build_message(member, connection=None):
+    context = {"member": member, "card_url": member.get_card_view_only_url()}
+    with translation.override(settings.LANGUAGE_CODE):
+        subject = render_to_string("members/email/expiry_reminder_subject.txt", context)
+        body = render_to_string("members/email/expiry_reminder.txt", context)
+    return EmailMessage(
+        subject=" ".join(subject.split()),
+        body=body,
+        to=[member.email],
+        connection=connection,
+    )
+
+
+class _Throttle:
+    """เว้นระยะให้ส่งไม่เกิน rate ฉบับ/วินาที (rate <= 0 = ไม่จำกัด)"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate and rate > 0 else 0
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next, time.monotonic()) + self.interval
+
+
+def _send_batch(members, claimed, throttle):
+    """ส่งอีเมลของชุดผ่าน connection เดียว คืน (pk ของ reminder ที่ส่งสำเร็จ, ที่ส่งไม่สำเร็จ)"""
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        for member in members:
+            reminder = claimed.get(member.pk)
+            if reminder is None:
+                continue
+            throttle.wait()
+            # ส่งทีละฉบับบน connection เดิม - รู้ว่าฉบับไหนสำเร็จแม้ SMTP ปฏิเสธกลางชุด
+            try:
+                connection.send_messages([build_message(member, connection)])
+            except Exception:
+                logger.exception("expiry reminder to member %s failed", member.member_id)
+                failed.append(reminder.pk)
+            else:
+                sent.append(reminder.pk)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def send_expiry_reminders(days=None, batch_size=DEFAULT_BATCH_SIZE, rate=None, today=None, dry_run=False):
+    """
+    ส่งอีเมลเตือนทุกคนที่ถึงกำหนด คืน {"due", "sent", "failed", "batches"}
+    dry_run = นับอย่างเดียว ไม่ claim และไม่ส่ง
+    """
+    days = settings.EXPIRY_REMINDER_DAYS if days is None else days
+    rate = settings.EXPIRY_REMINDER_RATE if rate is None else rate
+    queryset = due_members(days, today)
+
+    result = {"due": 0, "sent": 0, "failed": 0, "batches": 0}
+    if dry_run:
+        result["due"] = queryset.count()
+        return result
+
+    throttle = _Throttle(rate)
+    for members in _batches(queryset, batch_size):
+        result["due"] += len(members)
+        result["batches"] += 1
+
+        claimed = _claim(members)
+        sent, failed = _send_batch(members, claimed, throttle)
+
+        # checkpoint ของชุด: ยืนยันที่ส่งแล้ว, คืน claim ของที่ล้มเหลวให้รอบหน้าส่งใหม่
+        ExpiryReminder.objects.filter(pk__in=sent).update(sent_at=timezone.now())
+        ExpiryReminder.objects.filter(pk__in=failed).delete()
+        result["sent"] += len(sent)
+        result["failed"] += len(failed)
+    return result
+
+
+def unconfirmed_reminders():
+    """claim ที่ไม่มี sent_at (process ตายระหว่างส่งชุดนั้น)"""
+    return ExpiryReminder.objects.filter(sent_at__isnull=True)
+
+
+def release_unconfirmed():
+    """ลบ claim ที่ไม่ได้ยืนยัน ให้รอบถัดไปส่งใหม่ คืนจำนวนที่ลบ"""
+    deleted, _ = unconfirmed_reminders().delete()
+    return deleted
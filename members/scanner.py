@@ -0,0 +1,235 @@
+"""
+Snapshot ของบัตรที่ใช้ได้ สำหรับเครื่องสแกนที่ต้องตัดสินเองแบบ offline
+
+Snapshot = เซตของ fingerprint 32 bit ของสมาชิกที่ is_valid() ณ วันที่สร้าง
+เรียงแล้วเก็บเฉพาะระยะห่างแบบ Golomb-Rice (~17 bit ต่อคน - 100k คน ≈ 210 KB)
+
+fingerprint = 4 byte แรกของ HMAC-SHA256(SCANNER_FINGERPRINT_KEY, public_id.bytes)
+snapshot ที่หลุดออกไป (ไม่มี key) จึงใช้สร้าง UUID ที่ผ่านการตรวจไม่ได้ - และเครื่องสแกนต้องตรวจ
+ลายเซ็นของ token ใน QR (members/tokens.py) คู่กันเสมอ: fingerprint บอกว่าบัตรยังใช้ได้, ลายเซ็นบอกว่าบัตรจริง
+
+รูปแบบไฟล์ (big-endian):
+    magic "GCVS" | format u8 | rice_k u8 | count u32 | change_seq u64 | valid_on u32 (วันนับจาก 1970-01-01)
+    ตามด้วยบิตของแต่ละระยะห่าง: quotient เป็นเลข 1 ต่อกัน ปิดด้วย 0 แล้วตามด้วย rice_k บิตล่าง
+
+version = "<change_seq>.<YYYYMMDD>.<key id>" - เครื่องสแกนส่ง version ที่ถืออยู่เพื่อขอ delta
+(key id = 8 hex แรกของ sha256 ของ fingerprint key - หมุน key แล้ว delta ตอบ 410 ให้โหลด snapshot ใหม่)
+(add = สมัครใหม่/ต่ออายุ/เปิดใช้, revoked = ระงับ/ลบ, expired = หมดอายุ)
+เครื่องสแกนลบ revoked + expired ออกก่อน แล้วจึงเพิ่ม add
+"""
+
+import hashlib
+import hmac
+import struct
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from .models import IdSequence, Member, MemberTombstone
+
+SNAPSHOT_MAGIC = b"GCVS"
+SNAPSHOT_FORMAT = 2
+_HEADER = struct.Struct(">4sBBIQI")
+
+SNAPSHOT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# delta ที่เก่ากว่านี้ให้โหลด snapshot ใหม่แทน
+MAX_DELTA_DAYS = 30
+
+_EPOCH = date(1970, 1, 1)
+
+
+class SnapshotVersionError(ValueError):
+    """version ที่ส่งมาผิดรูปแบบหรือเก่าเกินกว่าจะส่ง delta"""
+
+
+class InvalidVersionError(SnapshotVersionError):
+    """version ไม่ได้ส่งมาหรือผิดรูปแบบ (ไม่ใช่ version ที่ server นี้ออกให้) - แยกจากกรณีเก่าเกินไป"""
+
+
+def fingerprint_key():
+    """SCANNER_FINGERPRINT_KEY เป็น bytes - ไม่ได้ตั้ง = ImproperlyConfigured (ไม่มี key สำรอง)"""
+    if not settings.SCANNER_FINGERPRINT_KEY:
+        raise ImproperlyConfigured("SCANNER_FINGERPRINT_KEY is not set")
+    return settings.SCANNER_FINGERPRINT_KEY.encode("utf-8")
+
+
+def key_id(key=None):
+    return hashlib.sha256(key or fingerprint_key()).hexdigest()[:8]
+
+
+def fingerprint(public_id, key=None):
+    """4 byte แรกของ HMAC-SHA256(key, public_id.bytes) เป็น uint32"""
+    digest = hmac.new(key or fingerprint_key(), public_id.bytes, hashlib.sha256).digest()
+    return int.from_bytes(digest[:4], "big")
+
+
+def format_version(change_seq, valid_on, kid=None):
+    return f"{change_seq}.{valid_on:%Y%m%d}.{kid or key_id()}"
+
+
+def parse_version(version):
+    """
+    (change_seq, วันที่) ของ version
+    ว่าง/ผิดรูปแบบ = InvalidVersionError, key id ไม่ตรงกับ key ปัจจุบัน = SnapshotVersionError
+    """
+    if not version:
+        raise InvalidVersionError("since is required")
+    try:
+        seq, day, kid = version.split(".")
+        parsed = int(seq), date(int(day[:4]), int(day[4:6]), int(day[6:8]))
+    except (AttributeError, ValueError):
+        raise InvalidVersionError(f"Invalid version: {version}")
+    if kid != key_id():
+        raise SnapshotVersionError("Fingerprint key changed - fetch a new snapshot")
+    return parsed
+
+
+def _current_version():
+    # อ่าน sequence ก่อนอ่านข้อมูล - แถวที่เปลี่ยนระหว่างนั้นจะถูกส่งซ้ำใน delta ถัดไป (ใช้ซ้ำได้ไม่เสียหาย)
+    return IdSequence.current(Member.CHANGE_SEQUENCE), timezone.now().date()
+
+
+def current_version():
+    """version ของ snapshot ถ้าสร้างตอนนี้ (คิวรีเดียว - ใช้ตอบ 304 โดยไม่ต้องโหลด snapshot)"""
+    return format_version(*_current_version())
+
+
+# =========================
+# GOLOMB-RICE CODING
+# =========================
+
+def _rice_parameter(count):
+    if not count:
+        return 0
+    mean_gap = (1 << 32) / count
+    return max(0, int(mean_gap * 0.69).bit_length() - 1)
+
+
+def encode_fingerprints(values, k):
+    """เข้ารหัส fingerprint ที่เรียงแล้ว (ไม่ซ้ำ) เป็น bytes"""
+    mask = (1 << k) - 1
+    parts = []
+    previous = 0
+    for value in values:
+        gap = value - previous
+        previous = value
+        parts.append("1" * (gap >> k) + "0" + (format(gap & mask, f"0{k}b") if k else ""))
+    bits = "".join(parts)
+    if not bits:
+        return b""
+    bits += "0" * (-len(bits) % 8)
+    return int(bits, 2).to_bytes(len(bits) // 8, "big")
+
+
+def decode_fingerprints(data, k, count):
+    """ถอดรหัสกลับเป็น list ของ fingerprint (reference implementation สำหรับเครื่องสแกน)"""
+    bits = format(int.from_bytes(data, "big"), f"0{len(data) * 8}b") if data else ""
+    values = []
+    position = previous = 0
+    for _ in range(count):
+        quotient = 0
+        while bits[position] == "1":
+            quotient += 1
+            position += 1
+        position += 1
+        remainder = int(bits[position:position + k], 2) if k else 0
+        position += k
+        previous += (quotient << k) | remainder
+        values.append(previous)
+    return values
+
+
+# =========================
+# SNAPSHOT / DELTA
+# =========================
+
+def build_snapshot():
+    """คืน (version, bytes) ของ snapshot ปัจจุบัน"""
+    change_seq, today = _current_version()
+    public_ids = (
+        Member.objects
+        .valid(today)
+        .values_list("public_id", flat=True)
+        .iterator(chunk_size=5000)
+    )
+    key = fingerprint_key()
+    values = sorted({fingerprint(public_id, key) for public_id in public_ids})
+    k = _rice_parameter(len(values))
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, k, len(values), change_seq, (today - _EPOCH).days,
+    )
+    return format_version(change_seq, today, key_id(key)), header + encode_fingerprints(values, k)
+
+
+def get_snapshot(version=None):
+    """snapshot จาก cache (key ผูกกับ version - ข้อมูลหรือวันเปลี่ยนก็สร้างใหม่เอง)"""
+    key = f"scanner_snapshot:{version or current_version()}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot()
+        cache.set(key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
+
+
+def read_snapshot(data):
+    """แยก header + fingerprint จาก bytes ของ snapshot (ใช้ตรวจไฟล์/ทดสอบ)"""
+    magic, fmt, k, count, change_seq, days = _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or fmt != SNAPSHOT_FORMAT:
+        raise ValueError("Not a validity snapshot")
+    valid_on = _EPOCH + timedelta(days=days)
+    return {
+        "version": format_version(change_seq, valid_on),
+        "fingerprints": decode_fingerprints(data[_HEADER.size:], k, count),
+    }
+
+
+def build_delta(since):
+    """การเปลี่ยนแปลงของเซตบัตรที่ใช้ได้ตั้งแต่ version since"""
+    since_seq, since_day = parse_version(since)
+    change_seq, today = _current_version()
+    if since_seq > change_seq or since_day > today:
+        raise SnapshotVersionError(f"Version from the future: {since}")
+    if (today - since_day).days > MAX_DELTA_DAYS:
+        raise SnapshotVersionError(f"Version older than {MAX_DELTA_DAYS} days - fetch a new snapshot")
+
+    key = fingerprint_key()
+    add, revoked, expired = set(), set(), set()
+
+    changed = (
+        Member.objects
+        .filter(change_seq__gt=since_seq, change_seq__lte=change_seq)
+        .values_list("public_id", "is_active", "expire_date")
+    )
+    for public_id, is_active, expire_date in changed:
+        if Member.check_valid(is_active, expire_date, today):
+            add.add(fingerprint(public_id, key))
+        elif not is_active:
+            revoked.add(fingerprint(public_id, key))
+        else:
+            expired.add(fingerprint(public_id, key))
+
+    deleted = MemberTombstone.objects.filter(
+        change_seq__gt=since_seq, change_seq__lte=change_seq,
+    ).values_list("public_id", flat=True)
+    revoked.update(fingerprint(public_id, key) for public_id in deleted)
+
+    # หมดอายุเพราะวันผ่านไป (แถวไม่ได้ถูกแก้จึงไม่อยู่ใน changed)
+    lapsed = Member.objects.filter(
+        change_seq__lte=since_seq,
+        is_active=True,
+        expire_date__gte=since_day,
+        expire_date__lt=today,
+    ).values_list("public_id", flat=True)
+    expired.update(fingerprint(public_id, key) for public_id in lapsed)
+
+    return {
+        "since": since,
+        "version": format_version(change_seq, today, key_id(key)),
+        "add": sorted(add),
+        "revoked": sorted(revoked),
+        "expired": sorted(expired),
+    }
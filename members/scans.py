@@ -0,0 +1,186 @@
+"""
+บันทึกการสแกนบัตร (CardScan) แบบ buffer ในหน่วยความจำ
+
+record_scan() แค่ใส่ event ลงคิว (ไม่แตะฐานข้อมูล) แล้ว thread เบื้องหลังเขียนเป็นชุดด้วย
+bulk_create เมื่อครบ CARD_SCAN_BATCH_SIZE หรือครบ CARD_SCAN_FLUSH_INTERVAL วินาที
+- คิวเต็ม: ผู้เรียกรอให้ thread ระบายได้ไม่เกิน CARD_SCAN_PUT_TIMEOUT วินาที แล้วจึงทิ้ง event (backpressure)
+- process จบ (atexit): เขียน event ที่ค้างในคิวทั้งหมดก่อนออก
+- CARD_SCAN_WRITER_THREAD=False (serverless เช่น Vercel - process ถูกแช่/ทิ้งหลังตอบ ไม่มี thread และ atexit
+  ที่เชื่อได้): ไม่มี thread เบื้องหลัง เขียนคิวทั้งหมดตอน request_finished ของ request ที่บันทึก
+- CARD_SCAN_BUFFERED=False: เขียนทันทีทีละแถว (ใช้ตอนทดสอบ/debug)
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import CardScan
+
+logger = logging.getLogger(__name__)
+
+
+class ScanBuffer:
+
+    def __init__(self, batch_size, flush_interval, max_size, put_timeout, writer_thread=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.put_timeout = put_timeout
+        self.writer_thread = writer_thread
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, scan):
+        """ใส่ CardScan (ยังไม่ save) ลงคิว"""
+        if not self.writer_thread:
+            # ไม่มีใครระบายคิวระหว่างรอ - เต็มก็เขียนเองทันที
+            if self._queue.full():
+                self.flush()
+            self._queue.put_nowait(scan)
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(scan)
+            return
+        except queue.Full:
+            pass
+        try:
+            self._queue.put(scan, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            logger.warning("card_scan buffer full - dropped public_id=%s (total dropped %d)",
+                           scan.public_id, dropped)
+
+    def flush(self):
+        """เขียนทุก event ที่ค้างในคิวทันที คืนจำนวนที่เขียน"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+        return len(batch)
+
+    def shutdown(self):
+        """หยุด thread แล้วเขียนที่เหลือ (เรียกจาก atexit)"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # -----------------------
+    # background thread
+    # -----------------------
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # หลัง fork (เช่น gunicorn --preload) คิวและ thread ของ process แม่ใช้ไม่ได้
+                self._queue = queue.Queue(maxsize=self.max_size)
+                self._stop = threading.Event()
+                self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="card-scan-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                batch = self._collect()
+                if batch:
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _collect(self):
+        """รอ event จนครบ batch_size หรือครบ flush_interval นับจาก event แรก"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            CardScan.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            logger.exception("card_scan flush failed - %d events lost", len(batch))
+
+
+_buffer = ScanBuffer(
+    batch_size=settings.CARD_SCAN_BATCH_SIZE,
+    flush_interval=settings.CARD_SCAN_FLUSH_INTERVAL,
+    max_size=settings.CARD_SCAN_BUFFER_MAX,
+    put_timeout=settings.CARD_SCAN_PUT_TIMEOUT,
+    writer_thread=settings.CARD_SCAN_WRITER_THREAD,
+)
+atexit.register(_buffer.shutdown)
+
+
+def _flush_after_request(**kwargs):
+    if _buffer.pending():
+        _buffer.flush()
+
+
+if not settings.CARD_SCAN_WRITER_THREAD:
+    request_finished.connect(_flush_after_request, dispatch_uid="members.scans.flush_after_request")
+
+
+def record_scan(request, member):
+    """บันทึกการสแกนหน้าบัตรของ member (ไม่บล็อก request ถ้าเปิด buffer)"""
+    scan = CardScan(
+        member_id=member.pk,
+        public_id=member.public_id,
+        scanned_at=timezone.now(),
+        was_valid=member.is_valid(),
+        remote_addr=request.META.get("REMOTE_ADDR") or None,
+        user_agent=request.META.get("HTTP_USER_AGENT", "")[:255],
+    )
+    if settings.CARD_SCAN_BUFFERED:
+        _buffer.record(scan)
+    else:
+        scan.save()
+
+
+def flush_scans():
+    """เขียน event ที่ค้างใน buffer ของ process นี้ทันที"""
+    return _buffer.flush()
+
+
+def shutdown_scans():
+    """หยุด thread เขียนแล้วเขียน event ที่ค้างทั้งหมด (เช่นก่อนลบฐานข้อมูลทดสอบของ benchmark)"""
+    _buffer.shutdown()
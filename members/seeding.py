@@ -0,0 +1,177 @@
+"""
+สร้างสมาชิกสังเคราะห์จำนวนมาก (command seed_members และ benchmark)
+
+ข้อมูลใกล้เคียงของจริง: ชื่อไทย + ชื่ออังกฤษที่สะกดตรงกัน, ชื่อเล่น, เบอร์มือถือไม่ซ้ำ,
+หมู่เลือดตามสัดส่วนประชากรไทย, role และวันที่แบ่งเป็นกลุ่ม (ใช้ได้ / ใกล้หมดอายุ / หมดอายุ)
+
+ใส่ทีละชุดด้วย bulk_create - member_id และ change_seq จองเป็นบล็อกเหมือน commit_import
+รหัสผ่านของ User = เบอร์โทร (เหมือนสมาชิกจริง) แต่ hash ด้วย PBKDF2 รอบเดียว - ล็อกอินได้ด้วย
+hasher ปกติ (จำนวนรอบอยู่ใน hash) และถูก hash ใหม่ตามค่าปัจจุบันเมื่อล็อกอินครั้งแรก
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import Member
+from .stats import invalidate_dashboard_stats
+from .utils import default_member_password
+
+DEFAULT_BATCH_SIZE = 5000
+
+# (ชื่อไทย, ชื่ออังกฤษ)
+FIRST_NAMES = (
+    ("สมชาย", "Somchai"), ("สมศักดิ์", "Somsak"), ("วิชัย", "Wichai"), ("ประเสริฐ", "Prasert"),
+    ("อนุชา", "Anucha"), ("ธนากร", "Thanakorn"), ("กิตติพงษ์", "Kittipong"), ("ณัฐพล", "Nattapon"),
+    ("สุรชัย", "Surachai"), ("วีระพงษ์", "Weerapong"), ("ชัยวัฒน์", "Chaiwat"), ("ปิยะ", "Piya"),
+    ("สมหญิง", "Somying"), ("สุดา", "Suda"), ("มาลี", "Malee"), ("กานดา", "Kanda"),
+    ("พรทิพย์", "Pornthip"), ("วิไลวรรณ", "Wilaiwan"), ("นภัสสร", "Napatsorn"), ("ศิริพร", "Siriporn"),
+    ("อรุณี", "Arunee"), ("จิราพร", "Jiraporn"), ("ปวีณา", "Paweena"), ("รัตนา", "Rattana"),
+)
+LAST_NAMES = (
+    ("ใจดี", "Jaidee"), ("รักชาติ", "Rakchat"), ("ทองคำ", "Thongkham"), ("ศรีสุข", "Srisuk"),
+    ("มั่นคง", "Mankong"), ("แก้วมณี", "Kaewmanee"), ("บุญมา", "Boonma"), ("สายทอง", "Saithong"),
+    ("วงศ์สวัสดิ์", "Wongsawat"), ("ศรีวงศ์", "Sriwong"), ("พรหมมา", "Phromma"), ("สุวรรณรัตน์", "Suwannarat"),
+    ("เจริญผล", "Charoenphon"), ("ทองดี", "Thongdee"), ("จันทร์เพ็ญ", "Chanpen"), ("ปัญญาดี", "Panyadee"),
+    ("อินทร์แก้ว", "Inkaew"), ("ชัยมงคล", "Chaimongkol"), ("สมบูรณ์", "Somboon"), ("นาคสวัสดิ์", "Naksawat"),
+)
+NICKNAMES = ("เอ", "บี", "ต้น", "แบงค์", "นิว", "ตูน", "ปอ", "มิ้นท์", "ฝน", "แป้ง", "โอ๊ต", "บอล", "เก่ง", "จูน", "แนน", "ปุ้ย")
+ADDRESSES = ("กรุงเทพมหานคร", "นนทบุรี", "ปทุมธานี", "สมุทรปราการ", "ชลบุรี", "เชียงใหม่", "ขอนแก่น", "นครราชสีมา")
+
+# สัดส่วนหมู่เลือดของคนไทยโดยประมาณ
+BLOOD_GROUPS = (("O", 38), ("B", 34), ("A", 22), ("AB", 6))
+ROLES = (("MEMBER", 970), ("STAFF", 22), ("COMMITTEE", 8))
+
+# กลุ่มของ expire_date: (ชื่อ, สัดส่วน, ช่วงวันนับจากวันนี้)
+EXPIRY_COHORTS = (
+    ("expired", 18, (-730, -1)),
+    ("expiring", 10, (0, 30)),
+    ("valid", 72, (31, 730)),
+)
+INACTIVE_RATE = 0.03
+
+# ประวัติสมัครย้อนหลังสูงสุด (ปี) - คนสมัครใหม่มีมากกว่าคนเก่า
+MAX_MEMBERSHIP_YEARS = 10
+
+MOBILE_PREFIXES = ("06", "08", "09")
+PHONE_STEP = 48271
+
+
+class _Choices:
+    """เลือกค่าตามน้ำหนักแบบเร็ว (ตารางสะสมทำครั้งเดียว)"""
+
+    def __init__(self, weighted):
+        self.values = [value for value, _ in weighted]
+        self.cum_weights = []
+        total = 0
+        for _, weight in weighted:
+            total += weight
+            self.cum_weights.append(total)
+
+    def pick(self, rng):
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+class RosterGenerator:
+    """สร้าง Member (ยังไม่ save) ทีละคน - seed เดียวกันได้ข้อมูลชุดเดียวกัน"""
+
+    def __init__(self, seed=None, today=None):
+        self.rng = random.Random(seed)
+        self.today = today or timezone.now().date()
+        self.blood_groups = _Choices(BLOOD_GROUPS)
+        self.roles = _Choices(ROLES)
+        self.cohorts = _Choices([((name, days), weight) for name, weight, days in EXPIRY_COHORTS])
+        self._phone_index = 0
+        self._phone_offset = self.rng.randrange(10 ** 8)
+
+    def phone(self):
+        """
+        เบอร์มือถือ 10 หลักที่ไม่ซ้ำกันในชุดที่สร้าง (ไม่ต้องเก็บเบอร์ที่ใช้แล้ว)
+        ลำดับที่ n -> (n * PHONE_STEP + offset) mod 10^8 เป็น bijection เพราะ PHONE_STEP ไม่มีตัวประกอบ 2, 5
+        """
+        number = (self._phone_index * PHONE_STEP + self._phone_offset) % 10 ** 8
+        self._phone_index += 1
+        return f"{self.rng.choice(MOBILE_PREFIXES)}{number:08d}"
+
+    def member(self):
+        rng = self.rng
+        first_name, first_name_en = rng.choice(FIRST_NAMES)
+        last_name, last_name_en = rng.choice(LAST_NAMES)
+
+        _, (low, high) = self.cohorts.pick(rng)
+        expire_date = self.today + timedelta(days=rng.randint(low, high))
+        # อายุสมาชิกเป็นรอบปีละครั้ง - ยิ่งเก่ายิ่งมีน้อย (triangular เอียงไปทางปีล่าสุด)
+        years = int(rng.triangular(1, MAX_MEMBERSHIP_YEARS, 1))
+        join_date = expire_date - timedelta(days=365 * years)
+        if join_date > self.today:
+            join_date = self.today
+
+        has_email = rng.random() < 0.6
+        has_emergency = rng.random() < 0.7
+        return Member(
+            first_name=first_name,
+            last_name=last_name,
+            first_name_en=first_name_en,
+            last_name_en=last_name_en,
+            nickname=rng.choice(NICKNAMES) if rng.random() < 0.8 else "",
+            phone=self.phone(),
+            email=f"{first_name_en.lower()}.{last_name_en[:3].lower()}{rng.randrange(10000)}@example.com" if has_email else None,
+            emergency_contact_name=f"{rng.choice(FIRST_NAMES)[0]} {last_name}" if has_emergency else "",
+            emergency_contact_phone=f"{rng.choice(MOBILE_PREFIXES)}{rng.randrange(10 ** 8):08d}" if has_emergency else "",
+            blood_group=self.blood_groups.pick(rng) if rng.random() < 0.9 else "",
+            address=rng.choice(ADDRESSES) if rng.random() < 0.5 else "",
+            role=self.roles.pick(rng),
+            join_date=join_date,
+            expire_date=expire_date,
+            is_active=rng.random() >= INACTIVE_RATE,
+        )
+
+
+def cheap_password_hash(password):
+    """PBKDF2 รอบเดียว - เร็วพอสำหรับหลักล้านคน และตรวจได้ด้วย hasher ปกติ (ใช้กับข้อมูลทดสอบเท่านั้น)"""
+    return PBKDF2PasswordHasher().encode(password, get_random_string(22), iterations=1)
+
+
+def seed_members(count, batch_size=DEFAULT_BATCH_SIZE, seed=None, progress=None):
+    """สร้าง User + Member count คน คืนจำนวนที่สร้าง (progress(done) ถูกเรียกหลังแต่ละชุด)"""
+    generator = RosterGenerator(seed)
+    created = 0
+
+    while created < count:
+        size = min(batch_size, count - created)
+        members = [generator.member() for _ in range(size)]
+
+        with transaction.atomic():
+            member_ids = Member.allocate_member_ids(size)
+            users = User.objects.bulk_create([
+                User(
+                    username=member_id,
+                    password=cheap_password_hash(default_member_password(member.phone)),
+                    email=member.email or "",
+                )
+                for member_id, member in zip(member_ids, members)
+            ])
+            if any(user.pk is None for user in users):
+                # backend ที่คืน pk จาก bulk insert ไม่ได้ - โหลดกลับด้วย username
+                by_username = User.objects.in_bulk(member_ids, field_name="username")
+                users = [by_username[member_id] for member_id in member_ids]
+
+            change_seqs = Member.next_change_seqs(size)
+            for member, member_id, user, change_seq in zip(members, member_ids, users, change_seqs):
+                member.member_id = member_id
+                member.user = user
+                member.change_seq = change_seq
+            Member.objects.bulk_create(members)
+
+        created += size
+        if progress:
+            progress(created)
+
+    # bulk_create ไม่ส่ง post_save - ล้าง snapshot ของ dashboard เอง
+    invalidate_dashboard_stats()
+    return created
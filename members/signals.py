@@ -0,0 +1,82 @@
+"""Signal handlers ของ members app (ลงทะเบียนใน MembersConfig.ready)"""
+
+import logging
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .http_cache import invalidate_card_fragments
+from .models import Member, MemberTombstone
+from .photos import build_photo_variants, delete_variants, needs_variants, variant_names
+from .search import install_search_index
+from .stats import invalidate_dashboard_stats
+from .utils import invalidate_qr_cache
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_delete, sender=Member)
+def invalidate_qr_on_delete(sender, instance, **kwargs):
+    invalidate_qr_cache(instance.get_qr_url())
+
+
+@receiver(post_delete, sender=Member)
+def record_tombstone(sender, instance, **kwargs):
+    """
+    เก็บร่องรอยการลบไว้ให้ delta export (รันใน transaction เดียวกับการลบ)
+    หนึ่ง tombstone ต่อ public_id - ถ้า post_delete ของ instance เดิมถูกส่งซ้ำจะไม่สร้างแถวที่สอง
+    """
+    if MemberTombstone.objects.filter(public_id=instance.public_id).exists():
+        return
+    MemberTombstone.objects.create(
+        member_pk=instance.pk,
+        member_id=instance.member_id,
+        public_id=instance.public_id,
+        change_seq=Member.next_change_seqs(1)[0],
+    )
+
+
+@receiver(post_save, sender=Member)
+def build_photo_variants_on_upload(sender, instance, **kwargs):
+    """รูปเปลี่ยน -> สร้าง variant หลัง commit (ถ้าล้มเหลว template ใช้รูปต้นฉบับแทน)"""
+    if not settings.PHOTO_VARIANTS_ON_UPLOAD or not needs_variants(instance):
+        return
+
+    def build():
+        member = Member.objects.filter(pk=instance.pk).first()
+        if member is None or not needs_variants(member):
+            return
+        try:
+            build_photo_variants(member)
+        except Exception:
+            logger.exception("photo variants failed for member %s", member.member_id)
+
+    transaction.on_commit(build)
+
+
+@receiver(post_delete, sender=Member)
+def delete_photo_variants(sender, instance, **kwargs):
+    names = variant_names(instance.photo_variants)
+    if names:
+        transaction.on_commit(lambda: delete_variants(names))
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_card_fragments_on_change(sender, instance, **kwargs):
+    invalidate_card_fragments(instance.pk)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_dashboard_on_change(sender, **kwargs):
+    invalidate_dashboard_stats()
+
+
+def ensure_search_index(sender, using="default", **kwargs):
+    """post_migrate: สร้าง trigger ของ search index กลับ ถ้า migration สร้างตารางใหม่"""
+    connection = connections[using]
+    if Member._meta.db_table in connection.introspection.table_names():
+        install_search_index(connection)
@@ -0,0 +1,155 @@
+"""สถิติสำหรับ staff dashboard - นับในคิวรีเดียวและเก็บเป็น snapshot ใน cache"""
+
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import IdSequence, Member, ScanHourlyRollup, ScanMemberDailyRollup
+from .rollups import SCAN_ROLLUP_WATERMARK
+
+# snapshot มีอายุสั้น ๆ เป็นตาข่ายกันพลาด กรณีหลาย process ใช้ cache แยกกัน
+DASHBOARD_SNAPSHOT_TIMEOUT = 300
+
+# field ที่ template ของ dashboard ใช้จริง
+_LIST_FIELDS = ("id", "member_id", "first_name", "last_name", "nickname", "join_date", "expire_date")
+
+
+def _snapshot_key(today):
+    # ผูกกับวันที่ - ข้ามวันแล้วได้ key ใหม่ (active/expired เปลี่ยนตามวัน)
+    return f"staff_dashboard:{today.isoformat()}"
+
+
+def build_dashboard_stats(today=None):
+    """คำนวณข้อมูล dashboard จากฐานข้อมูล (นับ 4 ค่าด้วย conditional aggregation คิวรีเดียว)"""
+    today = today or date.today()
+
+    counts = Member.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(expire_date__gte=today, is_active=True)),
+        expired=Count("id", filter=Q(expire_date__lt=today) | Q(expire_date__isnull=True)),
+        inactive=Count("id", filter=Q(is_active=False)),
+    )
+
+    members = Member.objects.only(*_LIST_FIELDS)
+
+    expiring_soon = list(members.expiring_within(30, today).order_by("expire_date")[:5])
+
+    expired_members = list(members.expired(today).order_by("-expire_date")[:5])
+
+    recent_members = list(members.order_by("-id")[:5])
+
+    return {
+        **counts,
+        "expiring_soon": expiring_soon,
+        "expired_members": expired_members,
+        "recent_members": recent_members,
+    }
+
+
+def get_dashboard_stats(today=None):
+    """คืน snapshot ของ dashboard จาก cache หรือคำนวณใหม่ถ้ายังไม่มี"""
+    today = today or date.today()
+    key = _snapshot_key(today)
+
+    stats = cache.get(key)
+    if stats is None:
+        stats = build_dashboard_stats(today)
+        cache.set(key, stats, DASHBOARD_SNAPSHOT_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """ลบ snapshot ของวันนี้ (เรียกเมื่อมีการบันทึก/ลบ Member)"""
+    cache.delete(_snapshot_key(date.today()))
+
+
+# =========================
+# SCAN ANALYTICS (อ่านจากตาราง rollup เท่านั้น - ดู members/rollups.py)
+# =========================
+
+SCAN_STATS_DAYS = 30
+SCAN_TOP_MEMBERS = 10
+
+
+def _with_percent(rows):
+    """เพิ่ม pct (0-100 เทียบกับค่าสูงสุด) ให้ template วาดแท่งกราฟ"""
+    peak = max((row["total"] for row in rows), default=0)
+    for row in rows:
+        row["pct"] = round(row["total"] * 100 / peak) if peak else 0
+    return rows
+
+
+def build_scan_stats(now=None):
+    """
+    สแกนต่อชั่วโมง (24 ชม.), ต่อวัน และช่วงเวลาที่คนสแกนมากที่สุด (30 วัน), สมาชิกที่สแกนบ่อย
+    จำนวนแถวที่อ่าน = จำนวน bucket (ไม่เกิน 24 x 30 ชั่วโมง) ไม่ขึ้นกับจำนวนสแกนทั้งหมด
+    """
+    now = timezone.localtime(now or timezone.now())
+    this_hour = now.replace(minute=0, second=0, microsecond=0)
+    today = now.date()
+    first_day = today - timedelta(days=SCAN_STATS_DAYS - 1)
+
+    buckets = list(
+        ScanHourlyRollup.objects
+        .filter(bucket__gte=this_hour - timedelta(days=SCAN_STATS_DAYS))
+        .values_list("bucket", "total", "valid")
+    )
+
+    by_hour = {}
+    by_day = {}
+    by_hour_of_day = [0] * 24
+    for bucket, total, valid in buckets:
+        bucket = timezone.localtime(bucket)
+        by_hour[bucket] = by_hour.get(bucket, 0) + total
+        if bucket.date() >= first_day:
+            by_day[bucket.date()] = by_day.get(bucket.date(), 0) + total
+            by_hour_of_day[bucket.hour] += total
+
+    hourly = [
+        {"label": f"{hour:%H}:00", "total": by_hour.get(hour, 0)}
+        for hour in (this_hour - timedelta(hours=n) for n in range(23, -1, -1))
+    ]
+    daily = [
+        {"label": f"{day:%d/%m}", "total": by_day.get(day, 0)}
+        for day in (first_day + timedelta(days=n) for n in range(SCAN_STATS_DAYS))
+    ]
+    peak_hours = [
+        {"label": f"{hour:02d}", "total": total}
+        for hour, total in enumerate(by_hour_of_day)
+    ]
+
+    top_members = list(
+        ScanMemberDailyRollup.objects
+        .filter(day__gte=first_day)
+        .values("member__member_id", "member__first_name", "member__last_name")
+        .annotate(total=Sum("total"))
+        .order_by("-total")[:SCAN_TOP_MEMBERS]
+    )
+
+    return {
+        "scans_today": by_day.get(today, 0),
+        "scans_30_days": sum(by_day.values()),
+        "scans_hourly": _with_percent(hourly),
+        "scans_daily": _with_percent(daily),
+        "scans_peak_hours": _with_percent(peak_hours),
+        "scans_top_members": top_members,
+    }
+
+
+def _scan_stats_key(watermark, now):
+    # ผูกกับ watermark ของ rollup และชั่วโมงปัจจุบัน - rollup_scans (คนละ process) สรุปข้อมูลใหม่
+    # หรือกราฟ 24 ชม. เลื่อนไปแล้วได้ key ใหม่เอง ไม่ต้องล้าง cache ข้าม process
+    return f"staff_dashboard:scans:{watermark}:{now:%Y%m%d%H}"
+
+
+def get_scan_stats():
+    """สถิติการสแกนจาก cache (อ่าน watermark หนึ่งคิวรีเพื่อเลือก key)"""
+    now = timezone.localtime()
+    key = _scan_stats_key(IdSequence.current(SCAN_ROLLUP_WATERMARK), now)
+    stats = cache.get(key)
+    if stats is None:
+        stats = build_scan_stats(now)
+        cache.set(key, stats, DASHBOARD_SNAPSHOT_TIMEOUT)
+    return stats
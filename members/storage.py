@@ -0,0 +1,47 @@
+"""Storage ของ static files (STORAGES["staticfiles"])"""
+
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# ไฟล์ที่ python manage.py build_assets สร้าง - ต้องอยู่ใน manifest ก่อน deploy
+BUILT_ASSETS = ("css/app.css", "css/fonts.css")
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    ชื่อไฟล์มี hash + .br/.gz บีบอัดไว้ตอน collectstatic (WhiteNoise ส่งแบบ immutable)
+
+    STATIC_MANIFEST_STRICT=False (DEBUG หรือรัน test): {% static %} ของไฟล์ที่ยังไม่ได้ build/collectstatic
+    คืนชื่อเดิมแทนการ error ทั้งหน้า - production ยัง error เหมือน ManifestStaticFilesStorage ปกติ
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.STATIC_MANIFEST_STRICT:
+                raise
+            return name
+
+
+def check_static_manifest(app_configs=None, **kwargs):
+    """check --deploy: collectstatic รันแล้ว และ manifest มี CSS/ฟอนต์จาก build_assets"""
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.core.checks import Error
+
+    from .management.commands.build_assets import font_files
+
+    hashed = getattr(staticfiles_storage, "hashed_files", None)
+    if hashed is None:
+        return []
+    missing = [
+        name for name in (*BUILT_ASSETS, *(f"fonts/{font}" for font in font_files()))
+        if name not in hashed
+    ]
+    if missing:
+        return [Error(
+            f"Static manifest is missing {', '.join(missing)}",
+            hint="Run `python manage.py build_assets` and `python manage.py collectstatic` before deploying",
+            id="members.E002",
+        )]
+    return []
@@ -1,4 +1,10 @@
 from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from ..http_cache import render_card_fragment
+from ..photos import photo_sources
+from ..utils import qr_version
 
 register = template.Library()
 
@@ -10,3 +16,35 @@ def can_register_staff(user):
         return user.member.role in ("COMMITTEE", "PRESIDENT")
     except Exception:
         return False
+
+
+@register.simple_tag
+def member_photo(member, variant, css_class="", alt=""):
+    """
+    <picture> ของรูปสมาชิกขนาด variant (card / avatar / print) พร้อม srcset WebP + JPEG
+    ถ้ายังไม่มีรูปย่อ ใช้รูปต้นฉบับแทน
+    """
+    sources = photo_sources(member, variant)
+    if sources is None:
+        return format_html('<img src="{}" class="{}" alt="{}">', member.photo.url, css_class, alt)
+
+    webp = ""
+    if sources["webp_srcset"]:
+        webp = format_html('<source type="image/webp" srcset="{}">', sources["webp_srcset"])
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" class="{}" alt="{}" decoding="async"></picture>',
+        webp, sources["src"], sources["srcset"], css_class, alt,
+    )
+
+
+@register.simple_tag
+def member_qr_url(member, fmt="svg"):
+    """ลิงก์รูป QR ของบัตร (svg / png) พร้อม ?v= ให้ browser cache ได้ถาวร"""
+    url = reverse(f"member_qr_{fmt}", args=[member.public_id])
+    return f"{url}?v={qr_version(member.get_qr_url())}"
+
+
+@register.simple_tag
+def cached_card(member, template_name):
+    """ตัวบัตรที่ render แล้วจาก cache (ดู render_card_fragment) - template ได้แค่ member ใน context"""
+    return render_card_fragment(member, template_name)
@@ -1,3 +1,766 @@
-from django.test import TestCase
+import io
+import itertools
+import json
+import random
+import threading
+import uuid
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, connection
+from django.template import engines
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+
+from . import metrics, reminders
+from .benchmarks import QUERY_BUDGETS, check_budgets, run_benchmarks
+from .bulk import RENEW, apply_bulk_action
+from .exporter import stream_changes
+from .importer import ImportFileError, read_rows, stage_import
+from .models import (
+    CardScan,
+    ExpiryReminder,
+    IdSequence,
+    Member,
+    MemberBulkAction,
+    MemberImport,
+    MemberTombstone,
+)
+from .pagination import CursorPaginator, encode_cursor
+from .scanner import (
+    _rice_parameter,
+    build_delta,
+    build_snapshot,
+    decode_fingerprints,
+    encode_fingerprints,
+    fingerprint,
+    format_version,
+    read_snapshot,
+)
+from .search import search_members
+from .tokens import CardTokenError, generate_signing_key, sign_card, verify_card_token
+from .utils import QR_IMMUTABLE_MAX_AGE, QR_SIZES, qr_version
+
+# key ของ token ใน QR สำหรับ test ที่ render/ลบบัตร (ไม่พึ่ง CARD_SIGNING_KEY ของเครื่อง)
+TEST_SIGNING_KEY, TEST_VERIFY_KEY = generate_signing_key("test")
+
+
+class MemberIdAllocatorTests(TransactionTestCase):
+
+    def test_reserve_returns_consecutive_block(self):
+        first = Member.allocate_member_ids(3)
+        second = Member.allocate_member_ids(2)
+        self.assertEqual(first, ["GC-001", "GC-002", "GC-003"])
+        self.assertEqual(second, ["GC-004", "GC-005"])
+
+    def test_sequence_starts_after_existing_member_ids(self):
+        IdSequence.objects.all().delete()
+        user = User.objects.create_user(username="legacy")
+        Member.objects.create(
+            user=user, member_id="GC-041", first_name="a", last_name="b",
+            join_date=date.today(),
+        )
+        self.assertEqual(Member.allocate_member_ids(1), ["GC-042"])
+
+    def test_parallel_add_member_has_no_duplicates(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("in-memory SQLite cannot be shared between threads")
+
+        staff_user = User.objects.create_user(username="staff", password="pw")
+        Member.objects.create(
+            user=staff_user, first_name="staff", last_name="staff",
+            join_date=date.today(), role="PRESIDENT",
+        )
+
+        threads_count, per_thread = 8, 5
+        errors = []
+        barrier = threading.Barrier(threads_count)
+
+        def worker(index):
+            try:
+                client = Client()
+                client.force_login(staff_user)
+                barrier.wait()
+                for n in range(per_thread):
+                    response = client.post("/th/members/add/", {
+                        "first_name": f"t{index}",
+                        "last_name": f"n{n}",
+                        "phone": f"08{index:04d}{n:04d}",
+                        "role": "MEMBER",
+                        "join_date": "2026-01-01",
+                        "expire_date": "2027-01-01",
+                    })
+                    if response.status_code != 302:
+                        errors.append(response.status_code)
+            except Exception as exc:  # pragma: no cover - รายงานผ่าน errors
+                errors.append(exc)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        member_ids = list(Member.objects.values_list("member_id", flat=True))
+        self.assertEqual(len(member_ids), threads_count * per_thread + 1)
+        self.assertEqual(len(set(member_ids)), len(member_ids))
+
+
+@override_settings(CARD_SCAN_BUFFERED=False, CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class QueryBudgetTests(TestCase):
+    """hot path ทุกตัวใช้คิวรีไม่เกิน QUERY_BUDGETS (รายชื่อเล็ก - benchmark เต็มรูปแบบใช้ command benchmark)"""
+
+    def test_hot_paths_stay_within_query_budgets(self):
+        report = run_benchmarks(sizes=(60,), repeat=1)
+        # ไม่ใช้ buffer ในการทดสอบ - หน้าบัตรจึงมี INSERT ของ CardScan เพิ่ม 1 คิวรี
+        budgets = {**QUERY_BUDGETS, "member_card_view_only": QUERY_BUDGETS["member_card_view_only"] + 1}
+        self.assertEqual(check_budgets(report, budgets), [])
+        self.assertEqual(set(report["results"]["60"]), set(QUERY_BUDGETS))
+
+
+def _create_member(username, **fields):
+    user = User.objects.create_user(username=username)
+    return Member.objects.create(
+        user=user, **{"first_name": username, "last_name": "test", "join_date": date.today(), **fields},
+    )
+
+
+class _Crash(BaseException):
+    """จำลอง process ตายกลางชุด (ไม่ใช่ Exception - _send_batch จึงไม่จับไว้)"""
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class ExpiryReminderTests(TestCase):
+
+    def setUp(self):
+        expire = date.today() + timedelta(days=10)
+        self.members = [
+            _create_member(f"due{n}", email=f"due{n}@example.com", expire_date=expire)
+            for n in range(4)
+        ]
+
+    def sent_to(self):
+        return [address for message in mail.outbox for address in message.to]
+
+    def test_rerun_sends_nothing_twice(self):
+        first = reminders.send_expiry_reminders(days=30, batch_size=3, rate=0)
+        second = reminders.send_expiry_reminders(days=30, batch_size=3, rate=0)
+
+        self.assertEqual(first["sent"], 4)
+        self.assertEqual(second["due"], 0)
+        self.assertEqual(sorted(self.sent_to()), sorted(m.email for m in self.members))
+
+    def test_run_after_crash_sends_nothing_twice(self):
+        build_message = reminders.build_message
+        calls = []
+
+        def crash_on_second(member, connection=None):
+            calls.append(member.pk)
+            if len(calls) == 2:
+                raise _Crash
+            return build_message(member, connection)
+
+        with mock.patch.object(reminders, "build_message", crash_on_second):
+            with self.assertRaises(_Crash):
+                reminders.send_expiry_reminders(days=30, batch_size=2, rate=0)
+        self.assertEqual(self.sent_to(), [self.members[0].email])
+
+        # ชุดที่ crash ค้าง claim ไว้ (ไม่แน่ใจว่าส่งถึงหรือไม่) - รอบต่อไปส่งเฉพาะชุดที่เหลือ
+        result = reminders.send_expiry_reminders(days=30, batch_size=2, rate=0)
+        self.assertEqual(result["sent"], 2)
+        self.assertEqual(len(self.sent_to()), len(set(self.sent_to())))
+        self.assertEqual(reminders.unconfirmed_reminders().count(), 2)
+        self.assertEqual(ExpiryReminder.objects.filter(sent_at__isnull=False).count(), 2)
+
+
+@override_settings(CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class ChangeExportTests(TestCase):
+
+    def events(self, since):
+        chunks, _ = stream_changes(since, ("id", "member_id"))
+        return [json.loads(line) for line in "".join(chunks).splitlines()]
+
+    def test_delete_after_update_appears_from_earlier_cursor(self):
+        member = _create_member("gone")
+        kept = _create_member("kept")
+        cursor = IdSequence.current(Member.CHANGE_SEQUENCE)
+
+        member.nickname = "updated"
+        member.save()
+        member_pk, member_id = member.pk, member.member_id
+        member.delete()
+        kept.save()
+
+        events = self.events(cursor)
+        self.assertEqual([e["op"] for e in events], ["delete", "upsert", "end"])
+        self.assertEqual((events[0]["id"], events[0]["member_id"]), (member_pk, member_id))
+        self.assertEqual(events[1]["data"]["id"], kept.pk)
+        self.assertGreater(events[0]["seq"], cursor)
+        self.assertEqual(events[-1]["next_cursor"], IdSequence.current(Member.CHANGE_SEQUENCE))
+        self.assertEqual([e["op"] for e in self.events(events[-1]["next_cursor"])], ["end"])
+
+    def test_delete_view_records_one_tombstone(self):
+        staff = _create_member("staff", role="STAFF")
+        member = _create_member("gone")
+        cursor = IdSequence.current(Member.CHANGE_SEQUENCE)
+        self.client.force_login(staff.user)
+
+        response = self.client.post(f"/th/delete/{member.member_id}/")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.filter(pk=member.user_id).exists())
+        self.assertEqual(MemberTombstone.objects.filter(public_id=member.public_id).count(), 1)
+        self.assertEqual([e["op"] for e in self.events(cursor)], ["delete", "end"])
+
+        # post_delete ของ instance เดิมซ้ำ (เช่นลบทั้ง user และ member) ไม่สร้าง tombstone ที่สอง
+        member.delete()
+        self.assertEqual(MemberTombstone.objects.filter(public_id=member.public_id).count(), 1)
+
+
+class ImportFileTests(TestCase):
+    """ไฟล์ที่อ่านไม่ได้ต้องเป็น ImportFileError (ข้อความในหน้า) ไม่ใช่ 500"""
+
+    HEADER = "first_name,last_name,join_date\n"
+
+    def bad_files(self):
+        return {
+            "cp874": SimpleUploadedFile("thai.csv", (self.HEADER + "สมชาย,ใจดี,2026-01-01\n").encode("cp874")),
+            "malformed csv": SimpleUploadedFile(
+                "big.csv", (self.HEADER + '"' + "x" * (200 * 1024) + '",b,2026-01-01\n').encode("utf-8"),
+            ),
+            "renamed xlsx": SimpleUploadedFile("members.xlsx", b"first_name,last_name\n"),
+            "corrupt xlsx": SimpleUploadedFile("members.xlsx", b"PK\x03\x04corrupt"),
+        }
+
+    def test_unreadable_files_raise_import_file_error(self):
+        for case, uploaded_file in self.bad_files().items():
+            with self.subTest(case):
+                with self.assertRaises(ImportFileError):
+                    read_rows(uploaded_file)
+
+    def test_utf8_csv_still_reads(self):
+        rows = read_rows(SimpleUploadedFile("ok.csv", (self.HEADER + "สมชาย,ใจดี,2026-01-01\n").encode("utf-8-sig")))
+        self.assertEqual(rows, [{"first_name": "สมชาย", "last_name": "ใจดี", "join_date": "2026-01-01"}])
+
+    def test_view_shows_message_instead_of_500(self):
+        staff = _create_member("importer", role="STAFF")
+        client = Client()
+        client.force_login(staff.user)
+        response = client.post("/th/members/import/", {"file": self.bad_files()["cp874"]}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "UTF-8")
+
+
+@override_settings(
+    IMPORT_COMMIT_BATCH_SIZE=2,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class ImportCommitTests(TestCase):
+
+    def setUp(self):
+        self.staff = _create_member("importer", role="STAFF")
+        rows = "".join(f"row{n},test,2026-01-01,08{n:08d}\n" for n in range(5))
+        self.member_import = stage_import(
+            SimpleUploadedFile("five.csv", ("first_name,last_name,join_date,phone\n" + rows).encode("utf-8")),
+            self.staff.user,
+        )
+
+    def imported(self):
+        return Member.objects.filter(first_name__startswith="row")
+
+    def test_preview_commits_one_batch_per_request(self):
+        client = Client()
+        client.force_login(self.staff.user)
+        url = f"/th/members/import/{self.member_import.pk}/"
+
+        response = client.post(url)
+        self.assertRedirects(response, f"{url}?continue=1", fetch_redirect_response=False)
+        self.assertEqual(self.imported().count(), 2)
+        self.assertContains(client.get(f"{url}?continue=1"), "commit-import-form').submit()")
+
+        client.post(url)
+        response = client.post(url)
+        self.assertRedirects(response, "/th/members/", fetch_redirect_response=False)
+
+        member_import = MemberImport.objects.get(pk=self.member_import.pk)
+        self.assertEqual((member_import.status, member_import.committed_count), ("COMMITTED", 5))
+        member_ids = list(self.imported().values_list("member_id", flat=True))
+        self.assertEqual(len(set(member_ids)), 5)
+        # ยืนยันซ้ำหลังเสร็จ ไม่สร้างเพิ่ม
+        client.post(url)
+        self.assertEqual(self.imported().count(), 5)
+
+    def test_command_finishes_a_partial_import(self):
+        client = Client()
+        client.force_login(self.staff.user)
+        client.post(f"/th/members/import/{self.member_import.pk}/")
+
+        call_command("commit_import", self.member_import.pk, batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(self.imported().count(), 5)
+        self.assertFalse(MemberImport.objects.get(pk=self.member_import.pk).is_pending)
+
+
+@override_settings(CARD_SIGNING_KEY=TEST_SIGNING_KEY, CARD_VERIFY_KEYS={}, CARD_SCAN_BUFFERED=False)
+class CardTokenTests(TestCase):
+
+    def setUp(self):
+        self.public_id = uuid.uuid4()
+        self.expire = date(2027, 6, 30)
+
+    def test_sign_and_verify(self):
+        token = sign_card(self.public_id, self.expire)
+        self.assertTrue(token.startswith("test.20270630."))
+        self.assertEqual(verify_card_token(self.public_id, token), self.expire)
+        self.assertIsNone(verify_card_token(self.public_id, sign_card(self.public_id, None)))
+
+    def test_tampered_tokens_are_rejected(self):
+        kid, expire, signature = sign_card(self.public_id, self.expire).split(".")
+        flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+        for token in (
+            f"{kid}.20991231.{signature}",        # ยืดวันหมดอายุ
+            f"{kid}.{expire}.{flipped}",          # แก้ลายเซ็น
+            f"other.{expire}.{signature}",        # kid ที่ไม่รู้จัก
+            "not-a-token",
+        ):
+            with self.subTest(token=token):
+                with self.assertRaises(CardTokenError):
+                    verify_card_token(self.public_id, token)
+        with self.assertRaises(CardTokenError):
+            verify_card_token(uuid.uuid4(), f"{kid}.{expire}.{signature}")
+
+    def test_old_key_verifies_while_listed(self):
+        old_token = sign_card(self.public_id, self.expire)
+        new_key, _ = generate_signing_key("next")
+
+        with override_settings(CARD_SIGNING_KEY=new_key, CARD_VERIFY_KEYS={"test": TEST_VERIFY_KEY.split(":", 1)[1]}):
+            self.assertEqual(verify_card_token(self.public_id, old_token), self.expire)
+            self.assertTrue(sign_card(self.public_id, self.expire).startswith("next."))
+
+        with override_settings(CARD_SIGNING_KEY=new_key, CARD_VERIFY_KEYS={}):
+            with self.assertRaises(CardTokenError):
+                verify_card_token(self.public_id, old_token)
+
+    def test_verify_api_contract(self):
+        member = _create_member("verify", expire_date=date.today() + timedelta(days=30))
+        expired = _create_member("lapsed", expire_date=date.today() - timedelta(days=1))
+
+        response = self.client.get(
+            f"/api/card/{member.public_id}/verify", {"t": sign_card(member.public_id, member.expire_date)},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-store", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+        self.assertEqual(response.json(), {
+            "public_id": str(member.public_id),
+            "valid": True,
+            "status": "valid",
+            "expire_date": member.expire_date.isoformat(),
+            "signature": "ok",
+        })
+
+        renewed = self.client.get(
+            f"/api/card/{member.public_id}/verify", {"t": sign_card(member.public_id, date.today())},
+        ).json()
+        self.assertEqual(renewed["signature"], "outdated")
+
+        data = self.client.get(
+            f"/api/card/{expired.public_id}/verify", {"t": sign_card(expired.public_id, expired.expire_date)},
+        ).json()
+        self.assertEqual((data["valid"], data["status"], data["signature"]), (False, "expired", "ok"))
+
+        data = self.client.get(f"/api/card/{member.public_id}/verify", {"t": "test.20991231.AAAA"}).json()
+        self.assertEqual(data["signature"], "invalid")
+
+        missing = self.client.get(f"/api/card/{uuid.uuid4()}/verify")
+        self.assertEqual((missing.status_code, missing.json()["status"]), (404, "not_found"))
+
+
+@override_settings(SCANNER_FINGERPRINT_KEY="test-fingerprint-key", CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class ScannerSnapshotTests(TestCase):
+
+    def test_golomb_rice_round_trip(self):
+        rng = random.Random(7)
+        cases = [([], 0), (list(range(0, 40, 3)), 0)]
+        for count in (1, 5, 300, 5000):
+            values = sorted(rng.sample(range(1 << 32), count))
+            values[-1] = (1 << 32) - 1
+            cases.append((values, _rice_parameter(count)))
+        for values, k in cases:
+            with self.subTest(count=len(values), k=k):
+                data = encode_fingerprints(values, k)
+                self.assertEqual(decode_fingerprints(data, k, len(values)), values)
+
+    def test_snapshot_contains_only_valid_cards(self):
+        today = date.today()
+        valid = [_create_member(f"valid{n}", expire_date=today + timedelta(days=n + 1)) for n in range(20)]
+        no_expiry = _create_member("lifetime")
+        expired = _create_member("expired", expire_date=today - timedelta(days=1))
+        inactive = _create_member("inactive", expire_date=today + timedelta(days=5), is_active=False)
+
+        version, data = build_snapshot()
+        snapshot = read_snapshot(data)
+        fingerprints = set(snapshot["fingerprints"])
+
+        self.assertEqual(snapshot["version"], version)
+        self.assertEqual(len(snapshot["fingerprints"]), Member.objects.valid(today).count())
+        for member in (*valid, no_expiry):
+            self.assertIn(fingerprint(member.public_id), fingerprints)
+        for member in (expired, inactive):
+            self.assertNotIn(fingerprint(member.public_id), fingerprints)
+
+    def test_delta_reports_add_revoke_expire_and_delete(self):
+        today = date.today()
+        lapsing = _create_member("lapsing", expire_date=today - timedelta(days=1))
+        to_revoke = _create_member("revoke", expire_date=today + timedelta(days=30))
+        to_delete = _create_member("delete", expire_date=today + timedelta(days=30))
+        to_expire = _create_member("expire", expire_date=today + timedelta(days=30))
+        # version ของเมื่อวาน: ตอนนั้น lapsing ยังใช้ได้ (หมดอายุเพราะวันผ่านไป ไม่ใช่เพราะถูกแก้)
+        since = format_version(IdSequence.current(Member.CHANGE_SEQUENCE), today - timedelta(days=1))
+
+        added = _create_member("added", expire_date=today + timedelta(days=30))
+        to_revoke.is_active = False
+        to_revoke.save()
+        to_expire.expire_date = today - timedelta(days=2)
+        to_expire.save()
+        deleted_fingerprint = fingerprint(to_delete.public_id)
+        to_delete.delete()
+
+        delta = build_delta(since)
+        self.assertEqual(delta["add"], [fingerprint(added.public_id)])
+        self.assertEqual(
+            sorted(delta["revoked"]), sorted([fingerprint(to_revoke.public_id), deleted_fingerprint]),
+        )
+        self.assertEqual(
+            sorted(delta["expired"]), sorted([fingerprint(to_expire.public_id), fingerprint(lapsing.public_id)]),
+        )
+        self.assertEqual(build_delta(delta["version"])["add"], [])
+
+    @override_settings(SCANNER_API_TOKEN="scanner-token")
+    def test_delta_endpoint_status_codes(self):
+        auth = {"HTTP_AUTHORIZATION": "Bearer scanner-token"}
+        today = date.today()
+        current = format_version(IdSequence.current(Member.CHANGE_SEQUENCE), today)
+
+        self.assertEqual(self.client.get("/api/scanner/delta", {"since": current}).status_code, 401)
+        self.assertEqual(self.client.get("/api/scanner/delta", {"since": current}, **auth).status_code, 200)
+        # since ว่าง/ผิดรูปแบบ = request ผิด (400) ไม่ใช่ version เก่า
+        for since in (None, "", "abc", "1.2026.x", "x.20260101.abcd1234"):
+            with self.subTest(since=since):
+                params = {} if since is None else {"since": since}
+                self.assertEqual(self.client.get("/api/scanner/delta", params, **auth).status_code, 400)
+        # version เก่าเกิน / key เปลี่ยน = โหลด snapshot ใหม่ (410)
+        for since in (format_version(0, today - timedelta(days=365)), format_version(0, today, kid="00000000")):
+            with self.subTest(since=since):
+                self.assertEqual(self.client.get("/api/scanner/delta", {"since": since}, **auth).status_code, 410)
+
+
+class MemberBulkActionTests(TestCase):
+
+    def setUp(self):
+        self.today = date.today()
+        self.staff = _create_member("staff", role="STAFF", expire_date=self.today + timedelta(days=100))
+        self.client.force_login(self.staff.user)
+
+    def post(self, **data):
+        return self.client.post("/th/members/bulk/", data)
+
+    def test_renew_extends_valid_cards_and_restarts_expired(self):
+        valid = _create_member("valid", expire_date=self.today + timedelta(days=10))
+        expired = _create_member("expired", expire_date=self.today - timedelta(days=40))
+        no_expiry = _create_member("noexpiry")
+        Member.objects.filter(pk=no_expiry.pk).update(expire_date=None)  # save() เติมวันหมดอายุให้เสมอ
+
+        audit = apply_bulk_action(
+            Member.objects.filter(pk__in=[valid.pk, expired.pk, no_expiry.pk]), RENEW,
+            performed_by=self.staff.user, days=30, criteria={"ids": [valid.pk]},
+        )
+
+        for member in (valid, expired, no_expiry):
+            member.refresh_from_db()
+        self.assertEqual(valid.expire_date, self.today + timedelta(days=40))
+        self.assertEqual(expired.expire_date, self.today + timedelta(days=30))
+        self.assertEqual(no_expiry.expire_date, self.today + timedelta(days=30))
+
+        # audit หนึ่งแถวต่อชุด และทุกแถวที่ถูกแก้ได้ change_seq เดียวกัน
+        self.assertEqual(MemberBulkAction.objects.count(), 1)
+        self.assertEqual(
+            (audit.action, audit.params, audit.criteria, audit.affected, audit.performed_by),
+            (RENEW, {"days": 30}, {"ids": [valid.pk]}, 3, self.staff.user),
+        )
+        self.assertEqual(
+            set(Member.objects.filter(change_seq=audit.change_seq).values_list("pk", flat=True)),
+            {valid.pk, expired.pk, no_expiry.pk},
+        )
+
+    def test_staff_only_changes_members_and_staff(self):
+        member = _create_member("member", expire_date=self.today + timedelta(days=10))
+        committee = _create_member("committee", role="COMMITTEE", expire_date=self.today + timedelta(days=10))
+
+        self.post(action="DEACTIVATE", scope="all")
+        self.post(action="SET_ROLE", role="COMMITTEE", scope="all")
+        self.post(action="SET_ROLE", role="MEMBER", scope="all")
+        self.post(action="RENEW", days=30, scope="all")
+
+        for obj in (member, committee, self.staff):
+            obj.refresh_from_db()
+        self.assertEqual((member.is_active, member.role), (False, "MEMBER"))
+        self.assertEqual(member.expire_date, self.today + timedelta(days=40))
+        # ตัวเองไม่ถูกระงับ/ลด role แต่ต่ออายุได้
+        self.assertEqual((self.staff.is_active, self.staff.role), (True, "STAFF"))
+        self.assertEqual(self.staff.expire_date, self.today + timedelta(days=130))
+        # COMMITTEE อยู่นอกสิทธิ์ของ STAFF ทุก action
+        self.assertEqual((committee.is_active, committee.role), (True, "COMMITTEE"))
+        self.assertEqual(committee.expire_date, self.today + timedelta(days=10))
+
+    def test_filtered_scope_uses_list_filters(self):
+        expired = _create_member("expired", expire_date=self.today - timedelta(days=5))
+        valid = _create_member("valid", expire_date=self.today + timedelta(days=200))
+
+        self.post(action="RENEW", days=30, scope="filtered", status="expired")
+
+        expired.refresh_from_db()
+        valid.refresh_from_db()
+        self.assertEqual(expired.expire_date, self.today + timedelta(days=30))
+        self.assertEqual(valid.expire_date, self.today + timedelta(days=200))
+        self.assertEqual(MemberBulkAction.objects.get().criteria, {"status": "expired"})
+
+    def test_filtered_scope_without_filter_is_rejected(self):
+        member = _create_member("member", expire_date=self.today + timedelta(days=10))
+
+        response = self.post(action="DEACTIVATE", scope="filtered")
+
+        self.assertEqual(response.status_code, 302)
+        member.refresh_from_db()
+        self.assertTrue(member.is_active)
+        self.assertFalse(MemberBulkAction.objects.exists())
+
+
+@override_settings(CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class MemberSearchTests(TestCase):
+
+    def setUp(self):
+        self.somchai = _create_member(
+            "somchai", first_name="สมชาย", last_name="ใจดี", first_name_en="Somchai",
+            last_name_en="Jaidee", phone="0812345678",
+        )
+        self.somsri = _create_member(
+            "somsri", first_name="สมศรี", last_name="มีสุข", first_name_en="Somsri",
+            last_name_en="Meesuk", phone="0898765432", nickname='Sri "Boss"',
+        )
+
+    def search(self, query):
+        return list(search_members(Member.objects.all(), query))
+
+    def test_thai_substring_matches_by_trigram(self):
+        if connection.vendor == "sqlite":
+            self.assertIn("MATCH", str(search_members(Member.objects.all(), "มชาย").query))
+        self.assertEqual(self.search("มชาย"), [self.somchai])
+        self.assertEqual(self.search("ใจดี"), [self.somchai])
+        self.assertEqual(self.search("สมศรี มีสุข"), [self.somsri])
+        self.assertEqual(self.search("สมชาย มีสุข"), [])
+
+    def test_english_is_case_insensitive(self):
+        self.assertEqual(self.search("somchai"), [self.somchai])
+        self.assertEqual(self.search("MEESUK"), [self.somsri])
+
+    def test_phone_prefix(self):
+        self.assertEqual(self.search("0812"), [self.somchai])
+        self.assertEqual(set(self.search("08")), {self.somchai, self.somsri})
+
+    def test_short_terms_fall_back_to_icontains(self):
+        # น้อยกว่า 3 ตัวอักษร trigram ใช้ไม่ได้ - ยังต้องหาเจอ
+        self.assertEqual(set(self.search("สม")), {self.somchai, self.somsri})
+        self.assertEqual(self.search("ดี"), [self.somchai])
+
+    def test_quotes_and_operators_are_literal(self):
+        self.assertEqual(self.search('"Boss"'), [self.somsri])
+        self.assertEqual(self.search('Sri "Bo'), [self.somsri])
+        self.assertEqual(self.search("NOT somchai"), [])
+        self.assertEqual(self.search('a"b OR*'), [])
+
+    def test_search_follows_updates_and_deletes(self):
+        self.somchai.first_name_en = "Chai"
+        self.somchai.save()
+        self.assertEqual(self.search("somchai"), [])
+        self.assertEqual(self.search("Chai"), [self.somchai])
+        Member.objects.filter(pk=self.somsri.pk).delete()
+        self.assertEqual(self.search("Meesuk"), [])
+
+
+@override_settings(CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        # ชื่อ/วันที่ซ้ำกันทั้งหมด - ลำดับต้องมาจาก id เท่านั้น
+        self.members = [_create_member(f"page{n}", first_name="same", last_name="same") for n in range(7)]
+        self.newest_first = [member.pk for member in reversed(self.members)]
+
+    def walk_forward(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_next_and_previous_round_trip(self):
+        paginator = CursorPaginator(Member.objects.all(), 3)
+        pages = self.walk_forward(paginator)
+
+        self.assertEqual([[m.pk for m in page] for page in pages], [
+            self.newest_first[0:3], self.newest_first[3:6], self.newest_first[6:],
+        ])
+        self.assertFalse(pages[0].has_previous())
+        for page, previous in zip(pages[1:], pages):
+            back = paginator.get_page(page.previous_cursor)
+            self.assertEqual([m.pk for m in back], [m.pk for m in previous])
+            self.assertEqual(back.has_previous(), previous.has_previous())
+
+    def test_equal_sort_keys_neither_skip_nor_repeat(self):
+        paginator = CursorPaginator(Member.objects.all(), 2)
+        first = paginator.get_page()
+        # แถวใหม่/แถวที่ถูกลบระหว่างเปิดหน้า ไม่ทำให้หน้าถัดไปเลื่อน
+        _create_member("newer", first_name="same", last_name="same")
+        Member.objects.filter(pk=self.newest_first[0]).delete()
+
+        seen = [m.pk for m in first]
+        cursor = first.next_cursor
+        while cursor:
+            page = paginator.get_page(cursor)
+            seen += [m.pk for m in page]
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.newest_first)
+
+    def test_tampered_cursor_returns_first_page(self):
+        paginator = CursorPaginator(Member.objects.all(), 3)
+        first = [m.pk for m in paginator.get_page()]
+        for cursor in ("%%%", "bm90LWEtY3Vyc29y", encode_cursor("x", 5), "bjphYmM", "4pyT"):
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual([m.pk for m in page], first)
+                self.assertFalse(page.has_previous())
+
+        staff = _create_member("staff", role="STAFF")
+        self.client.force_login(staff.user)
+        response = self.client.get("/th/members/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [m.pk for m in response.context["page_obj"]],
+            [staff.pk] + self.newest_first[:14],
+        )
+
+
+@override_settings(CARD_SCAN_BUFFERED=False, CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class CardPageCacheTests(TestCase):
+
+    def setUp(self):
+        self.member = _create_member("card", expire_date=date.today() + timedelta(days=30))
+        self.url = f"/th/card/{self.member.public_id}/"
+
+    def test_repeat_scan_gets_304_and_is_still_recorded(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        # CDN/proxy ตอบแทนไม่ได้ (ไม่งั้นการสแกนไม่ผ่าน record_scan) - browser ถามซ้ำด้วย ETag
+        cache_control = {part.strip() for part in first["Cache-Control"].split(",")}
+        self.assertIn("private", cache_control)
+        self.assertIn("no-cache", cache_control)
+        self.assertNotIn("public", cache_control)
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+        self.assertEqual(CardScan.objects.filter(member=self.member).count(), 2)
+
+    def test_etag_changes_when_member_changes(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.member.nickname = "ใหม่"
+        self.member.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+        # queryset.update() (เช่นแก้เป็นชุด) เปลี่ยน change_seq ด้วย - ETag เปลี่ยนเหมือนกัน
+        apply_bulk_action(Member.objects.filter(pk=self.member.pk), "DEACTIVATE")
+        revoked = self.client.get(self.url, HTTP_IF_NONE_MATCH=changed["ETag"])
+        self.assertEqual(revoked.status_code, 200)
+        self.assertNotEqual(revoked["ETag"], changed["ETag"])
+
+
+@override_settings(CARD_SIGNING_KEY=TEST_SIGNING_KEY)
+class MemberQrTests(TestCase):
+
+    def setUp(self):
+        self.member = _create_member("qr", expire_date=date.today() + timedelta(days=30))
+        self.base = f"/th/card/{self.member.public_id}/"
+
+    def cache_control(self, response):
+        return {part.strip() for part in response["Cache-Control"].split(",")}
+
+    def test_png_sizes(self):
+        from PIL import Image
+
+        for size in QR_SIZES:
+            with self.subTest(size=size):
+                response = self.client.get(self.base + "qr.png", {"size": size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "image/png")
+                self.assertEqual(Image.open(io.BytesIO(response.content)).size, (size, size))
+
+    def test_invalid_size_is_rejected(self):
+        for size in ("99", "abc", "", "100000", "-120"):
+            with self.subTest(size=size):
+                self.assertEqual(self.client.get(self.base + "qr.png", {"size": size}).status_code, 400)
+
+    def test_svg_and_unknown_member(self):
+        response = self.client.get(self.base + "qr.svg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", response.content)
+        self.assertEqual(self.client.get(f"/th/card/{uuid.uuid4()}/qr.svg").status_code, 404)
+
+    def test_versioned_link_is_immutable_and_etag_revalidates(self):
+        version = qr_version(self.member.get_qr_url())
+        versioned = self.client.get(self.base + "qr.svg", {"v": version})
+        self.assertIn("immutable", self.cache_control(versioned))
+        self.assertIn(f"max-age={QR_IMMUTABLE_MAX_AGE}", self.cache_control(versioned))
+
+        stale = self.client.get(self.base + "qr.svg", {"v": "old"})
+        self.assertNotIn("immutable", self.cache_control(stale))
+
+        again = self.client.get(self.base + "qr.svg", HTTP_IF_NONE_MATCH=versioned["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        # ต่ออายุ = token ใน QR เปลี่ยน - รูปและ ?v= เปลี่ยนตาม
+        self.member.expire_date += timedelta(days=365)
+        self.member.save()
+        self.assertNotEqual(qr_version(self.member.get_qr_url()), version)
+        renewed = self.client.get(self.base + "qr.svg", HTTP_IF_NONE_MATCH=versioned["ETag"])
+        self.assertEqual(renewed.status_code, 200)
+
+
+class RequestTimingTests(TestCase):
+
+    def test_nested_template_render_is_counted_once(self):
+        timings = metrics.RequestTimings()
+        token = metrics._current.set(timings)
+        try:
+            # นาฬิกาเดินทีละ 1 ต่อการอ่าน: ถ้าตัวในจับเวลาด้วยจะได้ tpl = 4 แทน 1
+            with mock.patch.object(metrics.time, "perf_counter", side_effect=itertools.count()):
+                with metrics.timer("tpl"):
+                    engines.all()[0].from_string("{{ value }}").render({"value": "fragment"})
+        finally:
+            metrics._current.reset(token)
+
+        self.assertEqual(timings.tpl, 1)
+        self.assertEqual(timings.running, set())
@@ -0,0 +1,165 @@
+"""
+Token ลงลายเซ็นที่ฝังใน QR ของบัตร ให้เครื่องสแกนหน้าประตูตรวจได้โดยไม่ต้องเรียก server
+
+QR เก็บ URL ของบัตรตามเดิม และเพิ่ม ?t=<kid>.<expire>.<sig>
+  kid    = id ของ key ที่ใช้เซ็น (รองรับการหมุน key)
+  expire = expire_date แบบ YYYYMMDD ("0" = ไม่มีวันหมดอายุ)
+  sig    = ลายเซ็น Ed25519 ของ "<kid>:<public_id>:<expire>" แบบ base64url (64 byte)
+public_id ไม่อยู่ใน token เพราะอยู่ใน path ของ URL แล้ว
+
+เซ็นด้วย private key (CARD_SIGNING_KEY) ซึ่งอยู่บน server เท่านั้น
+เครื่องสแกนเก็บแค่ public key (python manage.py card_keys) - ถอด key จากเครื่องสแกนไปก็ปลอมบัตรไม่ได้
+หมุน key: ตั้ง CARD_SIGNING_KEY เป็น key ใหม่ แล้วย้าย public key เดิมไปไว้ใน CARD_VERIFY_KEYS
+จนบัตรที่เซ็นด้วย key เดิมถูกพิมพ์ใหม่หมด
+
+token ยืนยันได้แค่ public_id + วันหมดอายุ ณ เวลาที่ออกบัตร - การระงับบัตร (is_active)
+ต้องตรวจกับ /api/card/<uuid>/verify หรือรายการบัตรที่ใช้ไม่ได้
+"""
+
+import base64
+import functools
+import logging
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+logger = logging.getLogger(__name__)
+
+
+class CardTokenError(ValueError):
+    """token รูปแบบผิด, ไม่รู้จัก key หรือลายเซ็นไม่ตรง"""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def generate_signing_key(kid):
+    """key คู่ใหม่: (ค่าของ CARD_SIGNING_KEY, "kid:<public key>" สำหรับเครื่องสแกน)"""
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat, PublicFormat
+
+    private_key = Ed25519PrivateKey.generate()
+    private = private_key.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())
+    public = private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    return f"{kid}:{_b64encode(private)}", f"{kid}:{_b64encode(public)}"
+
+
+@functools.lru_cache(maxsize=4)
+def _load_signing_key(value):
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    kid, sep, encoded = value.partition(":")
+    if not sep or not kid or "." in kid:
+        raise ImproperlyConfigured('CARD_SIGNING_KEY must look like "<kid>:<base64url private key>"')
+    try:
+        return kid, Ed25519PrivateKey.from_private_bytes(_b64decode(encoded))
+    except ValueError:
+        raise ImproperlyConfigured("CARD_SIGNING_KEY is not a valid Ed25519 private key")
+
+
+@functools.lru_cache(maxsize=32)
+def _load_public_key(encoded):
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+    return Ed25519PublicKey.from_public_bytes(_b64decode(encoded))
+
+
+@functools.lru_cache(maxsize=1)
+def _dev_signing_key():
+    logger.warning("CARD_SIGNING_KEY is not set - using a throwaway key for this process (DEBUG only)")
+    return generate_signing_key("dev")[0]
+
+
+def signing_key():
+    """
+    (kid, private key) ปัจจุบัน - ไม่ได้ตั้ง CARD_SIGNING_KEY = ImproperlyConfigured
+    ยกเว้น DEBUG ที่ใช้ key ชั่วคราวต่อ process (token ใช้ไม่ได้หลัง restart)
+    """
+    value = settings.CARD_SIGNING_KEY
+    if not value:
+        if not settings.DEBUG:
+            raise ImproperlyConfigured(
+                "CARD_SIGNING_KEY is not set - generate one with `python manage.py card_keys --generate`"
+            )
+        value = _dev_signing_key()
+    return _load_signing_key(value)
+
+
+def signing_kid():
+    return signing_key()[0]
+
+
+def public_keys():
+    """{kid: public key base64url} ที่ตรวจได้ - key ที่ใช้เซ็นตอนนี้ + CARD_VERIFY_KEYS (key เก่าระหว่างหมุน)"""
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    kid, private_key = signing_key()
+    public = private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    return {kid: _b64encode(public), **{k: v for k, v in settings.CARD_VERIFY_KEYS.items() if k != kid}}
+
+
+def _encode_expire(expire_date):
+    return expire_date.strftime("%Y%m%d") if expire_date else "0"
+
+
+def _decode_expire(value):
+    if value == "0":
+        return None
+    if len(value) != 8 or not value.isdigit():
+        raise CardTokenError("Invalid expire date")
+    return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+
+
+def _message(kid, public_id, expire):
+    return f"{kid}:{public_id}:{expire}".encode("utf-8")
+
+
+def sign_card(public_id, expire_date):
+    """สร้าง token ของบัตรด้วย key ปัจจุบัน"""
+    kid, private_key = signing_key()
+    expire = _encode_expire(expire_date)
+    return f"{kid}.{expire}.{_b64encode(private_key.sign(_message(kid, public_id, expire)))}"
+
+
+def verify_card_token(public_id, token):
+    """ตรวจลายเซ็นของ token คืน expire_date ที่เซ็นไว้ (ไม่ได้ตรวจว่าหมดอายุหรือยัง)"""
+    from cryptography.exceptions import InvalidSignature
+
+    try:
+        kid, expire, signature = token.split(".")
+        signature = _b64decode(signature)
+    except (AttributeError, ValueError):
+        raise CardTokenError("Malformed token")
+
+    encoded = public_keys().get(kid)
+    if encoded is None:
+        raise CardTokenError(f"Unknown key id: {kid}")
+    try:
+        _load_public_key(encoded).verify(signature, _message(kid, public_id, expire))
+    except InvalidSignature:
+        raise CardTokenError("Bad signature")
+    return _decode_expire(expire)
+
+
+def check_signing_key(app_configs=None, **kwargs):
+    """check --deploy: ไม่มี/อ่าน CARD_SIGNING_KEY ไม่ได้ = build ของ production ล้ม"""
+    from django.core.checks import Error
+
+    if not settings.CARD_SIGNING_KEY:
+        return [Error(
+            "CARD_SIGNING_KEY is not set",
+            hint="Generate one with `python manage.py card_keys --generate`",
+            id="members.E001",
+        )]
+    try:
+        _load_signing_key(settings.CARD_SIGNING_KEY)
+    except ImproperlyConfigured as exc:
+        return [Error(str(exc), id="members.E001")]
+    return []
@@ -12,6 +12,10 @@ urlpatterns = [
     # member management
     path("members/", views.member_list, name="member_list"),
     path("members/add/", views.add_member, name="add_member"),
+    path("members/bulk/", views.bulk_member_action, name="bulk_member_action"),
+    path("members/export/", views.export_members, name="export_members"),
+    path("members/import/", views.import_members, name="import_members"),
+    path("members/import/<int:pk>/", views.import_members_preview, name="import_members_preview"),
 
     # profile
     path("profile/edit/", views.edit_profile, name="edit_profile"),
@@ -22,6 +26,8 @@ urlpatterns = [
     path("member/<uuid:public_id>/print/", views.card_print, name="card_print"),
     path("card/<uuid:public_id>/", views.member_card_view_only, name="member_card_view_only"),
     path("card/<uuid:public_id>/expired/", views.member_card_expired_view_only, name="member_card_expired_view_only"),
+    path("card/<uuid:public_id>/qr.svg", views.member_qr, {"fmt": "svg"}, name="member_qr_svg"),
+    path("card/<uuid:public_id>/qr.png", views.member_qr, {"fmt": "png"}, name="member_qr_png"),
     path("my-card/", views.my_card, name="my_card"),
     path("dashboard/", views.member_dashboard, name="member_dashboard"),
 
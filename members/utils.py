@@ -1,31 +1,130 @@
 """Utility functions สำหรับ members app."""
 
-import base64
+import functools
+import hashlib
 import io
 
+from django.core.cache import caches
 
-def generate_qr_base64(url, size=120):
+from .metrics import timer
+
+# cache alias สำหรับเก็บ PNG ของ QR แบบถาวร (ดู CACHES["qr"] ใน settings)
+QR_CACHE_ALIAS = "qr"
+
+# ขนาด PNG ที่ endpoint qr.png ให้เลือกได้ (?size=)
+QR_SIZES = (100, 120, 150)
+
+# "ขนาด" ของ SVG ใน key ของ cache (SVG ไม่มีขนาดตายตัว)
+QR_SVG = "svg"
+
+# Cache-Control max-age ของรูป QR ที่ลิงก์มี ?v= ตรงกับ URL ปัจจุบัน (1 ปี, immutable)
+QR_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# จำนวน QR สูงสุดที่เก็บไว้ในหน่วยความจำของ process (LRU)
+QR_LRU_MAXSIZE = 512
+
+
+def default_member_password(phone):
+    """รหัสผ่านเริ่มต้นของสมาชิกใหม่ = เบอร์โทร (หรือ 1234 ถ้าไม่มีเบอร์) ต้องเปลี่ยนหลังล็อกอินครั้งแรก"""
+    return (phone or "").strip() or "1234"
+
+
+def qr_cache_key(url, size):
+    """key ของ QR ใน persistent cache - ผูกกับ URL เต็ม (SITE_URL + public_id) และขนาด"""
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return f"qr:{digest}:{size}"
+
+
+def _qr_code(url):
+    import qrcode
+    qr = qrcode.QRCode(version=1, box_size=10, border=2)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr_png(url, size=120):
     """
-    สร้าง QR Code เป็น base64 data URL
-    ถ้าสร้างไม่ได้ return None (ใช้ fallback ไป api.qrserver.com)
+    สร้าง QR Code เป็น PNG bytes (ไม่ผ่าน cache)
+    ใช้ได้ทั้งใน request และใน worker process ของ warm_qr_cache
+    """
+    img = _qr_code(url).make_image(fill_color="black", back_color="white")
+    img = img.resize((size, size))
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
 
-    Args:
-        url: URL ที่ต้องการ encode เป็น QR
-        size: ขนาด pixel ของ QR (default 120)
+def render_qr_svg(url):
+    """
+    สร้าง QR Code เป็น SVG bytes (ไม่ผ่าน cache)
+    วาดแต่ละแถวเป็นเส้นต่อเนื่องใน path เดียว - ไฟล์เล็กกว่า PNG และคมทุกขนาด
+    """
+    matrix = _qr_code(url).get_matrix()
+    n = len(matrix)
+    segments = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < n and row[x]:
+                x += 1
+            segments.append(f"M{start} {y}.5h{x - start}")
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path stroke="#000" d="{"".join(segments)}"/></svg>'
+    ).encode("ascii")
 
-    Returns:
-        str: "data:image/png;base64,xxx" หรือ None ถ้าเกิด error
+
+def qr_version(url):
+    """ค่า ?v= ของลิงก์รูป QR - เปลี่ยนเมื่อ URL ใน QR เปลี่ยน (เช่น SITE_URL) จึง cache แบบ immutable ได้"""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+
+
+def _cached_qr(key, render):
+    """ดู persistent cache ก่อน ถ้าไม่มีจึงสร้างใหม่และเก็บลง cache"""
+    cache = caches[QR_CACHE_ALIAS]
+
+    try:
+        content = cache.get(key)
+    except Exception:
+        content = None
+
+    if content is None:
+        with timer("qr"):
+            content = render()
+        try:
+            cache.set(key, content, None)
+        except Exception:
+            pass
+    return content
+
+
+@functools.lru_cache(maxsize=QR_LRU_MAXSIZE)
+def get_qr_png(url, size=120):
+    """
+    คืน PNG bytes ของ QR โดยดูจาก LRU ใน process ก่อน แล้วจึงดู persistent cache
+    ถ้าไม่มีทั้งสองชั้นจึงสร้างใหม่และเก็บลง persistent cache
+    """
+    return _cached_qr(qr_cache_key(url, size), lambda: render_qr_png(url, size))
+
+
+@functools.lru_cache(maxsize=QR_LRU_MAXSIZE)
+def get_qr_svg(url):
+    """เหมือน get_qr_png แต่เป็น SVG (key ใน persistent cache ใช้ size = QR_SVG)"""
+    return _cached_qr(qr_cache_key(url, QR_SVG), lambda: render_qr_svg(url))
+
+
+def invalidate_qr_cache(url, sizes=QR_SIZES):
+    """
+    ลบ QR ของ URL นี้ออกจาก persistent cache (ใช้เมื่อสมาชิกถูกลบ)
+    key ผูกกับเนื้อหาของ URL - LRU ใน process ไม่ต้องล้าง (URL ใหม่ได้ key ใหม่, URL เดิมถูกดันออกเอง)
     """
     try:
-        import qrcode
-        qr = qrcode.QRCode(version=1, box_size=10, border=2)
-        qr.add_data(url)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        img = img.resize((size, size))
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        b64 = base64.b64encode(buffer.getvalue()).decode("ascii")
-        return f"data:image/png;base64,{b64}"
+        caches[QR_CACHE_ALIAS].delete_many([qr_cache_key(url, size) for size in (*sizes, QR_SVG)])
     except Exception:
-        return None
+        pass
@@ -1,24 +1,62 @@
+import hashlib
+import hmac
 import logging
-from datetime import date, timedelta
+from datetime import date
+from urllib.parse import urlencode
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.models import User
-from django.db.models import Q
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-
-from .decorators import role_required
-from .forms import MemberForm, StaffRegisterForm
-from .models import Member
-from .utils import generate_qr_base64
+from django.urls import reverse
+
+from .bulk import DEACTIVATE, RENEW, SET_ROLE, apply_bulk_action
+from .decorators import get_current_member, role_required
+from .exporter import EXPORT_FORMATS, filter_members, parse_fields, stream_changes, stream_export
+from .forms import MemberBulkActionForm, MemberForm, StaffRegisterForm
+from .http_cache import conditional_card_response
+from .importer import IMPORT_FIELDS, MAX_IMPORT_ROWS, ImportFileError, commit_import, stage_import
+from .metrics import registry as metrics_registry
+from .models import MEMBER_STATUSES, Member, MemberImport
+from .pagination import CursorPaginator
+from .scanner import InvalidVersionError, SnapshotVersionError, build_delta, current_version, get_snapshot
+from .scans import record_scan
+from .search import search_members
+from .stats import get_dashboard_stats, get_scan_stats
+from .tokens import CardTokenError, verify_card_token
+from .utils import (
+    QR_IMMUTABLE_MAX_AGE,
+    QR_SIZES,
+    default_member_password,
+    get_qr_png,
+    get_qr_svg,
+    qr_version,
+)
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
 from django.utils.translation import gettext as _
 
 logger = logging.getLogger(__name__)
 
+# column ที่หน้า member_list ใช้ (สถานะคำนวณใน SQL จาก is_active + expire_date)
+MEMBER_LIST_FIELDS = (
+    "id",
+    "member_id",
+    "public_id",
+    "first_name",
+    "last_name",
+    "nickname",
+    "is_active",
+    "expire_date",
+)
+
 
 # =========================
 # AUTH
@@ -34,16 +72,14 @@ def staff_login(request):
         if user:
             login(request, user)
 
-            try:
-                member = Member.objects.get(user=user)
-
-                if member.role in ["STAFF", "COMMITTEE", "PRESIDENT"]:
-                    return redirect("staff_dashboard")
-                else:
-                    return redirect("member_dashboard")
+            member = get_current_member(request)
+            if member is None:
+                return redirect("staff_dashboard")
 
-            except Member.DoesNotExist:
+            if member.role in ["STAFF", "COMMITTEE", "PRESIDENT"]:
                 return redirect("staff_dashboard")
+            else:
+                return redirect("member_dashboard")
 
         return render(request, "members/staff_login.html", {
             "error": "Invalid login"
@@ -64,47 +100,15 @@ def staff_logout(request):
 @login_required
 @role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
 def staff_dashboard(request):
-    today = date.today()
+    stats = get_dashboard_stats()
 
-    total = Member.objects.count()
-    active = Member.objects.filter(expire_date__gte=today, is_active=True).count()
-    expired = Member.objects.filter(expire_date__lt=today).count()
-    inactive = Member.objects.filter(is_active=False).count()
-
-    expiring_soon = Member.objects.filter(
-        expire_date__gte=today,
-        expire_date__lte=today + timedelta(days=30),
-        is_active=True
-    ).order_by("expire_date")[:5]
-
-    expired_members = Member.objects.filter(
-        expire_date__lt=today
-    ).order_by("-expire_date")[:5]
-
-    recent_members = Member.objects.order_by("-id")[:5]
-
-    # Staff profile data
-    staff_member = None
-    staff_qr_image = None
-    staff_qr_fallback_url = None
-    try:
-        staff_member = Member.objects.get(user=request.user)
-        staff_qr_fallback_url = staff_member.get_card_view_only_url()
-        staff_qr_image = generate_qr_base64(staff_qr_fallback_url, size=150) or None
-    except Member.DoesNotExist:
-        pass
+    # Staff profile data (role_required โหลดไว้แล้ว)
+    staff_member = get_current_member(request)
 
     return render(request, "members/staff_dashboard.html", {
-        "total": total,
-        "active": active,
-        "expired": expired,
-        "inactive": inactive,
-        "expiring_soon": expiring_soon,
-        "expired_members": expired_members,
-        "recent_members": recent_members,
+        **stats,
+        **get_scan_stats(),
         "staff_member": staff_member,
-        "staff_qr_image": staff_qr_image,
-        "staff_qr_fallback_url": staff_qr_fallback_url,
     })
 
 
@@ -139,24 +143,34 @@ def staff_register(request):
 # MEMBER MANAGEMENT
 # =========================
 
+def _list_filters(params):
+    """(q, status) ของหน้ารายชื่อจาก GET/POST (status ที่ไม่รู้จัก = ไม่กรอง)"""
+    status = params.get("status")
+    return params.get("q") or None, status if status in MEMBER_STATUSES else None
+
+
+def _list_filter_params(query, status):
+    """ตัวกรองปัจจุบัน สำหรับต่อท้ายลิงก์แบ่งหน้า / redirect กลับหน้ารายชื่อ"""
+    return urlencode({key: value for key, value in (("q", query), ("status", status)) if value})
+
+
 @login_required
 @role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
 def member_list(request):
-    query = request.GET.get("q")
+    query, status = _list_filters(request.GET)
+
+    # โหลดเฉพาะ column ที่ตารางแสดงจริง
+    members_qs = Member.objects.only(*MEMBER_LIST_FIELDS).annotate_status()
+    if status:
+        members_qs = members_qs.with_status(status)
 
     if query:
-        members_qs = Member.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(member_id__icontains=query) |
-            Q(nickname__icontains=query)
-        ).order_by("-id")
+        # ผลค้นหาเรียงตามความเกี่ยวข้อง และถูกกรองด้วย index อยู่แล้ว - ใช้ Paginator ปกติ
+        paginator = Paginator(search_members(members_qs, query), 15)
+        page_obj = paginator.get_page(request.GET.get("page", 1))
     else:
-        members_qs = Member.objects.all().order_by("-id")
-
-    paginator = Paginator(members_qs, 15)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+        paginator = CursorPaginator(members_qs, 15)
+        page_obj = paginator.get_page(request.GET.get("cursor"))
 
     new_member_credentials = None
     if "new_member_credentials" in request.session:
@@ -165,10 +179,78 @@ def member_list(request):
     return render(request, "members/member_list.html", {
         "members": page_obj,
         "page_obj": page_obj,
+        "paginator": paginator,
+        "cursor_mode": not query,
+        "status": status,
+        "filter_params": _list_filter_params(query, status),
+        "bulk_form": MemberBulkActionForm(initial={"days": 365}, user=request.user),
         "new_member_credentials": new_member_credentials,
     })
 
 
+@login_required
+@role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
+def bulk_member_action(request):
+    """
+    ต่ออายุ / ระงับ / เปิดใช้ / เปลี่ยน role ของสมาชิกหลายคนในคำสั่ง UPDATE เดียว
+    scope=selected ใช้กับ id ที่ติ๊ก, scope=filtered ใช้กับทุกคนที่ตรงตัวกรองของหน้ารายชื่อ (q, status)
+    scope=all ใช้กับสมาชิกทุกคน - filtered ที่ไม่มีตัวกรองถูกปฏิเสธ (กันแก้ทั้งสโมสรโดยไม่ตั้งใจ)
+    """
+    if request.method != "POST":
+        return redirect("member_list")
+
+    query, status = _list_filters(request.POST)
+    back = redirect(f"{reverse('member_list')}?{_list_filter_params(query, status)}")
+
+    form = MemberBulkActionForm(request.POST, user=request.user)
+    if not form.is_valid():
+        messages.error(request, _("ข้อมูลสำหรับแก้ไขหลายรายการไม่ถูกต้อง"))
+        return back
+
+    action = form.cleaned_data["action"]
+    scope = form.cleaned_data["scope"]
+    if scope == MemberBulkActionForm.SCOPE_FILTERED and not (query or status):
+        messages.error(request, _("กรุณาระบุตัวกรอง หรือเลือก \"สมาชิกทุกคน\""))
+        return back
+
+    queryset = Member.objects.all()
+    criteria = {}
+    if status:
+        queryset = queryset.with_status(status)
+        criteria["status"] = status
+    if query:
+        queryset = search_members(queryset, query)
+        criteria["q"] = query
+
+    if scope == MemberBulkActionForm.SCOPE_ALL:
+        criteria = {"scope": MemberBulkActionForm.SCOPE_ALL}
+    elif scope == MemberBulkActionForm.SCOPE_SELECTED:
+        ids = [int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()]
+        if not ids:
+            messages.error(request, _("กรุณาเลือกสมาชิกอย่างน้อย 1 คน"))
+            return back
+        queryset = queryset.filter(pk__in=ids)
+        criteria["ids"] = ids
+
+    # STAFF/COMMITTEE แก้ได้เฉพาะ MEMBER/STAFF ทุก action (เหมือน MemberForm) และไม่ระงับ/เปลี่ยน role ของตัวเอง
+    actor = get_current_member(request)
+    if actor.role != "PRESIDENT":
+        queryset = queryset.filter(role__in=["MEMBER", "STAFF"])
+    if action in (DEACTIVATE, SET_ROLE):
+        queryset = queryset.exclude(pk=actor.pk)
+
+    audit = apply_bulk_action(
+        queryset,
+        action,
+        performed_by=request.user,
+        days=form.cleaned_data["days"] if action == RENEW else None,
+        role=form.cleaned_data["role"] if action == SET_ROLE else None,
+        criteria=criteria,
+    )
+    messages.success(request, _("แก้ไขสมาชิก %(count)s คนเรียบร้อยแล้ว") % {"count": audit.affected})
+    return back
+
+
 @login_required
 @role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
 def add_member(request):
@@ -179,18 +261,19 @@ def add_member(request):
             member = form.save(commit=False)
 
             # รหัสผ่านเริ่มต้น = เบอร์โทรของสมาชิก (ต้องเปลี่ยนหลังล็อกอินครั้งแรก)
-            initial_password = (member.phone or "").strip() or "1234"
+            initial_password = default_member_password(member.phone)
 
-            user = User.objects.create_user(
-                username="temp_user",
-                password=initial_password
-            )
+            # จอง member_id ก่อน แล้วใช้เป็น username ได้ทันที (ไม่ต้องสร้าง temp_user แล้ว rename)
+            member.member_id = Member.allocate_member_ids(1)[0]
 
-            member.user = user
-            member.save()
+            # hash รหัสผ่าน (PBKDF2) ก่อนเปิด transaction - ไม่ถือ write lock ระหว่าง hash
+            user = User(username=member.member_id)
+            user.set_password(initial_password)
 
-            user.username = member.member_id
-            user.save()
+            with transaction.atomic():
+                user.save()
+                member.user = user
+                member.save()
 
             request.session["new_member_credentials"] = {
                 "username": member.member_id,
@@ -207,6 +290,93 @@ def add_member(request):
 
 
 
+@login_required
+@role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
+def export_members(request):
+    """
+    ดาวน์โหลดรายชื่อสมาชิกแบบ streaming (?format=csv|jsonl|json&fields=...&role=...&status=...)
+    ?since=<cursor> = เฉพาะการเปลี่ยนแปลงหลัง cursor (JSONL) cursor ถัดไปอยู่ใน header X-Next-Cursor
+    """
+    since = request.GET.get("since")
+    if since is not None:
+        try:
+            chunks, next_cursor = stream_changes(int(since), parse_fields(request.GET.get("fields")))
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        response = StreamingHttpResponse(chunks, content_type=f"{EXPORT_FORMATS['jsonl']}; charset=utf-8")
+        response["X-Next-Cursor"] = str(next_cursor)
+        response["Content-Disposition"] = f'attachment; filename="members-changes-{next_cursor}.jsonl"'
+        return response
+
+    fmt = request.GET.get("format", "csv")
+    try:
+        fields = parse_fields(request.GET.get("fields"))
+        queryset = filter_members(
+            Member.objects.all(),
+            role=request.GET.get("role") or None,
+            status=request.GET.get("status") or None,
+            joined_from=parse_date(request.GET.get("joined_from") or ""),
+            joined_to=parse_date(request.GET.get("joined_to") or ""),
+        )
+        chunks = stream_export(queryset, fmt, fields)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    response = StreamingHttpResponse(chunks, content_type=f"{EXPORT_FORMATS[fmt]}; charset=utf-8")
+    filename = f"members-{date.today().isoformat()}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+@role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
+def import_members(request):
+    """อัปโหลดไฟล์ CSV/XLSX เพื่อตรวจสอบก่อนนำเข้า"""
+    if request.method == "POST":
+        uploaded_file = request.FILES.get("file")
+        if not uploaded_file:
+            messages.error(request, _("กรุณาเลือกไฟล์"))
+        else:
+            try:
+                member_import = stage_import(uploaded_file, request.user)
+            except ImportFileError as exc:
+                messages.error(request, str(exc))
+            else:
+                return redirect("import_members_preview", pk=member_import.pk)
+
+    return render(request, "members/import_members.html", {
+        "import_fields": IMPORT_FIELDS,
+        "max_rows": MAX_IMPORT_ROWS,
+    })
+
+
+@login_required
+@role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
+def import_members_preview(request, pk):
+    """แสดงผลการตรวจสอบ และยืนยันการนำเข้า (POST)"""
+    member_import = get_object_or_404(MemberImport, pk=pk)
+
+    if request.method == "POST" and member_import.is_pending:
+        # ทีละชุด ให้แต่ละ request จบใน timeout - หน้าเว็บส่งชุดถัดไปเองจนครบ
+        commit_import(member_import, limit=settings.IMPORT_COMMIT_BATCH_SIZE)
+        if member_import.is_pending:
+            return redirect(f"{reverse('import_members_preview', args=[member_import.pk])}?continue=1")
+        messages.success(
+            request,
+            _("นำเข้าสมาชิก %(count)s คนเรียบร้อยแล้ว") % {"count": member_import.committed_count},
+        )
+        return redirect("member_list")
+
+    return render(request, "members/import_members_preview.html", {
+        "member_import": member_import,
+        "auto_continue": member_import.is_pending and member_import.committed_count > 0
+                         and request.GET.get("continue") == "1",
+        "preview_rows": member_import.valid_rows[:20],
+        "valid_count": len(member_import.valid_rows),
+        "error_rows": len({e["row"] for e in member_import.errors}),
+    })
+
+
 @login_required
 @role_required(["STAFF", "COMMITTEE", "PRESIDENT"])
 def edit_member(request, pk):
@@ -234,10 +404,9 @@ def delete_member(request, member_id):
     member = get_object_or_404(Member, member_id=member_id)
 
     if request.method == "POST":
-        if member.user:
-            member.user.delete()
-
-        member.delete()
+        # ลบ user อย่างเดียว - Member ถูกลบตาม (CASCADE) ใน transaction เดียวกัน
+        # ถ้าเรียก member.delete() ซ้ำ post_delete จะทำงานสองรอบ (tombstone ซ้ำ)
+        member.user.delete()
         messages.success(request, _("ลบสมาชิก %(member_id)s เรียบร้อยแล้ว") % {"member_id": member.member_id})
         return redirect("member_list")
 
@@ -250,25 +419,19 @@ def delete_member(request, member_id):
 
 @login_required
 def member_dashboard(request):
-    try:
-        member = Member.objects.get(user=request.user)
-    except Member.DoesNotExist:
+    member = get_current_member(request)
+    if member is None:
         messages.error(request, _("ไม่มีข้อมูลสมาชิก"))
         return redirect("staff_login")
 
-    card_url = member.get_card_view_only_url()
-    qr_image = generate_qr_base64(card_url, size=150) or None
-
     return render(request, "members/member_dashboard.html", {
         "member": member,
-        "qr_image": qr_image,
-        "qr_fallback_url": card_url,
     })
 
 
 @login_required
 def edit_profile(request):
-    member = getattr(request.user, 'member', None)
+    member = get_current_member(request)
     if not member:
         messages.error(request, _("ไม่มีข้อมูลสมาชิก กรุณาติดต่อผู้ดูแลระบบ"))
         return redirect("staff_login")
@@ -312,7 +475,7 @@ def edit_profile(request):
 
 @login_required
 def change_password(request):
-    member = getattr(request.user, 'member', None)
+    member = get_current_member(request)
     if not member:
         messages.error(request, _("ไม่มีข้อมูลสมาชิก กรุณาติดต่อผู้ดูแลระบบ"))
         return redirect("staff_login")
@@ -347,30 +510,31 @@ def change_password(request):
 def member_card(request, public_id):
     member = get_object_or_404(Member, public_id=public_id)
 
-    if not member.is_valid():
-        return render(request, "members/card_unavailable.html", {
-            "member": member,
-        })
-
     # ลิงก์กลับ Dashboard ตาม role ของผู้ที่ล็อกอินอยู่
     dashboard_url = None
     if request.user.is_authenticated:
-        try:
-            m = Member.objects.get(user=request.user)
-            dashboard_url = "staff_dashboard" if m.role in ("STAFF", "COMMITTEE", "PRESIDENT") else "member_dashboard"
-        except Member.DoesNotExist:
+        m = get_current_member(request)
+        if m is None:
             dashboard_url = "staff_login"
+        else:
+            dashboard_url = "staff_dashboard" if m.role in ("STAFF", "COMMITTEE", "PRESIDENT") else "member_dashboard"
 
-    card_url = member.get_card_view_only_url()
-    qr_image = generate_qr_base64(card_url, size=120) or None
+    def render_card():
+        if not member.is_valid():
+            return render(request, "members/card_unavailable.html", {
+                "member": member,
+            })
 
-    return render(request, "members/member_card.html", {
-        "member": member,
-        "today": date.today(),
-        "dashboard_url": dashboard_url,
-        "qr_image": qr_image,
-        "qr_fallback_url": card_url,
-    })
+        return render(request, "members/member_card.html", {
+            "member": member,
+            "today": date.today(),
+            "dashboard_url": dashboard_url,
+        })
+
+    # หน้านี้ต่างกันตามผู้ใช้ที่ล็อกอิน (ลิงก์กลับ) - cache ได้เฉพาะใน browser
+    return conditional_card_response(
+        request, member, "card", render_card, extra=(dashboard_url,), private=True,
+    )
 
 def member_card_expired(request, public_id):
     member = get_object_or_404(Member, public_id=public_id)
@@ -387,7 +551,11 @@ def member_card_expired(request, public_id):
 
 
 def member_card_view_only(request, public_id):
-    """หน้าแสดงบัตรอย่างเดียว สำหรับ QR scan - ไม่มีปุ่มกลับ ป้องกันผู้สแกนเข้าถึงระบบ"""
+    """
+    หน้าแสดงบัตรอย่างเดียว สำหรับ QR scan - ไม่มีปุ่มกลับ ป้องกันผู้สแกนเข้าถึงระบบ
+    รองรับ conditional GET - สแกนซ้ำได้ 304 โดยไม่ต้อง render ใหม่
+    ไม่ให้ proxy/CDN cache (ทุกการสแกนต้องผ่าน record_scan) - browser ใช้ ETag ถามซ้ำได้
+    """
     member = get_object_or_404(Member, public_id=public_id)
 
     logger.info(
@@ -395,42 +563,189 @@ def member_card_view_only(request, public_id):
         str(member.public_id),
         request.META.get("REMOTE_ADDR", "unknown"),
     )
+    record_scan(request, member)
 
-    if not member.is_valid():
-        return render(request, "members/card_unavailable.html", {
+    def render_card():
+        if not member.is_valid():
+            return render(request, "members/card_unavailable.html", {
+                "member": member,
+            })
+
+        return render(request, "members/member_card_view_only.html", {
             "member": member,
+            "today": date.today(),
         })
 
-    card_url = member.get_card_view_only_url()
-    qr_image = generate_qr_base64(card_url, size=120) or None
-
-    return render(request, "members/member_card_view_only.html", {
-        "member": member,
-        "today": date.today(),
-        "qr_image": qr_image,
-        "qr_fallback_url": card_url,
-    })
+    return conditional_card_response(request, member, "view_only", render_card, revalidate=True)
 
 
 def member_card_expired_view_only(request, public_id):
     """หน้าแสดงบัตรหมดอายุอย่างเดียว สำหรับ QR scan - ไม่มีปุ่มกลับ"""
     member = get_object_or_404(Member, public_id=public_id)
 
-    if not member.is_valid():
-        return render(request, "members/card_unavailable.html", {
+    def render_card():
+        if not member.is_valid():
+            return render(request, "members/card_unavailable.html", {
+                "member": member,
+            })
+
+        return render(request, "members/member_card_expired_view_only.html", {
             "member": member,
+            "today": date.today(),
         })
 
-    return render(request, "members/member_card_expired_view_only.html", {
-        "member": member,
-        "today": date.today(),
-    })
+    return conditional_card_response(request, member, "expired_view_only", render_card)
+
+
+
+def member_qr(request, public_id, fmt):
+    """
+    รูป QR ของบัตร (qr.svg / qr.png?size=) แทนการฝัง base64 ในหน้า
+    เนื้อหาขึ้นกับข้อความใน QR (URL + token) เท่านั้น - ลิงก์ที่มี ?v= ตรงกับข้อความปัจจุบันจึง cache แบบ immutable
+    """
+    row = Member.objects.filter(public_id=public_id).values_list("expire_date").first()
+    if row is None:
+        raise Http404
+
+    qr_url = Member(public_id=public_id, expire_date=row[0]).get_qr_url()
+    if fmt == "svg":
+        content, content_type = get_qr_svg(qr_url), "image/svg+xml"
+    else:
+        try:
+            size = int(request.GET.get("size", 120))
+        except ValueError:
+            size = None
+        if size not in QR_SIZES:
+            return HttpResponseBadRequest(f"size must be one of {QR_SIZES}")
+        content, content_type = get_qr_png(qr_url, size), "image/png"
+
+    etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+    response["ETag"] = etag
+
+    if request.GET.get("v") == qr_version(qr_url):
+        patch_cache_control(response, public=True, max_age=QR_IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.CARD_CACHE_MAX_AGE)
+    return response
+
 
+# =========================
+# GATE SCANNER API
+# =========================
+
+def verify_card(request, public_id):
+    """
+    ตรวจสถานะบัตรแบบเบา (คิวรีเดียว ไม่ render template) ด้วยกฎเดียวกับ Member.is_valid()
+    ?t=<token จาก QR> = ตรวจลายเซ็นด้วย (signature: ok / invalid)
+    """
+    row = (
+        Member.objects.filter(public_id=public_id)
+        .values_list("pk", "is_active", "expire_date")
+        .first()
+    )
+    if row is None:
+        return JsonResponse({"public_id": str(public_id), "valid": False, "status": "not_found"}, status=404)
+
+    pk, is_active, expire_date = row
+    member = Member(pk=pk, public_id=public_id, is_active=is_active, expire_date=expire_date)
+    record_scan(request, member)
+
+    valid = member.is_valid()
+    if valid:
+        status = "valid"
+    elif not is_active:
+        status = "inactive"
+    else:
+        status = "expired"
+
+    data = {
+        "public_id": str(public_id),
+        "valid": valid,
+        "status": status,
+        "expire_date": expire_date.isoformat() if expire_date else None,
+    }
+
+    token = request.GET.get("t")
+    if token is not None:
+        try:
+            signed_expire_date = verify_card_token(public_id, token)
+        except CardTokenError:
+            data["signature"] = "invalid"
+        else:
+            # บัตรที่ต่ออายุแล้วแต่ยังใช้ QR เดิม ลายเซ็นยังถูกต้อง แต่วันหมดอายุในบัตรเก่ากว่า
+            data["signature"] = "ok" if signed_expire_date == expire_date else "outdated"
+
+    # ทุกการเรียกต้องถึง server: บันทึกการสแกน และเห็นการระงับบัตรทันที (ห้าม CDN/proxy cache)
+    response = JsonResponse(data)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+def _scanner_authorized(request):
+    """
+    เครื่องสแกนต้องส่ง Authorization: Bearer <SCANNER_API_TOKEN>
+    ไม่ได้ตั้ง token หรือ SCANNER_FINGERPRINT_KEY = ปิด endpoint (404) เหมือน /metrics
+    """
+    token = settings.SCANNER_API_TOKEN
+    if not token or not settings.SCANNER_FINGERPRINT_KEY:
+        raise Http404
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def scanner_snapshot(request):
+    """เซตบัตรที่ใช้ได้แบบบีบอัด (ดู members/scanner.py) - ETag = version ตอบ 304 ได้ในคิวรีเดียว"""
+    if not _scanner_authorized(request):
+        return JsonResponse({"error": "unauthorized"}, status=401)
+
+    version = current_version()
+    etag = f'"{version}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        version, data = get_snapshot(version)
+        response = HttpResponse(data, content_type="application/octet-stream")
+    response["ETag"] = etag
+    response["X-Snapshot-Version"] = version
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def scanner_delta(request):
+    """การเปลี่ยนแปลงตั้งแต่ ?since=<version> (400 = since ว่าง/ผิดรูปแบบ, 410 = ให้โหลด snapshot ใหม่)"""
+    if not _scanner_authorized(request):
+        return JsonResponse({"error": "unauthorized"}, status=401)
+
+    try:
+        delta = build_delta(request.GET.get("since"))
+    except InvalidVersionError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    except SnapshotVersionError as exc:
+        return JsonResponse({"error": str(exc)}, status=410)
+    response = JsonResponse(delta)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def metrics(request):
+    """ค่าจาก RequestMetricsMiddleware ในรูปแบบ Prometheus text - ต้องตั้ง METRICS_TOKEN และส่ง Bearer"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse("unauthorized\n", status=401, content_type="text/plain")
+
+    response = HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+    patch_cache_control(response, private=True, no_store=True)
+    return response
 
 
 @login_required
 def my_card(request):
-    member = get_object_or_404(Member, user=request.user)
+    member = get_current_member(request)
+    if member is None:
+        raise Http404
     return redirect("member_card", public_id=member.public_id)
 
 
@@ -445,22 +760,14 @@ def card_print(request, public_id):
         })
 
     # กำหนด URL กลับ ตาม role ของผู้ที่ login
-    try:
-        current_member = Member.objects.get(user=request.user)
-        if current_member.role in ("STAFF", "COMMITTEE", "PRESIDENT"):
-            back_url = "/staff/"
-        else:
-            back_url = "/dashboard/"
-    except Member.DoesNotExist:
+    current_member = get_current_member(request)
+    if current_member is None or current_member.role in ("STAFF", "COMMITTEE", "PRESIDENT"):
         back_url = "/staff/"
-
-    card_url = member.get_card_view_only_url()
-    qr_image = generate_qr_base64(card_url, size=100) or None
+    else:
+        back_url = "/dashboard/"
 
     return render(request, "members/card_print.html", {
         "member": member,
-        "qr_image": qr_image,
-        "qr_fallback_url": card_url,
         "back_url": back_url,
     })
 
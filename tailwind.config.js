@@ -0,0 +1,13 @@
+// สร้าง static/css/app.css ด้วย python manage.py build_assets
+// Tailwind ใส่เฉพาะ class ที่พบในไฟล์ตาม content - class ที่ประกอบขึ้นตอน runtime ต้องเขียนเต็มชื่อที่ใดที่หนึ่ง
+/** @type {import('tailwindcss').Config} */
+module.exports = {
+  content: [
+    "./members/templates/**/*.html",
+    "./members/**/*.py",
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};